@@ -0,0 +1,49 @@
+"""add_execution_logs
+
+Revision ID: a1c4e7d2b9f0
+Revises: 82df2ab76654
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c4e7d2b9f0'
+down_revision: Union[str, None] = '82df2ab76654'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'execution_logs',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('dag_run_id', sa.Integer(), nullable=True),
+        sa.Column('node_id', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('input_data', sa.JSON(), nullable=True),
+        sa.Column('output_data', sa.JSON(), nullable=True),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('error_type', sa.String(), nullable=True),
+        sa.Column('metrics', sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(['dag_run_id'], ['dag_runs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_execution_logs_id'), 'execution_logs', ['id'], unique=False)
+    op.create_index(op.f('ix_execution_logs_dag_run_id'), 'execution_logs', ['dag_run_id'], unique=False)
+    op.create_index(op.f('ix_execution_logs_node_id'), 'execution_logs', ['node_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_execution_logs_node_id'), table_name='execution_logs')
+    op.drop_index(op.f('ix_execution_logs_dag_run_id'), table_name='execution_logs')
+    op.drop_index(op.f('ix_execution_logs_id'), table_name='execution_logs')
+    op.drop_table('execution_logs')
@@ -0,0 +1,58 @@
+"""add_execution_log_metric_columns
+
+Revision ID: a7c3e9f1d5b2
+Revises: f4b8d2c6a9e1
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c3e9f1d5b2'
+down_revision: Union[str, None] = 'f4b8d2c6a9e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = {
+    'duration_seconds': sa.Float(),
+    'input_size_bytes': sa.BigInteger(),
+    'output_size_bytes': sa.BigInteger(),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('execution_logs')}
+    for name, column_type in COLUMNS.items():
+        if name not in existing:
+            op.add_column('execution_logs', sa.Column(name, column_type, nullable=True))
+
+    # Backfill from the metrics JSON written by ExecutionLog.calculate_metrics
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            "UPDATE execution_logs SET "
+            "duration_seconds = (metrics->>'duration_seconds')::double precision, "
+            "input_size_bytes = (metrics->>'input_size_bytes')::numeric::bigint, "
+            "output_size_bytes = (metrics->>'output_size_bytes')::numeric::bigint "
+            "WHERE metrics IS NOT NULL"
+        )
+    else:
+        op.execute(
+            "UPDATE execution_logs SET "
+            "duration_seconds = json_extract(metrics, '$.duration_seconds'), "
+            "input_size_bytes = json_extract(metrics, '$.input_size_bytes'), "
+            "output_size_bytes = json_extract(metrics, '$.output_size_bytes') "
+            "WHERE metrics IS NOT NULL"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('execution_logs')}
+    for name in reversed(list(COLUMNS)):
+        if name in existing:
+            op.drop_column('execution_logs', name)
@@ -0,0 +1,37 @@
+"""add_execution_log_artifacts
+
+Revision ID: b9d4f2a8c6e3
+Revises: a7c3e9f1d5b2
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9d4f2a8c6e3'
+down_revision: Union[str, None] = 'a7c3e9f1d5b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ('input_artifact', 'output_artifact')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # New payloads go to the artifact store; existing inline input_data/output_data stay readable in place
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('execution_logs')}
+    for name in COLUMNS:
+        if name not in existing:
+            op.add_column('execution_logs', sa.Column(name, sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('execution_logs')}
+    for name in reversed(COLUMNS):
+        if name in existing:
+            op.drop_column('execution_logs', name)
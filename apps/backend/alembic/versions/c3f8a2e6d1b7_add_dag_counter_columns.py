@@ -0,0 +1,51 @@
+"""add_dag_counter_columns
+
+Revision ID: c3f8a2e6d1b7
+Revises: a1c4e7d2b9f0
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f8a2e6d1b7'
+down_revision: Union[str, None] = 'a1c4e7d2b9f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _missing_columns() -> list:
+    # The DAG tables are created by init_db's create_all, which may already include the counters
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('syntheticdatadags'):
+        return []
+    existing = {column['name'] for column in inspector.get_columns('syntheticdatadags')}
+    return [name for name in ('node_count', 'edge_count') if name not in existing]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    missing = _missing_columns()
+    for name in missing:
+        op.add_column('syntheticdatadags', sa.Column(name, sa.Integer(), nullable=False, server_default='0'))
+    if missing:
+        # Backfill from the node and edge tables
+        op.execute(
+            "UPDATE syntheticdatadags SET "
+            "node_count = (SELECT count(*) FROM dagnodes WHERE dagnodes.dag_id = syntheticdatadags.id), "
+            "edge_count = (SELECT count(*) FROM dagedges WHERE dagedges.dag_id = syntheticdatadags.id)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('syntheticdatadags'):
+        existing = {column['name'] for column in inspector.get_columns('syntheticdatadags')}
+        for name in ('edge_count', 'node_count'):
+            if name in existing:
+                op.drop_column('syntheticdatadags', name)
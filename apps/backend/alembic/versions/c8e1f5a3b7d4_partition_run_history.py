@@ -0,0 +1,205 @@
+"""partition_run_history
+
+Revision ID: c8e1f5a3b7d4
+Revises: b9d4f2a8c6e3
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e1f5a3b7d4'
+down_revision: Union[str, None] = 'b9d4f2a8c6e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months of partitions created past the current one (app.db.partitions keeps extending them)
+PARTITIONS_AHEAD = 3
+
+# Frozen copy of app.db.rollups at this revision; dropping the old dag_runs drops its triggers
+ROLLUP_TRIGGERS_SQL = """
+DROP TRIGGER IF EXISTS dag_runs_rollup_insert_delete ON dag_runs;
+CREATE TRIGGER dag_runs_rollup_insert_delete
+    AFTER INSERT OR DELETE ON dag_runs
+    FOR EACH ROW EXECUTE FUNCTION dag_runs_rollup();
+
+DROP TRIGGER IF EXISTS dag_runs_rollup_update ON dag_runs;
+CREATE TRIGGER dag_runs_rollup_update
+    AFTER UPDATE OF dag_id, status, started_at ON dag_runs
+    FOR EACH ROW
+    WHEN (OLD.dag_id IS DISTINCT FROM NEW.dag_id
+          OR OLD.status IS DISTINCT FROM NEW.status
+          OR OLD.started_at IS DISTINCT FROM NEW.started_at)
+    EXECUTE FUNCTION dag_runs_rollup();
+"""
+
+# Runs that never started get their completion (or the current) time, so every run has a month
+BACKFILL_STARTED_AT_SQL = """
+UPDATE dag_runs SET started_at = COALESCE(completed_at, {now}) WHERE started_at IS NULL
+"""
+
+BACKFILL_RUN_STARTED_AT_SQL = """
+UPDATE execution_logs
+SET run_started_at = (SELECT dag_runs.started_at FROM dag_runs WHERE dag_runs.id = execution_logs.dag_run_id)
+WHERE run_started_at IS NULL
+"""
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _dag_run_columns(id_sequence: str, partitioned: bool) -> list:
+    return [
+        sa.Column('id', sa.Integer(), server_default=sa.text(f"nextval('{id_sequence}'::regclass)"), nullable=False),
+        sa.Column('dag_id', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=not partitioned),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('metrics', sa.JSON(), nullable=True),
+    ]
+
+
+def _execution_log_columns(id_sequence: str, partitioned: bool) -> list:
+    columns = [
+        sa.Column('id', sa.Integer(), server_default=sa.text(f"nextval('{id_sequence}'::regclass)"), nullable=False),
+        sa.Column('dag_run_id', sa.Integer(), nullable=True),
+        sa.Column('node_id', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('input_data', sa.JSON(), nullable=True),
+        sa.Column('output_data', sa.JSON(), nullable=True),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('error_type', sa.String(), nullable=True),
+        sa.Column('metrics', sa.JSON(), nullable=True),
+        sa.Column('duration_seconds', sa.Float(), nullable=True),
+        sa.Column('input_size_bytes', sa.BigInteger(), nullable=True),
+        sa.Column('output_size_bytes', sa.BigInteger(), nullable=True),
+        sa.Column('input_artifact', sa.String(length=64), nullable=True),
+        sa.Column('output_artifact', sa.String(length=64), nullable=True),
+    ]
+    if partitioned:
+        columns.append(sa.Column('run_started_at', sa.DateTime(), nullable=False))
+    return columns
+
+
+def _rebuild_postgresql(partitioned: bool) -> None:
+    """Recreate dag_runs and execution_logs (partitioned by month or plain), keeping rows, ids, indexes and triggers.
+
+    Holds ACCESS EXCLUSIVE on both tables while their rows are copied, so plan
+    for downtime proportional to the run history.
+    """
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    op.execute("LOCK TABLE dag_runs, execution_logs IN ACCESS EXCLUSIVE MODE")
+    # Unique indexes can't be partitioned without the partition key; only the primary keys are unique here
+    indexes = {
+        table: [index for index in inspector.get_indexes(table) if not index['unique'] and all(index['column_names'])]
+        for table in ('dag_runs', 'execution_logs')
+    }
+    sequences = {
+        table: bind.execute(sa.text("SELECT pg_get_serial_sequence(:table, 'id')"), {'table': table}).scalar()
+        for table in ('dag_runs', 'execution_logs')
+    }
+    # The id sequences outlive the old tables and keep numbering the new ones
+    for sequence in sequences.values():
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY NONE")
+    op.rename_table('execution_logs', 'execution_logs_old')
+    op.rename_table('dag_runs', 'dag_runs_old')
+
+    run_options = {'postgresql_partition_by': 'RANGE (started_at)'} if partitioned else {}
+    log_options = {'postgresql_partition_by': 'RANGE (run_started_at)'} if partitioned else {}
+    op.create_table('dag_runs', *_dag_run_columns(sequences['dag_runs'], partitioned), **run_options)
+    op.create_table('execution_logs', *_execution_log_columns(sequences['execution_logs'], partitioned), **log_options)
+
+    if partitioned:
+        # Orphaned logs (no run) fall back to their own start time
+        first, last = bind.execute(sa.text(
+            "SELECT LEAST(min(started_at), (SELECT min(started_at) FROM execution_logs_old WHERE dag_run_id IS NULL)), "
+            "GREATEST(max(started_at), (SELECT max(started_at) FROM execution_logs_old WHERE dag_run_id IS NULL)) "
+            "FROM dag_runs_old"
+        )).one()
+        this_month = datetime.utcnow().date().replace(day=1)
+        month = min(first.date().replace(day=1), this_month) if first else this_month
+        last_month = max(last.date().replace(day=1), _add_months(this_month, PARTITIONS_AHEAD)) if last \
+            else _add_months(this_month, PARTITIONS_AHEAD)
+        while month <= last_month:
+            for table in ('dag_runs', 'execution_logs'):
+                op.execute(
+                    f"CREATE TABLE {table}_p{month:%Y_%m} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+                )
+            month = _add_months(month, 1)
+
+    run_columns = ', '.join(column.name for column in _dag_run_columns('', False))
+    log_columns = ', '.join(column.name for column in _execution_log_columns('', False))
+    op.execute(f"INSERT INTO dag_runs ({run_columns}) SELECT {run_columns} FROM dag_runs_old")
+    if partitioned:
+        op.execute(
+            f"INSERT INTO execution_logs ({log_columns}, run_started_at) "
+            f"SELECT {', '.join('logs.' + name for name in log_columns.split(', '))}, "
+            "COALESCE(dag_runs.started_at, logs.started_at, timezone('utc', now())) "
+            "FROM execution_logs_old AS logs LEFT JOIN dag_runs ON dag_runs.id = logs.dag_run_id"
+        )
+    else:
+        op.execute(f"INSERT INTO execution_logs ({log_columns}) SELECT {log_columns} FROM execution_logs_old")
+    op.drop_table('execution_logs_old')
+    op.drop_table('dag_runs_old')
+
+    # Primary keys of partitioned tables must include the partition key
+    op.create_primary_key('dag_runs_pkey', 'dag_runs', ['id', 'started_at'] if partitioned else ['id'])
+    op.create_primary_key('execution_logs_pkey', 'execution_logs', ['id', 'run_started_at'] if partitioned else ['id'])
+    op.create_foreign_key('dag_runs_dag_id_fkey', 'dag_runs', 'dags', ['dag_id'], ['id'])
+    if partitioned:
+        # ON UPDATE CASCADE: logs follow a run whose started_at changes (PostgreSQL 15+ moves the row, not delete+insert)
+        op.create_foreign_key(
+            'execution_logs_dag_run_id_fkey', 'execution_logs', 'dag_runs',
+            ['dag_run_id', 'run_started_at'], ['id', 'started_at'], ondelete='CASCADE', onupdate='CASCADE'
+        )
+    else:
+        op.create_foreign_key(
+            'execution_logs_dag_run_id_fkey', 'execution_logs', 'dag_runs', ['dag_run_id'], ['id'], ondelete='CASCADE'
+        )
+    for table, table_indexes in indexes.items():
+        for index in table_indexes:
+            op.create_index(index['name'], table, index['column_names'], unique=False)
+    for table, sequence in sequences.items():
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+    op.execute(ROLLUP_TRIGGERS_SQL)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        if bind.execute(sa.text("SELECT to_regclass('dag_runs') IN (SELECT partrelid FROM pg_partitioned_table)")).scalar():
+            return
+        # Fires the rollup trigger, so newly dated runs are counted
+        op.execute(BACKFILL_STARTED_AT_SQL.format(now="timezone('utc', now())"))
+        _rebuild_postgresql(partitioned=True)
+        return
+
+    # Other databases aren't partitioned; they only get the column and the backfills
+    if 'run_started_at' not in {column['name'] for column in sa.inspect(bind).get_columns('execution_logs')}:
+        op.add_column('execution_logs', sa.Column('run_started_at', sa.DateTime(), nullable=True))
+    op.execute(BACKFILL_STARTED_AT_SQL.format(now="CURRENT_TIMESTAMP"))
+    op.execute(BACKFILL_RUN_STARTED_AT_SQL)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        if bind.execute(sa.text("SELECT to_regclass('dag_runs') IN (SELECT partrelid FROM pg_partitioned_table)")).scalar():
+            _rebuild_postgresql(partitioned=False)
+        return
+    if 'run_started_at' in {column['name'] for column in sa.inspect(bind).get_columns('execution_logs')}:
+        op.drop_column('execution_logs', 'run_started_at')
@@ -0,0 +1,77 @@
+"""add_dag_versions
+
+Revision ID: d5e9b3a7c2f4
+Revises: c3f8a2e6d1b7
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e9b3a7c2f4'
+down_revision: Union[str, None] = 'c3f8a2e6d1b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The DAG tables are created by init_db's create_all, which may already include everything below.
+    # Existing DAGs start their history (version 1) at their next save.
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('syntheticdatadags'):
+        return
+
+    existing = {column['name'] for column in inspector.get_columns('syntheticdatadags')}
+    if 'version' not in existing:
+        op.add_column('syntheticdatadags', sa.Column('version', sa.Integer(), nullable=False, server_default='0'))
+    if 'content_hash' not in existing:
+        op.add_column('syntheticdatadags', sa.Column('content_hash', sa.String(length=32), nullable=True))
+
+    if not inspector.has_table('dag_node_contents'):
+        op.create_table(
+            'dag_node_contents',
+            sa.Column('dag_id', sa.Integer(), nullable=False),
+            sa.Column('hash', sa.String(length=32), nullable=False),
+            sa.Column('frontend_id', sa.String(), nullable=True),
+            sa.Column('node_type', sa.String(), nullable=True),
+            sa.Column('config', sa.JSON(), nullable=True),
+            sa.Column('position', sa.JSON(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.ForeignKeyConstraint(['dag_id'], ['syntheticdatadags.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('dag_id', 'hash'),
+        )
+
+    if not inspector.has_table('dag_versions'):
+        op.create_table(
+            'dag_versions',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('dag_id', sa.Integer(), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.Column('content_hash', sa.String(length=32), nullable=False),
+            sa.Column('name', sa.String(), nullable=True),
+            sa.Column('description', sa.String(), nullable=True),
+            sa.Column('node_hashes', sa.JSON(), nullable=False),
+            sa.Column('edges', sa.JSON(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+            sa.ForeignKeyConstraint(['dag_id'], ['syntheticdatadags.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('dag_id', 'version', name='uq_dag_versions_dag_id_version'),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    for table in ('dag_versions', 'dag_node_contents'):
+        if inspector.has_table(table):
+            op.drop_table(table)
+    if inspector.has_table('syntheticdatadags'):
+        existing = {column['name'] for column in inspector.get_columns('syntheticdatadags')}
+        for name in ('content_hash', 'version'):
+            if name in existing:
+                op.drop_column('syntheticdatadags', name)
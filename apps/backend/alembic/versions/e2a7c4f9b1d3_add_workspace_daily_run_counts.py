@@ -0,0 +1,112 @@
+"""add_workspace_daily_run_counts
+
+Revision ID: e2a7c4f9b1d3
+Revises: d5e9b3a7c2f4
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a7c4f9b1d3'
+down_revision: Union[str, None] = 'd5e9b3a7c2f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Frozen copy of app.db.rollups at this revision
+ROLLUP_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION dag_runs_rollup() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.started_at IS NOT NULL THEN
+        UPDATE workspace_daily_run_counts AS counts
+        SET run_count = counts.run_count - 1
+        FROM dags
+        WHERE dags.id = OLD.dag_id
+          AND counts.workspace_id = dags.workspace_id
+          AND counts.day = OLD.started_at::date
+          AND counts.status = COALESCE(OLD.status, 'unknown');
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.started_at IS NOT NULL THEN
+        INSERT INTO workspace_daily_run_counts (workspace_id, day, status, run_count)
+        SELECT dags.workspace_id, NEW.started_at::date, COALESCE(NEW.status, 'unknown'), 1
+        FROM dags
+        WHERE dags.id = NEW.dag_id
+        ON CONFLICT (workspace_id, day, status)
+        DO UPDATE SET run_count = workspace_daily_run_counts.run_count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS dag_runs_rollup_insert_delete ON dag_runs;
+CREATE TRIGGER dag_runs_rollup_insert_delete
+    AFTER INSERT OR DELETE ON dag_runs
+    FOR EACH ROW EXECUTE FUNCTION dag_runs_rollup();
+
+DROP TRIGGER IF EXISTS dag_runs_rollup_update ON dag_runs;
+CREATE TRIGGER dag_runs_rollup_update
+    AFTER UPDATE OF dag_id, status, started_at ON dag_runs
+    FOR EACH ROW
+    WHEN (OLD.dag_id IS DISTINCT FROM NEW.dag_id
+          OR OLD.status IS DISTINCT FROM NEW.status
+          OR OLD.started_at IS DISTINCT FROM NEW.started_at)
+    EXECUTE FUNCTION dag_runs_rollup();
+"""
+
+BACKFILL_SQL = """
+DELETE FROM workspace_daily_run_counts;
+INSERT INTO workspace_daily_run_counts (workspace_id, day, status, run_count)
+SELECT dags.workspace_id, dag_runs.started_at::date, COALESCE(dag_runs.status, 'unknown'), count(*)
+FROM dag_runs
+JOIN dags ON dags.id = dag_runs.dag_id
+WHERE dag_runs.started_at IS NOT NULL
+GROUP BY 1, 2, 3;
+"""
+
+
+def _create_index_if_missing(inspector, name: str, table: str, columns: list) -> None:
+    if name not in {index['name'] for index in inspector.get_indexes(table)}:
+        op.create_index(name, table, columns, unique=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('workspace_daily_run_counts'):
+        op.create_table(
+            'workspace_daily_run_counts',
+            sa.Column('workspace_id', sa.Integer(), nullable=False),
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('status', sa.String(), nullable=False),
+            sa.Column('run_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.ForeignKeyConstraint(['workspace_id'], ['workspaces.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('workspace_id', 'day', 'status'),
+        )
+    # The dashboard's 24h active-run count and recent activity walk dag_runs by started_at
+    _create_index_if_missing(inspector, 'ix_dag_runs_started_at', 'dag_runs', ['started_at'])
+    _create_index_if_missing(inspector, 'ix_dags_workspace_id', 'dags', ['workspace_id'])
+
+    if op.get_bind().dialect.name == 'postgresql':
+        # Install the trigger before backfilling in one transaction, so no run is missed or counted twice
+        op.execute("LOCK TABLE dag_runs IN SHARE ROW EXCLUSIVE MODE")
+        op.execute(ROLLUP_TRIGGER_SQL)
+        op.execute(BACKFILL_SQL)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP TRIGGER IF EXISTS dag_runs_rollup_update ON dag_runs")
+        op.execute("DROP TRIGGER IF EXISTS dag_runs_rollup_insert_delete ON dag_runs")
+        op.execute("DROP FUNCTION IF EXISTS dag_runs_rollup()")
+    inspector = sa.inspect(op.get_bind())
+    for name, table in (('ix_dags_workspace_id', 'dags'), ('ix_dag_runs_started_at', 'dag_runs')):
+        if name in {index['name'] for index in inspector.get_indexes(table)}:
+            op.drop_index(name, table_name=table)
+    if inspector.has_table('workspace_daily_run_counts'):
+        op.drop_table('workspace_daily_run_counts')
@@ -0,0 +1,178 @@
+"""store_dag_versions_as_deltas
+
+Revision ID: e6b2d8f4a1c9
+Revises: c8e1f5a3b7d4
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+import hashlib
+from typing import Any, Dict, List, Sequence, Union
+
+import orjson
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6b2d8f4a1c9'
+down_revision: Union[str, None] = 'c8e1f5a3b7d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+dags = sa.table(
+    'syntheticdatadags',
+    sa.column('id', sa.Integer), sa.column('name', sa.String), sa.column('description', sa.String),
+    sa.column('version', sa.Integer), sa.column('content_hash', sa.String),
+)
+dag_nodes = sa.table(
+    'dagnodes',
+    sa.column('id', sa.Integer), sa.column('dag_id', sa.Integer), sa.column('frontend_id', sa.String),
+    sa.column('node_type', sa.String), sa.column('config', sa.JSON), sa.column('position', sa.JSON),
+)
+dag_edges = sa.table(
+    'dagedges',
+    sa.column('id', sa.Integer), sa.column('dag_id', sa.Integer),
+    sa.column('source_node_id', sa.String), sa.column('target_node_id', sa.String),
+)
+node_contents = sa.table(
+    'dag_node_contents',
+    sa.column('dag_id', sa.Integer), sa.column('hash', sa.String), sa.column('frontend_id', sa.String),
+    sa.column('node_type', sa.String), sa.column('config', sa.JSON), sa.column('position', sa.JSON),
+)
+versions = sa.table(
+    'dag_versions',
+    sa.column('id', sa.Integer), sa.column('dag_id', sa.Integer), sa.column('version', sa.Integer),
+    sa.column('content_hash', sa.String), sa.column('name', sa.String), sa.column('description', sa.String),
+    sa.column('snapshot_version', sa.Integer), sa.column('node_hashes', sa.JSON), sa.column('edges', sa.JSON),
+    sa.column('delta', sa.JSON), sa.column('node_count', sa.Integer), sa.column('edge_count', sa.Integer),
+)
+
+
+# Frozen copies of app.services.dag_versions' hashing at this revision
+def _hash(value: Any) -> str:
+    return hashlib.blake2b(orjson.dumps(value, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+
+
+def _content_hash(name: str, description: str, node_hashes: List[str], edges: List[List[str]]) -> str:
+    return _hash({"name": name, "description": description, "nodes": sorted(node_hashes), "edges": sorted(edges)})
+
+
+def _unique_edges(edges: List[Any]) -> List[List[str]]:
+    # [{"id", "source", "target"}] (or [source, target] pairs) as unique [source, target] pairs in order
+    pairs = [[edge["source"], edge["target"]] if isinstance(edge, dict) else list(edge) for edge in edges]
+    return [list(pair) for pair in dict.fromkeys(tuple(pair) for pair in pairs)]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table('dag_versions'):
+        return
+
+    existing = {column['name'] for column in inspector.get_columns('dag_versions')}
+    with op.batch_alter_table('dag_versions') as batch:
+        if 'snapshot_version' not in existing:
+            batch.add_column(sa.Column('snapshot_version', sa.Integer(), nullable=True))
+        if 'delta' not in existing:
+            batch.add_column(sa.Column('delta', sa.JSON(), nullable=True))
+        if 'node_count' not in existing:
+            batch.add_column(sa.Column('node_count', sa.Integer(), nullable=False, server_default='0'))
+        if 'edge_count' not in existing:
+            batch.add_column(sa.Column('edge_count', sa.Integer(), nullable=False, server_default='0'))
+        batch.alter_column('node_hashes', existing_type=sa.JSON(), nullable=True)
+        batch.alter_column('edges', existing_type=sa.JSON(), nullable=True)
+
+    # Every existing version is a full row. Edges become unique (source, target) pairs and content
+    # hashes are recomputed the way the store now computes them, so unchanged DAGs don't get a new version
+    head_hashes: Dict[tuple, str] = {}
+    for row in bind.execute(
+        sa.select(versions.c.id, versions.c.dag_id, versions.c.version, versions.c.name, versions.c.description,
+                  versions.c.node_hashes, versions.c.edges).where(versions.c.snapshot_version.is_(None))
+    ).all():
+        edges = _unique_edges(row.edges)
+        digest = _content_hash(row.name, row.description, row.node_hashes, edges)
+        head_hashes[(row.dag_id, row.version)] = digest
+        bind.execute(versions.update().where(versions.c.id == row.id).values(
+            snapshot_version=row.version, edges=edges, content_hash=digest,
+            node_count=len(row.node_hashes), edge_count=len(edges),
+        ))
+    for dag in bind.execute(sa.select(dags.c.id, dags.c.version).where(dags.c.version > 0)).all():
+        if (dag.id, dag.version) in head_hashes:
+            bind.execute(dags.update().where(dags.c.id == dag.id).values(content_hash=head_hashes[(dag.id, dag.version)]))
+
+    # DAGs saved before versioning get their current graph as version 1
+    for dag in bind.execute(sa.select(dags.c.id, dags.c.name, dags.c.description).where(dags.c.version == 0)).all():
+        contents = {}
+        node_hashes = []
+        for node in bind.execute(
+            sa.select(dag_nodes).where(dag_nodes.c.dag_id == dag.id).order_by(dag_nodes.c.id)
+        ).all():
+            # get_dag's id for nodes saved before frontend_id was stored
+            node_id = node.frontend_id or str(node.id)
+            node_hash = _hash({"id": node_id, "type": node.node_type, "position": node.position, "data": node.config})
+            contents[node_hash] = {"dag_id": dag.id, "hash": node_hash, "frontend_id": node_id,
+                                   "node_type": node.node_type, "config": node.config, "position": node.position}
+            node_hashes.append(node_hash)
+        edges = _unique_edges([
+            [edge.source_node_id, edge.target_node_id]
+            for edge in bind.execute(
+                sa.select(dag_edges.c.source_node_id, dag_edges.c.target_node_id)
+                .where(dag_edges.c.dag_id == dag.id).order_by(dag_edges.c.id)
+            ).all()
+        ])
+        stored = set(bind.execute(
+            sa.select(node_contents.c.hash).where(node_contents.c.dag_id == dag.id)
+        ).scalars())
+        missing = [content for node_hash, content in contents.items() if node_hash not in stored]
+        if missing:
+            bind.execute(node_contents.insert(), missing)
+        digest = _content_hash(dag.name, dag.description, node_hashes, edges)
+        bind.execute(versions.insert().values(
+            dag_id=dag.id, version=1, content_hash=digest, name=dag.name, description=dag.description,
+            snapshot_version=1, node_hashes=node_hashes, edges=edges,
+            node_count=len(node_hashes), edge_count=len(edges),
+        ))
+        bind.execute(dags.update().where(dags.c.id == dag.id).values(version=1, content_hash=digest))
+
+    with op.batch_alter_table('dag_versions') as batch:
+        batch.alter_column('snapshot_version', existing_type=sa.Integer(), nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table('dag_versions'):
+        return
+
+    # Replay every delta row into a full row in the previous format. Content hashes are left as they
+    # are, so each DAG's next save after the downgrade records one new version.
+    manifests: Dict[int, tuple] = {}
+    for row in bind.execute(
+        sa.select(versions.c.id, versions.c.dag_id, versions.c.node_hashes, versions.c.edges, versions.c.delta)
+        .order_by(versions.c.dag_id, versions.c.version)
+    ).all():
+        if row.delta is None:
+            node_hashes, edges = list(row.node_hashes), [list(edge) for edge in row.edges]
+        else:
+            node_hashes, edges = manifests[row.dag_id]
+            replaced = dict(row.delta["nodes"]["replace"])
+            removed = set(row.delta["nodes"]["remove"])
+            node_hashes = [replaced.get(node_hash, node_hash) for node_hash in node_hashes if node_hash not in removed]
+            node_hashes += row.delta["nodes"]["add"]
+            removed_edges = {tuple(edge) for edge in row.delta["edges"]["remove"]}
+            edges = [edge for edge in edges if tuple(edge) not in removed_edges] + row.delta["edges"]["add"]
+        manifests[row.dag_id] = (node_hashes, edges)
+        bind.execute(versions.update().where(versions.c.id == row.id).values(
+            node_hashes=node_hashes,
+            edges=[{"id": f"{source}-{target}", "source": source, "target": target} for source, target in edges],
+        ))
+
+    existing = {column['name'] for column in inspector.get_columns('dag_versions')}
+    with op.batch_alter_table('dag_versions') as batch:
+        batch.alter_column('node_hashes', existing_type=sa.JSON(), nullable=False)
+        batch.alter_column('edges', existing_type=sa.JSON(), nullable=False)
+        for name in ('edge_count', 'node_count', 'delta', 'snapshot_version'):
+            if name in existing:
+                batch.drop_column(name)
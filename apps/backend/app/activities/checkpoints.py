@@ -0,0 +1,78 @@
+"""Chunk-level checkpoints for long-running node activities.
+
+A node that builds its output in chunks (batches of rows, training epochs)
+calls `save` after finishing each one. `save` writes the chunk to the artifact
+store and heartbeats its reference, together with any small resume state such
+as a model checkpoint's artifact or an RNG seed. If the activity fails and
+Temporal retries it, the retry gets the last heartbeat back, so
+`NodeCheckpoint.resume()` returns the chunks that are already done and the
+node continues from `next_chunk`.
+
+Node executors run in a worker thread (execute_node hands them to
+asyncio.to_thread), so `save` and `load` block, and heartbeats are passed to
+the activity's event loop, which is the only place Temporal accepts them.
+
+Heartbeat details are replaced on every heartbeat, so every heartbeat from the
+activity, including the liveness ones, must carry `details()`. Only
+references travel in them: keep chunks large enough that a run has at most a
+few thousand.
+"""
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional
+
+from temporalio import activity
+
+from app.services.artifacts import ArtifactRef, load_payload, store_payload
+
+
+class NodeCheckpoint:
+    def __init__(self, chunks: Optional[List[ArtifactRef]] = None, state: Any = None):
+        self.chunks: List[ArtifactRef] = list(chunks or [])
+        self.state = state
+        # Chunks inherited from a previous attempt rather than computed by this one
+        self.resumed_chunks = len(self.chunks)
+        # `save` runs in the executor's thread while the liveness heartbeat reads `details()` on the loop
+        self._lock = threading.Lock()
+        self._loop = asyncio.get_running_loop()
+
+    @classmethod
+    def resume(cls) -> "NodeCheckpoint":
+        """The last checkpoint a previous attempt of this activity heartbeated, or an empty one.
+
+        Call from the activity itself (on its event loop), before handing the checkpoint to the executor.
+        """
+        details = activity.info().heartbeat_details
+        if not details:
+            return cls()
+        checkpoint = details[0]
+        return cls([ArtifactRef(chunk["sha256"], chunk["size"]) for chunk in checkpoint["chunks"]], checkpoint["state"])
+
+    @property
+    def next_chunk(self) -> int:
+        return len(self.chunks)
+
+    def details(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"chunks": [chunk._asdict() for chunk in self.chunks], "state": self.state}
+
+    def save(self, chunk: Any, state: Any = None) -> None:
+        """Record chunk `next_chunk` (any JSON-serialisable value but None) and the state to resume after it.
+
+        Blocking: stores the chunk, then heartbeats through the activity's event loop.
+        """
+        ref = store_payload(chunk)
+        if ref is None:
+            raise ValueError("A checkpointed chunk can't be None")
+        with self._lock:
+            self.chunks.append(ref)
+            self.state = state
+        # call_soon_threadsafe runs the heartbeat in this thread's context, which holds the activity's
+        self._loop.call_soon_threadsafe(lambda: activity.heartbeat(self.details()))
+
+    def load(self, index: int) -> Any:
+        return load_payload(self.chunks[index].sha256)
+
+    def load_all(self) -> List[Any]:
+        """Every saved chunk in order, e.g. to assemble the node's output after the last one."""
+        return [self.load(index) for index in range(len(self.chunks))]
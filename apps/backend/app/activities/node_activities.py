@@ -1,41 +1,85 @@
 from temporalio import activity
-from typing import Dict, Any
-from app.models.dag import ExecutionLog, ErrorType
+from typing import Dict, Any, List, Optional
+import asyncio
+import csv
+import io
+import math
+import urllib.request
+import orjson
+from app.models.dag import DAGRun, ExecutionLog, ErrorType
 from datetime import datetime
+import time
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.db.session import get_db
+from app.core.metrics import observe_activity
+from app.services.artifacts import load_payload, store_payload
+from app.activities.checkpoints import NodeCheckpoint
+
+# Liveness heartbeats between checkpoints; well inside DAGWorkflow's NODE_HEARTBEAT_TIMEOUT
+HEARTBEAT_INTERVAL_SECONDS = 20
 
 @activity.defn
-async def execute_node(node: Dict[str, Any], run_id: str) -> Dict[str, Any]:
-    """Execute a single node in the DAG"""
+async def execute_node(node: Dict[str, Any], run_id: int) -> Optional[Dict[str, Any]]:
+    """Execute a single node in the DAG and return its output's artifact reference ({"sha256", "size"}).
+
+    A node with upstream nodes gets their output references as
+    `input_refs` (parent node id -> reference) and its input is those
+    outputs, loaded from the artifact store and keyed by parent id.
+    """
     activity.logger.info(f"Executing node {node['id']} for run {run_id}")
     
     # Get database session
     db = next(get_db())
+    start_time = time.perf_counter()
+    # The run's start time places the log in the run's partition
+    run_started_at = db.query(DAGRun.started_at).filter(DAGRun.id == run_id).scalar()
+
+    # Resume from a failed attempt's last checkpoint. Heartbeats (carrying it) start before any payload
+    # I/O and stop only once the log is final, so slow artifact reads and writes never look like a lost worker
+    checkpoint = NodeCheckpoint.resume()
+    if checkpoint.resumed_chunks:
+        activity.logger.info(f"Resuming node {node['id']} after {checkpoint.resumed_chunks} checkpointed chunks")
+    heartbeat = asyncio.create_task(_heartbeat(checkpoint))
     
     try:
         # Create execution log entry
         execution_log = ExecutionLog(
             dag_run_id=run_id,
+            run_started_at=run_started_at,
             node_id=node['id'],
             status='running',
-            started_at=datetime.utcnow(),
-            input_data=node.get('input_data')
+            started_at=datetime.utcnow()
         )
         db.add(execution_log)
+        if node.get('input_refs') is not None:
+            node = {**node, 'input_data': await asyncio.to_thread(_load_inputs, node['input_refs'])}
+        # Payloads go to the artifact store and the row only references them (stored off the event loop)
+        input_ref = await asyncio.to_thread(store_payload, node.get('input_data'))
+        execution_log.input_artifact = input_ref.sha256 if input_ref else None
+        execution_log.input_size_bytes = input_ref.size if input_ref else 0
         db.commit()
         
-        # Execute node based on type
-        result = await _execute_node_by_type(node)
+        # Execute node based on type, in a worker thread: CPU-bound nodes would otherwise starve the
+        # heartbeats and every other activity on this worker's event loop
+        result = await asyncio.to_thread(_execute_node_by_type, node, checkpoint)
         
         # Update execution log
         execution_log.status = 'completed'
         execution_log.completed_at = datetime.utcnow()
-        execution_log.output_data = result
-        execution_log.calculate_metrics()
+        output_ref = await asyncio.to_thread(store_payload, result)
+        execution_log.output_artifact = output_ref.sha256 if output_ref else None
+        execution_log.output_size_bytes = output_ref.size if output_ref else 0
+        # Prefer the engine's own per-node instrumentation when the result carries it
+        engine_metrics = (result.get('node_metrics') or {}).get(node['id']) if isinstance(result, dict) else None
+        if checkpoint.resumed_chunks:
+            engine_metrics = {**(engine_metrics or {}), 'resumed_chunks': checkpoint.resumed_chunks}
+        execution_log.calculate_metrics(engine_metrics)
         
         db.commit()
-        return result
+        observe_activity('execute_node', node['type'], 'completed', time.perf_counter() - start_time)
+        # Only the reference goes back through Temporal; the next nodes load the output themselves
+        return output_ref._asdict() if output_ref else None
         
     except Exception as e:
         # Handle error and update execution log
@@ -44,23 +88,120 @@ async def execute_node(node: Dict[str, Any], run_id: str) -> Dict[str, Any]:
         execution_log.error = str(e)
         execution_log.error_type = _categorize_error(e)
         db.commit()
+        observe_activity('execute_node', node['type'], 'failed', time.perf_counter() - start_time)
         raise
+    finally:
+        heartbeat.cancel()
+
+def _load_inputs(input_refs: Dict[str, Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Parent node id -> that parent's output, read back from the artifact store (None stays None)."""
+    return {parent: load_payload(ref['sha256']) if ref else None for parent, ref in input_refs.items()}
 
-async def _execute_node_by_type(node: Dict[str, Any]) -> Dict[str, Any]:
-    """Execute node based on its type"""
+async def _heartbeat(checkpoint: NodeCheckpoint) -> None:
+    # Each heartbeat replaces the last one's details, so liveness heartbeats re-send the checkpoint
+    while True:
+        await asyncio.sleep(HEARTBEAT_INTERVAL_SECONDS)
+        activity.heartbeat(checkpoint.details())
+
+def _execute_node_by_type(node: Dict[str, Any], checkpoint: NodeCheckpoint) -> Dict[str, Any]:
+    """Execute node based on its type; runs in a worker thread, so executors are plain blocking functions"""
     node_type = node['type']
     
     if node_type == 'source':
-        return await _execute_source_node(node)
+        return _execute_source_node(node)
     elif node_type == 'generator':
-        return await _execute_generator_node(node)
+        # Long trainings/generations save each epoch or chunk to `checkpoint` and start at checkpoint.next_chunk
+        return _execute_generator_node(node, checkpoint)
     elif node_type == 'evaluator':
-        return await _execute_evaluator_node(node)
+        return _execute_evaluator_node(node)
     elif node_type == 'exporter':
-        return await _execute_exporter_node(node)
+        return _execute_exporter_node(node)
     else:
         raise ValueError(f"Unknown node type: {node_type}")
 
+def _execute_generator_node(node: Dict[str, Any], checkpoint: NodeCheckpoint) -> Dict[str, Any]:
+    """Generate `num_samples` rows on the engine, `batch_size` rows per request, checkpointing every batch.
+
+    A retry of the activity skips the batches its previous attempts saved.
+    Returns the rows in the engine's format plus the batches' combined metrics.
+    """
+    parameters = node['data']['config']['parameters']
+    total = int(parameters['num_samples'])
+    batch_size = int(parameters.get('batch_size') or total) or 1
+    source = _engine_csv_source(f"{node['id']}-input", _input_records(node))
+
+    for index in range(checkpoint.next_chunk, math.ceil(total / batch_size)):
+        rows = min(batch_size, total - index * batch_size)
+        config = {**node['data']['config'], 'parameters': {**parameters, 'num_samples': rows}}
+        generator = {**node, 'data': {**node['data'], 'config': config}}
+        generator.pop('input_data', None)
+        generator.pop('input_refs', None)
+        result = _run_engine_dag({
+            "id": node['id'],
+            "name": f"{node['id']} batch {index}",
+            "nodes": [source, generator],
+            "edges": [{"id": f"{source['id']}-{node['id']}", "source": source['id'], "target": node['id']}],
+        })
+        data = result['data_store'].get(node['id'])
+        if not data:
+            # The engine reports node failures as an empty output and logs the cause
+            raise RuntimeError(f"Engine generated no rows for node {node['id']} (batch {index})")
+        checkpoint.save({"data": data, "metrics": result['node_metrics'].get(node['id'], {})}, state={"rows": index * batch_size + len(data)})
+
+    chunks = checkpoint.load_all()
+    return {
+        "data": [row for chunk in chunks for row in chunk['data']],
+        "node_metrics": {node['id']: _combine_metrics([chunk['metrics'] for chunk in chunks])},
+    }
+
+def _input_records(node: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # A generator has one parent; its output is a list of records, or the engine's {"data": records}
+    payloads = list((node.get('input_data') or {}).values())
+    if len(payloads) != 1:
+        raise ValueError(f"Generator node {node['id']} needs exactly one input node, got {len(payloads)}")
+    records = payloads[0].get('data') if isinstance(payloads[0], dict) else payloads[0]
+    if not records:
+        raise ValueError(f"Generator node {node['id']} has no input rows")
+    return records
+
+def _engine_csv_source(node_id: str, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """An engine source node carrying `records` inline as CSV, so the engine needs no access to our storage"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(dict.fromkeys(key for record in records for key in record)))
+    writer.writeheader()
+    writer.writerows(records)
+    return {
+        "id": node_id,
+        "type": "source",
+        "position": {"x": 0, "y": 0},
+        "data": {"label": node_id, "config": {
+            "type": "csv", "connection": {"fileContent": buffer.getvalue()}, "options": {},
+        }},
+    }
+
+def _run_engine_dag(dag: Dict[str, Any]) -> Dict[str, Any]:
+    request = urllib.request.Request(
+        f"{settings.ENGINE_URL.rstrip('/')}/api/v1/dags/run",
+        data=orjson.dumps(dag),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=settings.ENGINE_TIMEOUT_SECONDS) as response:
+        return orjson.loads(response.read())
+
+def _combine_metrics(batches: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # Times, sizes and row counts add up across batches; peaks and the (shared) input size don't
+    combined: Dict[str, Any] = {}
+    for metrics in batches:
+        for key, value in metrics.items():
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+            if key.startswith('peak_') or key in ('rows_in', 'input_size_bytes'):
+                combined[key] = max(combined.get(key, value), value)
+            else:
+                combined[key] = combined.get(key, 0) + value
+    return combined
+
 def _categorize_error(error: Exception) -> ErrorType:
     """Categorize the error type"""
     error_str = str(error).lower()
@@ -1,25 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import base64
+import binascii
+import json
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, cast, func, or_, select
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime, timedelta
 from app.db.session import get_db
 from app.models.dag import DAGRun, ExecutionLog
 from app.core.middleware.rbac import require_permissions
-from app.schemas.dag import DAGRunResponse, ExecutionLogResponse
+from app.schemas.dag import DAGRunPage, ExecutionLogResponse
+from app.services.artifacts import encode_payload, get_artifact_store
 
 router = APIRouter()
 
-@router.get("/dags/{dag_id}/runs", response_model=List[DAGRunResponse])
+MAX_PAGE_SIZE = 100
+MAX_RANGE_BYTES = 1024 * 1024  # Longest slice of a payload returned by one ranged request
+
+def _encode_cursor(run: DAGRun) -> str:
+    position = [run.started_at.isoformat() if run.started_at else None, run.id]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+def _decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    try:
+        started_at, run_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (datetime.fromisoformat(started_at) if started_at else None), int(run_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _estimated_count(db: Session, query) -> Optional[int]:
+    """The planner's row estimate for `query` (PostgreSQL only): no rows are read."""
+    if db.bind.dialect.name != "postgresql":
+        return None
+    compiled = query.statement.compile(dialect=db.bind.dialect)
+    plan = db.connection().exec_driver_sql("EXPLAIN (FORMAT JSON) " + compiled.string, compiled.params).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+@router.get("/dags/{dag_id}/runs", response_model=DAGRunPage)
 @require_permissions(["dag:view:runs"])
 async def get_dag_runs(
     dag_id: int,
     time_filter: str = Query("24h", regex="^(24h|7d|30d|all)$"),
     status: Optional[str] = Query(None, regex="^(completed|failed|running|all)$"),
-    skip: int = 0,
-    limit: int = 10,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    count: str = Query("exact", regex="^(exact|estimate|none)$", description="How the first page computes total"),
     db: Session = Depends(get_db)
 ):
-    """Get DAG run history with filtering"""
+    """Get DAG run history with filtering, newest first.
+
+    Pages are keyset-paginated on (started_at, id) over the (dag_id, started_at)
+    and (dag_id, status, started_at) indexes, so a deep page costs the same as
+    the first. `total` is only computed for the first page: exactly, from the
+    planner's estimate (count=estimate, PostgreSQL), or not at all (count=none).
+    On PostgreSQL, dag_runs is partitioned by month of started_at: the time
+    filter and cursor prune older and newer months, and a page reads the
+    remaining months newest first, stopping once it has `limit` rows.
+    """
     # Calculate time filter
     now = datetime.utcnow()
     if time_filter == "24h":
@@ -39,23 +78,49 @@ async def get_dag_runs(
     
     if status and status != "all":
         query = query.filter(DAGRun.status == status)
+
+    total = None
+    total_is_estimate = False
+    if cursor is None and count != "none":
+        if count == "estimate":
+            total = _estimated_count(db, query)
+            total_is_estimate = total is not None
+        if total is None:
+            total = query.with_entities(func.count(DAGRun.id)).scalar()
     
-    # Get total count
-    total = query.count()
-    
-    # Get paginated results
-    runs = query.order_by(DAGRun.started_at.desc())\
-        .offset(skip)\
-        .limit(limit)\
+    if cursor is not None:
+        # Continue after the last row of the previous page in (started_at DESC NULLS FIRST, id DESC) order
+        cursor_started_at, cursor_id = _decode_cursor(cursor)
+        if cursor_started_at is None:
+            query = query.filter(or_(
+                DAGRun.started_at.isnot(None),
+                and_(DAGRun.started_at.is_(None), DAGRun.id < cursor_id)
+            ))
+        else:
+            # The redundant <= bounds the index range; the OR only breaks ties
+            query = query.filter(
+                DAGRun.started_at <= cursor_started_at,
+                or_(DAGRun.started_at < cursor_started_at, DAGRun.id < cursor_id)
+            )
+
+    # One extra row tells whether another page exists
+    runs = query.order_by(DAGRun.started_at.desc().nulls_first(), DAGRun.id.desc())\
+        .limit(limit + 1)\
         .all()
+    page = runs[:limit]
     
     return {
-        "items": runs,
+        "items": page,
         "total": total,
-        "skip": skip,
-        "limit": limit
+        "total_is_estimate": total_is_estimate,
+        "limit": limit,
+        "next_cursor": _encode_cursor(page[-1]) if len(runs) > limit else None
     }
 
+def _run_started_at(run_id: int):
+    # Logs are partitioned by their run's start time: matching it lets PostgreSQL read one partition
+    return select(DAGRun.started_at).where(DAGRun.id == run_id).scalar_subquery()
+
 @router.get("/dag-runs/{run_id}/logs", response_model=List[ExecutionLogResponse])
 @require_permissions(["dag:view:logs"])
 async def get_execution_logs(
@@ -64,39 +129,125 @@ async def get_execution_logs(
 ):
     """Get execution logs for a specific DAG run"""
     logs = db.query(ExecutionLog)\
-        .filter(ExecutionLog.dag_run_id == run_id)\
+        .filter(ExecutionLog.dag_run_id == run_id, ExecutionLog.run_started_at == _run_started_at(run_id))\
         .order_by(ExecutionLog.started_at)\
         .all()
     
     return logs
 
+def _parse_range(header: str, size: int) -> Tuple[int, int]:
+    """First and last byte of a single `bytes=` range, capped at MAX_RANGE_BYTES; 416 if unsatisfiable."""
+    try:
+        unit, _, spec = header.partition("=")
+        first, _, last = spec.strip().partition("-")
+        if unit.strip() != "bytes" or "," in spec:
+            raise ValueError
+        if first:
+            start, end = int(first), int(last) if last else size - 1
+        else:
+            start, end = max(size - int(last), 0), size - 1  # Suffix range: the last N bytes
+    except ValueError:
+        raise HTTPException(status_code=416, detail="Unsupported Range", headers={"Content-Range": f"bytes */{size}"})
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, min(end, size - 1, start + MAX_RANGE_BYTES - 1)
+
+@router.get("/dag-runs/{run_id}/logs/{log_id}/{payload}")
+@require_permissions(["dag:view:logs"])
+async def get_execution_log_payload(
+    run_id: int,
+    log_id: int,
+    request: Request,
+    payload: str = Path(..., regex="^(input|output)$"),
+    db: Session = Depends(get_db)
+):
+    """A node's input or output as JSON bytes, streamed from the artifact store.
+
+    Send `Range: bytes=0-65535` for a preview: only that slice is read from the
+    store. Artifacts are immutable, so their sha256 is a permanent ETag.
+    """
+    if payload == "input":
+        artifact, size, inline = ExecutionLog.input_artifact, ExecutionLog.input_size_bytes, ExecutionLog.input_data
+    else:
+        artifact, size, inline = ExecutionLog.output_artifact, ExecutionLog.output_size_bytes, ExecutionLog.output_data
+    log = db.query(artifact.label("sha256"), size.label("size"))\
+        .filter(
+            ExecutionLog.id == log_id,
+            ExecutionLog.dag_run_id == run_id,
+            ExecutionLog.run_started_at == _run_started_at(run_id)
+        )\
+        .first()
+    if not log:
+        raise HTTPException(status_code=404, detail="Execution log not found")
+
+    range_header = request.headers.get("range")
+    if log.sha256 is None:
+        # Logs written before the artifact store keep the payload inline
+        value = db.query(inline)\
+            .filter(ExecutionLog.id == log_id, ExecutionLog.run_started_at == _run_started_at(run_id))\
+            .scalar()
+        if value is None:
+            raise HTTPException(status_code=404, detail=f"Execution log has no {payload}")
+        data = encode_payload(value)
+        headers = {"Accept-Ranges": "bytes"}
+        if not range_header:
+            return Response(content=data, media_type="application/json", headers=headers)
+        start, end = _parse_range(range_header, len(data))
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+        return Response(content=data[start:end + 1], status_code=206, media_type="application/json", headers=headers)
+
+    store = get_artifact_store()
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{log.sha256}"',
+        "Cache-Control": "private, max-age=31536000, immutable",
+    }
+    if not range_header:
+        headers["Content-Length"] = str(log.size)
+        return StreamingResponse(store.iter_chunks(log.sha256), media_type="application/json", headers=headers)
+    start, end = _parse_range(range_header, log.size)
+    data = await run_in_threadpool(store.read_range, log.sha256, start, end - start + 1)
+    headers["Content-Range"] = f"bytes {start}-{end}/{log.size}"
+    return Response(content=data, status_code=206, media_type="application/json", headers=headers)
+
+def _run_total(column):
+    # Window sum: every row of the run carries the total, so no second aggregate query is needed.
+    # Cast back to the column's type: PostgreSQL sums bigint as numeric, which arrives as Decimal
+    return func.coalesce(cast(func.sum(column).over(), column.type), 0)
+
 @router.get("/dag-runs/{run_id}/metrics")
 @require_permissions(["dag:view:metrics"])
 async def get_run_metrics(
     run_id: int,
     db: Session = Depends(get_db)
 ):
-    """Get aggregated metrics for a DAG run"""
-    run = db.query(DAGRun).filter(DAGRun.id == run_id).first()
-    if not run:
+    """Get aggregated metrics for a DAG run
+
+    One statement: the run left-joined to its logs, projecting only node_id and
+    metrics (never the input/output payloads), with the totals summed by the
+    database over the numeric metric columns.
+    """
+    rows = db.query(
+        DAGRun.id,
+        ExecutionLog.node_id,
+        ExecutionLog.metrics,
+        _run_total(ExecutionLog.duration_seconds).label("total_duration"),
+        _run_total(ExecutionLog.input_size_bytes).label("total_input_size"),
+        _run_total(ExecutionLog.output_size_bytes).label("total_output_size")
+    ).outerjoin(
+        # run_started_at keeps the join inside the run's log partition
+        ExecutionLog,
+        and_(ExecutionLog.dag_run_id == DAGRun.id, ExecutionLog.run_started_at == DAGRun.started_at)
+    ).filter(
+        DAGRun.id == run_id
+    ).all()
+    if not rows:
         raise HTTPException(status_code=404, detail="DAG run not found")
-    
-    logs = db.query(ExecutionLog)\
-        .filter(ExecutionLog.dag_run_id == run_id)\
-        .all()
-    
-    # Calculate aggregated metrics
-    total_duration = 0
-    total_input_size = 0
-    total_output_size = 0
-    node_metrics = {}
-    
-    for log in logs:
-        if log.metrics:
-            total_duration += log.metrics.get("duration_seconds", 0)
-            total_input_size += log.metrics.get("input_size_bytes", 0)
-            total_output_size += log.metrics.get("output_size_bytes", 0)
-            node_metrics[log.node_id] = log.metrics
+
+    total_duration = rows[0].total_duration
+    total_input_size = rows[0].total_input_size
+    total_output_size = rows[0].total_output_size
+    node_metrics = {row.node_id: row.metrics for row in rows if row.metrics}
     
     return {
         "total_duration_seconds": total_duration,
@@ -104,4 +255,4 @@ async def get_run_metrics(
         "total_output_size_bytes": total_output_size,
         "average_throughput_bytes_per_second": total_output_size / total_duration if total_duration > 0 else 0,
         "node_metrics": node_metrics
-    } 
\ No newline at end of file
+    }
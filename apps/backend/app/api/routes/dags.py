@@ -1,20 +1,29 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Union, Optional
-from sqlalchemy import text
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Any, Tuple, Union, Optional
+from datetime import datetime
+import orjson
+from sqlalchemy import delete, func, insert, select, text, update
 
-from app.db.session import get_db
+from app.core.config import settings
+from app.db.session import get_async_db
 from app.models.dag import SyntheticDataDAG as DBSyntheticDataDAG, DagNode as DBDagNode, DagEdge as DBDagEdge
+from app.services.dag_cache import dag_cache
+from app.services.dag_loader import DagLoader, etag_cache, etag_matches
+from app.services.dag_versions import DagVersionStore
 
 from pydantic import BaseModel
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
 @router.get("/test-db-connection")
-async def test_db_connection(db: Session = Depends(get_db)):
+async def test_db_connection(db: AsyncSession = Depends(get_async_db)):
     try:
         # Try to execute a simple query
-        result = db.execute(text("SELECT 1"))
+        result = await db.execute(text("SELECT 1"))
         return {"status": "success", "message": "Database connection successful"}
     except Exception as e:
         raise HTTPException(
@@ -48,52 +57,75 @@ class SyntheticDataDAG(BaseModel):
     nodes: List[DagNode]
     edges: List[DagEdge]
 
+def _node_row(dag_id: int, node: DagNode) -> Dict[str, Any]:
+    return {
+        "dag_id": dag_id,
+        "frontend_id": node.id,
+        "node_type": node.type,
+        "config": node.data,
+        "position": node.position,
+    }
+
+def _edge_row(dag_id: int, edge: DagEdge) -> Dict[str, Any]:
+    # Edges are identified by their (source, target) frontend node ids
+    return {"dag_id": dag_id, "source_node_id": edge.source, "target_node_id": edge.target}
+
+def _unique_edges(edges: List[DagEdge]) -> Dict[Tuple[str, str], DagEdge]:
+    # One edge per (source, target); a repeated pair keeps its last occurrence
+    return {(edge.source, edge.target): edge for edge in edges}
+
+def _snapshot(dag: SyntheticDataDAG) -> Dict[str, Any]:
+    return DagVersionStore.snapshot(
+        dag.name,
+        dag.description,
+        [{"id": node.id, "type": node.type, "position": node.position, "data": node.data} for node in dag.nodes],
+        [{"id": edge.id, "source": edge.source, "target": edge.target} for edge in _unique_edges(dag.edges).values()],
+    )
+
 @router.post("/dags/")
-async def create_dag(dag: SyntheticDataDAG, db: Session = Depends(get_db)):
+async def create_dag(dag: SyntheticDataDAG, db: AsyncSession = Depends(get_async_db)):
     try:
+        snapshot = _snapshot(dag)
+        edges = list(_unique_edges(dag.edges).values())
         # Create DB DAG first
         db_dag = DBSyntheticDataDAG(
             name=dag.name,
             description=dag.description,
+            node_count=len(dag.nodes),
+            edge_count=len(edges),
+            version=1,
+            content_hash=snapshot["content_hash"],
         )
         db.add(db_dag)
-        db.flush()  # Get the ID without committing transaction
+        await db.flush()  # Get the ID without committing transaction
         
         # Keep track of frontend_id -> database_id mapping for nodes
         node_id_mapping = {}
         
-        # Add nodes with proper ID handling
-        for node_data in dag.nodes:
-            db_node = DBDagNode(
-                dag_id=db_dag.id,
-                node_type=node_data.type,
-                config=node_data.data,
-                position=node_data.position,
-            )
-            db.add(db_node)
-            db.flush()  # Get the generated database ID
-            
-            # Map frontend ID to database ID for reference
-            node_id_mapping[node_data.id] = db_node.id
-
-        # Add edges - keep using frontend node IDs for now
-        for edge_data in dag.edges:
-            db_edge = DBDagEdge(
-                dag_id=db_dag.id,
-                source_node_id=edge_data.source,
-                target_node_id=edge_data.target,
+        # All nodes in one multi-row INSERT ... RETURNING instead of a flush per node
+        if dag.nodes:
+            inserted = await db.execute(
+                insert(DBDagNode).returning(DBDagNode.frontend_id, DBDagNode.id),
+                [_node_row(db_dag.id, node_data) for node_data in dag.nodes],
             )
-            db.add(db_edge)
+            node_id_mapping = {frontend_id: node_id for frontend_id, node_id in inserted.all()}
+
+        # Edges keep using frontend node IDs; nothing needs their generated IDs, so no RETURNING
+        if edges:
+            await db.execute(insert(DBDagEdge), [_edge_row(db_dag.id, edge_data) for edge_data in edges])
+
+        await DagVersionStore.write(db, db_dag.id, 1, snapshot)
 
         # Commit all changes at once
-        db.commit()
-        db.refresh(db_dag)
+        await db.commit()
+        await dag_cache.invalidate_lists()
 
         # Return the created DAG in the format expected by frontend
         return {
             "id": db_dag.id,
             "name": db_dag.name,
             "description": db_dag.description,
+            "version": db_dag.version,
             "nodes": [
                 {
                     "id": node.id,  # Keep frontend ID
@@ -107,12 +139,12 @@ async def create_dag(dag: SyntheticDataDAG, db: Session = Depends(get_db)):
                     "id": edge.id,  # Keep frontend ID
                     "source": edge.source,
                     "target": edge.target
-                } for edge in dag.edges
+                } for edge in edges
             ]
         }
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Error creating DAG: {str(e)}")
         raise HTTPException(
             status_code=500,
@@ -120,43 +152,22 @@ async def create_dag(dag: SyntheticDataDAG, db: Session = Depends(get_db)):
         )
 
 @router.get("/dags/{dag_id}/")
-async def get_dag(dag_id: int, db: Session = Depends(get_db)):
+async def get_dag(dag_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
-        db_dag = db.query(DBSyntheticDataDAG).filter(DBSyntheticDataDAG.id == dag_id).first()
-        if db_dag is None:
-            raise HTTPException(status_code=404, detail="DAG not found")
+        if_none_match = request.headers.get("if-none-match")
+        # A matching ETag from this worker's cache is answered before any query runs
+        cached_etag = etag_cache.get(dag_id)
+        if etag_matches(if_none_match, cached_etag):
+            return Response(status_code=304, headers={"ETag": cached_etag, "Cache-Control": "no-cache"})
 
-        # Load related nodes and edges
-        db_nodes = db.query(DBDagNode).filter(DBDagNode.dag_id == dag_id).all()
-        db_edges = db.query(DBDagEdge).filter(DBDagEdge.dag_id == dag_id).all()
-
-        # Convert database models to frontend format
-        nodes_data = []
-        for db_node in db_nodes:
-            node_data = {
-                "id": str(db_node.id),  # Convert DB ID to string for frontend
-                "type": db_node.node_type,
-                "position": db_node.position if db_node.position else {"x": 0, "y": 0},
-                "data": db_node.config if db_node.config else {"label": f"{db_node.node_type} Node"}
-            }
-            nodes_data.append(node_data)
-
-        edges_data = []
-        for db_edge in db_edges:
-            edge_data = {
-                "id": str(db_edge.id),  # Convert DB ID to string for frontend
-                "source": db_edge.source_node_id,
-                "target": db_edge.target_node_id
-            }
-            edges_data.append(edge_data)
-
-        return {
-            "id": db_dag.id,
-            "name": db_dag.name,
-            "description": db_dag.description,
-            "nodes": nodes_data,
-            "edges": edges_data
-        }
+        loaded = await DagLoader.load_bytes(db, dag_id)
+        if loaded is None:
+            raise HTTPException(status_code=404, detail="DAG not found")
+        body, etag = loaded
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
         
     except HTTPException:
         raise  # Re-raise HTTP exceptions
@@ -167,10 +178,55 @@ async def get_dag(dag_id: int, db: Session = Depends(get_db)):
             detail=f"Failed to retrieve DAG: {str(e)}"
         )
 
+@router.get("/dags/{dag_id}/versions/")
+async def list_dag_versions(
+    dag_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    before: Optional[int] = Query(None, description="Only versions older than this one"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        versions = await DagVersionStore.history(db, dag_id, limit, before)
+        if not versions and before is None and await db.get(DBSyntheticDataDAG, dag_id) is None:
+            raise HTTPException(status_code=404, detail="DAG not found")
+        return {"dag_id": dag_id, "versions": versions}
+
+    except HTTPException:
+        raise  # Re-raise HTTP exceptions
+    except Exception as e:
+        print(f"Error listing versions of DAG {dag_id}: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to list DAG versions: {str(e)}"
+        )
+
+@router.get("/dags/{dag_id}/versions/{version}/")
+async def get_dag_version(dag_id: int, version: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    try:
+        dag_version = await DagVersionStore.load(db, dag_id, version)
+        if dag_version is None:
+            raise HTTPException(status_code=404, detail="DAG version not found")
+        # Versions never change, so their content hash is a permanent validator
+        etag = f'"{dag_version["content_hash"]}"'
+        headers = {"ETag": etag, "Cache-Control": "private, max-age=31536000, immutable"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=orjson.dumps(dag_version), media_type="application/json", headers=headers)
+
+    except HTTPException:
+        raise  # Re-raise HTTP exceptions
+    except Exception as e:
+        print(f"Error getting version {version} of DAG {dag_id}: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to retrieve DAG version: {str(e)}"
+        )
+
 @router.put("/dags/{dag_id}/")
-async def update_dag(dag_id: int, updated_dag: SyntheticDataDAG, db: Session = Depends(get_db)):
+async def update_dag(dag_id: int, updated_dag: SyntheticDataDAG, db: AsyncSession = Depends(get_async_db)):
     try:
-        db_dag = db.query(DBSyntheticDataDAG).filter(DBSyntheticDataDAG.id == dag_id).first()
+        # Row lock: concurrent saves of one DAG take version numbers one at a time
+        db_dag = await db.get(DBSyntheticDataDAG, dag_id, with_for_update=True)
         if db_dag is None:
             raise HTTPException(status_code=404, detail="DAG not found")
 
@@ -178,37 +234,83 @@ async def update_dag(dag_id: int, updated_dag: SyntheticDataDAG, db: Session = D
         db_dag.name = updated_dag.name
         db_dag.description = updated_dag.description
 
-        # Delete existing nodes and edges for this DAG
-        db.query(DBDagNode).filter(DBDagNode.dag_id == dag_id).delete(synchronize_session=False)
-        db.query(DBDagEdge).filter(DBDagEdge.dag_id == dag_id).delete(synchronize_session=False)
-
-        # Add updated nodes
-        for node_data in updated_dag.nodes:
-            db_node = DBDagNode(
-                dag_id=db_dag.id,
-                node_type=node_data.type,
-                config=node_data.data,
-                position=node_data.position,
-            )
-            db.add(db_node)
-
-        # Add updated edges
-        for edge_data in updated_dag.edges:
-            db_edge = DBDagEdge(
-                dag_id=db_dag.id,
-                source_node_id=edge_data.source,
-                target_node_id=edge_data.target,
+        # Diff against the stored graph so only added, changed and removed rows are written.
+        # Nodes saved before frontend_id was stored are matched by the id get_dag returned for them.
+        stored_nodes = {
+            (row.frontend_id or str(row.id)): row
+            for row in (await db.execute(
+                select(DBDagNode.id, DBDagNode.frontend_id, DBDagNode.node_type, DBDagNode.config, DBDagNode.position)
+                .where(DBDagNode.dag_id == dag_id)
+            )).all()
+        }
+        incoming_nodes = {node_data.id: node_data for node_data in updated_dag.nodes}
+
+        removed_nodes = [row.id for key, row in stored_nodes.items() if key not in incoming_nodes]
+        added_nodes = [_node_row(dag_id, node_data) for key, node_data in incoming_nodes.items() if key not in stored_nodes]
+        changed_nodes = [
+            {"id": stored_nodes[key].id, **_node_row(dag_id, node_data)}
+            for key, node_data in incoming_nodes.items()
+            if key in stored_nodes and (
+                stored_nodes[key].frontend_id != key
+                or stored_nodes[key].node_type != node_data.type
+                or stored_nodes[key].config != node_data.data
+                or stored_nodes[key].position != node_data.position
             )
-            db.add(db_edge)
+        ]
+
+        stored_edges = {
+            (row.source_node_id, row.target_node_id): row.id
+            for row in (await db.execute(
+                select(DBDagEdge.id, DBDagEdge.source_node_id, DBDagEdge.target_node_id).where(DBDagEdge.dag_id == dag_id)
+            )).all()
+        }
+        incoming_edges = _unique_edges(updated_dag.edges)
+        removed_edges = [edge_id for key, edge_id in stored_edges.items() if key not in incoming_edges]
+        added_edges = [_edge_row(dag_id, edge_data) for key, edge_data in incoming_edges.items() if key not in stored_edges]
+
+        # At most one statement per kind of change
+        if removed_nodes:
+            await db.execute(delete(DBDagNode).where(DBDagNode.id.in_(removed_nodes)).execution_options(synchronize_session=False))
+        if changed_nodes:
+            # ORM bulk UPDATE by primary key: one executemany
+            await db.execute(update(DBDagNode), changed_nodes)
+        if added_nodes:
+            await db.execute(insert(DBDagNode), added_nodes)
+        if removed_edges:
+            await db.execute(delete(DBDagEdge).where(DBDagEdge.id.in_(removed_edges)).execution_options(synchronize_session=False))
+        if added_edges:
+            await db.execute(insert(DBDagEdge), added_edges)
+
+        changes = {
+            "nodes_added": len(added_nodes),
+            "nodes_updated": len(changed_nodes),
+            "nodes_removed": len(removed_nodes),
+            "edges_added": len(added_edges),
+            "edges_removed": len(removed_edges),
+        }
+        db_dag.node_count = len(incoming_nodes)
+        db_dag.edge_count = len(incoming_edges)
+        if any(changes.values()):
+            # Node and edge writes don't touch the DAG row, so bump it explicitly
+            db_dag.updated_at = func.now()
+
+        # A new immutable version unless nothing changed; it stores only the changes since the last one
+        snapshot = _snapshot(updated_dag)
+        if snapshot["content_hash"] != db_dag.content_hash:
+            db_dag.version += 1
+            db_dag.content_hash = snapshot["content_hash"]
+            await DagVersionStore.write(db, dag_id, db_dag.version, snapshot)
 
-        db.commit()
+        await db.commit()
+        etag_cache.invalidate(dag_id)
+        await dag_cache.invalidate_dag(dag_id)
         
-        return {"message": "DAG updated successfully", "dag_id": db_dag.id}
+        return {"message": "DAG updated successfully", "dag_id": db_dag.id, "version": db_dag.version, "changes": changes}
         
     except HTTPException:
         raise  # Re-raise HTTP exceptions
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Error updating DAG {dag_id}: {str(e)}")
         raise HTTPException(
             status_code=500,
@@ -216,56 +318,141 @@ async def update_dag(dag_id: int, updated_dag: SyntheticDataDAG, db: Session = D
         )
 
 @router.delete("/dags/{dag_id}/")
-async def delete_dag(dag_id: int, db: Session = Depends(get_db)):
+async def delete_dag(dag_id: int, db: AsyncSession = Depends(get_async_db)):
     try:
-        db_dag = db.query(DBSyntheticDataDAG).filter(DBSyntheticDataDAG.id == dag_id).first()
+        db_dag = await db.get(DBSyntheticDataDAG, dag_id)
         if db_dag is None:
             raise HTTPException(status_code=404, detail="DAG not found")
 
-        # Delete the DAG (cascade will handle nodes and edges)
-        db.delete(db_dag)
-        db.commit()
+        # Delete the DAG (cascade will handle nodes and edges; AsyncSession.delete awaits loading them)
+        await db.delete(db_dag)
+        await db.commit()
+        etag_cache.invalidate(dag_id)
+        await dag_cache.invalidate_dag(dag_id)
 
         return {"message": "DAG deleted successfully"}
         
     except HTTPException:
         raise  # Re-raise HTTP exceptions
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Error deleting DAG {dag_id}: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to delete DAG: {str(e)}"
         )
 
+async def _list_page(
+    db: AsyncSession,
+    limit: int,
+    cursor: Optional[int],
+    name: Optional[str],
+    updated_after: Optional[datetime],
+    updated_before: Optional[datetime],
+) -> Dict[str, Any]:
+    if settings.DAG_LIST_COUNTER_COLUMNS:
+        # Denormalised counters maintained by create_dag/update_dag
+        node_count = DBSyntheticDataDAG.node_count
+        edge_count = DBSyntheticDataDAG.edge_count
+        query = select(DBSyntheticDataDAG.id)
+    else:
+        # Counts aggregated once per table and joined, instead of two COUNTs per DAG
+        node_counts = (
+            select(DBDagNode.dag_id, func.count().label("count")).group_by(DBDagNode.dag_id).subquery()
+        )
+        edge_counts = (
+            select(DBDagEdge.dag_id, func.count().label("count")).group_by(DBDagEdge.dag_id).subquery()
+        )
+        node_count = func.coalesce(node_counts.c.count, 0)
+        edge_count = func.coalesce(edge_counts.c.count, 0)
+        query = (
+            select(DBSyntheticDataDAG.id)
+            .outerjoin(node_counts, node_counts.c.dag_id == DBSyntheticDataDAG.id)
+            .outerjoin(edge_counts, edge_counts.c.dag_id == DBSyntheticDataDAG.id)
+        )
+
+    last_change = func.coalesce(DBSyntheticDataDAG.updated_at, DBSyntheticDataDAG.created_at)
+    query = query.add_columns(
+        DBSyntheticDataDAG.name,
+        DBSyntheticDataDAG.description,
+        DBSyntheticDataDAG.created_at,
+        DBSyntheticDataDAG.updated_at,
+        node_count.label("node_count"),
+        edge_count.label("edge_count"),
+    )
+    if cursor is None:
+        query = query.add_columns(func.count().over().label("total"))
+    if name:
+        query = query.where(DBSyntheticDataDAG.name.icontains(name, autoescape=True))
+    if updated_after is not None:
+        query = query.where(last_change >= updated_after)
+    if updated_before is not None:
+        query = query.where(last_change < updated_before)
+    if cursor is not None:
+        query = query.where(DBSyntheticDataDAG.id < cursor)
+    # One extra row tells whether another page exists
+    rows = (await db.execute(query.order_by(DBSyntheticDataDAG.id.desc()).limit(limit + 1))).all()
+    page = rows[:limit]
+
+    dags_list = [
+        {
+            "id": row.id,
+            "name": row.name,
+            "description": row.description,
+            "created_at": row.created_at.isoformat() if row.created_at else None,
+            "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+            "node_count": row.node_count,
+            "edge_count": row.edge_count
+        }
+        for row in page
+    ]
+    total = None
+    if cursor is None:
+        total = rows[0].total if rows else 0
+    
+    return {
+        "dags": dags_list,
+        "total": total,
+        "limit": limit,
+        "next_cursor": page[-1].id if len(rows) > limit else None,
+    }
+
 # Additional utility endpoint to list all DAGs
 @router.get("/dags/")
-async def list_dags(db: Session = Depends(get_db)):
+async def list_dags(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    name: Optional[str] = Query(None, description="Case-insensitive substring of the DAG name"),
+    updated_after: Optional[datetime] = None,
+    updated_before: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """One page of DAG summaries, newest first, in a single query.
+
+    Pages are keyset-paginated on id, so every page costs the same however deep
+    it is. `total` (the filtered count) comes from a window function on the
+    first page only; later pages return null rather than rescanning the set.
+    Pages are served from the DAG cache until any DAG is created, updated or deleted.
+    """
     try:
-        db_dags = db.query(DBSyntheticDataDAG).all()
-        
-        dags_list = []
-        for db_dag in db_dags:
-            # Get node and edge counts for summary
-            node_count = db.query(DBDagNode).filter(DBDagNode.dag_id == db_dag.id).count()
-            edge_count = db.query(DBDagEdge).filter(DBDagEdge.dag_id == db_dag.id).count()
-            
-            dag_summary = {
-                "id": db_dag.id,
-                "name": db_dag.name,
-                "description": db_dag.description,
-                "created_at": db_dag.created_at.isoformat() if db_dag.created_at else None,
-                "updated_at": db_dag.updated_at.isoformat() if db_dag.updated_at else None,
-                "node_count": node_count,
-                "edge_count": edge_count
-            }
-            dags_list.append(dag_summary)
-        
-        return {"dags": dags_list, "total": len(dags_list)}
+        params = {
+            "limit": limit,
+            "cursor": cursor,
+            "name": name,
+            "updated_after": updated_after,
+            "updated_before": updated_before,
+            "counter_columns": settings.DAG_LIST_COUNTER_COLUMNS,
+        }
+
+        async def load() -> bytes:
+            return orjson.dumps(await _list_page(db, limit, cursor, name, updated_after, updated_before))
+
+        body = await dag_cache.get_list(params, load)
+        return Response(content=body, media_type="application/json")
         
     except Exception as e:
         print(f"Error listing DAGs: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to list DAGs: {str(e)}"
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,45 @@
+"""Logging setup with an optional background writer.
+
+With LOG_ASYNC the root logger gets a single QueueHandler, so a request
+thread or the event loop only enqueues the record; a QueueListener thread
+formats it and writes it to the real handlers (stderr by default).
+"""
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.core.config import settings
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOG_QUEUE_SIZE = 10000  # Records buffered before the queue drops new ones instead of blocking
+
+
+class _DroppingQueueHandler(QueueHandler):
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Never stall a request on a slow log sink
+            pass
+
+
+def configure_logging() -> Optional[QueueListener]:
+    """Configure the root logger; returns the listener to stop at shutdown when logging is async."""
+    level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    root = logging.getLogger()
+    root.setLevel(level)
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+
+    if not settings.LOG_ASYNC:
+        root.addHandler(handler)
+        return None
+
+    log_queue: queue.Queue = queue.Queue(LOG_QUEUE_SIZE)
+    root.addHandler(_DroppingQueueHandler(log_queue))
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,127 @@
+"""Prometheus metrics for the backend's hot paths.
+
+Everything here is a prometheus_client counter, gauge or histogram, so the
+recording cost is a lock and an add. Under multi-worker uvicorn each worker is
+its own process; set PROMETHEUS_MULTIPROC_DIR to an empty, writable directory
+before the workers start and every process writes its samples to mmap files
+there, which /metrics aggregates on scrape. Without it the default
+per-process registry is used. Temporal workers aren't served by the API, so
+each one exposes this registry on its own port (see app.core.temporal).
+"""
+import os
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Latency buckets in seconds, from cached reads to large DAG saves
+REQUEST_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Activities run whole engine nodes, so their buckets reach into minutes
+ACTIVITY_DURATION_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+REQUEST_LATENCY = Histogram(
+    "syntheta_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=REQUEST_LATENCY_BUCKETS,
+)
+
+# Pool gauges move on checkout/checkin events; livesum adds up the live workers' pools
+DB_POOL_SIZE = Gauge(
+    "syntheta_db_pool_size", "Configured connections per pool", multiprocess_mode="livesum"
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "syntheta_db_pool_checked_out", "Connections currently checked out of the pool", multiprocess_mode="livesum"
+)
+DB_POOL_OPEN = Gauge(
+    "syntheta_db_pool_connections", "Connections currently open, including overflow", multiprocess_mode="livesum"
+)
+DB_POOL_CHECKOUTS = Counter("syntheta_db_pool_checkouts", "Connection checkouts from the pool")
+
+# Statement timings, labelled by operation and first table so the label set stays small
+QUERY_DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0)
+DB_QUERY_DURATION = Histogram(
+    "syntheta_db_query_duration_seconds",
+    "SQL statement execution time",
+    ["operation", "table"],
+    buckets=QUERY_DURATION_BUCKETS,
+)
+
+ACTIVITY_DURATION = Histogram(
+    "syntheta_temporal_activity_duration_seconds",
+    "Temporal activity duration",
+    ["activity", "node_type", "status"],
+    buckets=ACTIVITY_DURATION_BUCKETS,
+)
+
+
+def route_label(scope: dict) -> str:
+    """Route template (`/api/v1/dags/{dag_id}`) rather than the raw path, so ids don't explode label cardinality."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    REQUEST_LATENCY.labels(method=method, route=route, status=str(status)).observe(seconds)
+
+
+def observe_query(operation: str, table: str, seconds: float) -> None:
+    DB_QUERY_DURATION.labels(operation=operation, table=table).observe(seconds)
+
+
+def observe_activity(activity: str, node_type: str, status: str, seconds: float) -> None:
+    ACTIVITY_DURATION.labels(activity=activity, node_type=node_type, status=status).observe(seconds)
+
+
+def instrument_pool(engine: Engine) -> None:
+    """Track an engine's pool utilisation through its connection events."""
+    size = getattr(engine.pool, "size", None)
+    if callable(size):
+        DB_POOL_SIZE.inc(size())
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        DB_POOL_OPEN.inc()
+
+    @event.listens_for(engine, "close")
+    def _close(dbapi_connection, connection_record):
+        DB_POOL_OPEN.dec()
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKED_OUT.inc()
+        DB_POOL_CHECKOUTS.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.dec()
+
+
+def registry() -> CollectorRegistry:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # A fresh registry per scrape that reads every worker's files
+        collector_registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(collector_registry)
+        return collector_registry
+    return REGISTRY
+
+
+def render_latest(collector_registry: Optional[CollectorRegistry] = None):
+    """Exposition payload and its content type for the /metrics endpoint."""
+    return generate_latest(collector_registry or registry()), CONTENT_TYPE_LATEST
+
+
+def mark_worker_dead(pid: int) -> None:
+    """Drop a dead worker's live gauges; call from the process manager's child-exit hook."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid)
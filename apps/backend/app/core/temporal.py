@@ -1,27 +1,82 @@
-from temporalio.client import Client
+import argparse
+import asyncio
+import os
+from typing import Optional
+
+from prometheus_client import start_http_server
+from temporalio.client import Client, WorkflowHandle
 from temporalio.worker import Worker
+from app.core import metrics
 from app.core.config import settings
-from app.workflows.dag_workflow import DAGWorkflow
+from app.workflows.dag_workflow import DAGWorkflow, DAGWorkflowInput
 from app.activities.node_activities import execute_node
 
-async def start_temporal_worker():
+async def start_temporal_worker(cpu: bool = False, metrics_port: Optional[int] = None):
+    """Run a worker until cancelled.
+
+    The default worker serves DAGWorkflow and I/O-bound node activities on
+    TEMPORAL_TASK_QUEUE. With `cpu`, it serves only the activities of
+    TEMPORAL_CPU_NODE_TYPES on TEMPORAL_CPU_TASK_QUEUE, at most
+    TEMPORAL_CPU_MAX_CONCURRENT_ACTIVITIES at a time. Workers hold no state:
+    start more of either kind, on any machine, to add capacity.
+
+    Activity durations and the worker's database pool are exposed for
+    Prometheus on `metrics_port` (default TEMPORAL_WORKER_METRICS_PORT; 0
+    disables it).
+    """
+    port = settings.TEMPORAL_WORKER_METRICS_PORT if metrics_port is None else metrics_port
+    if port:
+        # Serves from a daemon thread, so scrapes never wait on the activities' event loop
+        start_http_server(port, registry=metrics.registry())
+
     # Create client connected to server
-    client = await Client.connect(
-        f"{settings.temporal_host}:{settings.temporal_port}"
-    )
+    client = await get_temporal_client()
 
     # Run the worker
-    worker = Worker(
-        client,
-        task_queue="dag-execution",
-        workflows=[DAGWorkflow],
-        activities=[execute_node]
-    )
+    if cpu:
+        worker = Worker(
+            client,
+            task_queue=settings.TEMPORAL_CPU_TASK_QUEUE,
+            activities=[execute_node],
+            max_concurrent_activities=settings.TEMPORAL_CPU_MAX_CONCURRENT_ACTIVITIES or os.cpu_count() or 1,
+        )
+    else:
+        worker = Worker(
+            client,
+            task_queue=settings.TEMPORAL_TASK_QUEUE,
+            workflows=[DAGWorkflow],
+            activities=[execute_node],
+            max_concurrent_activities=settings.TEMPORAL_MAX_CONCURRENT_ACTIVITIES,
+        )
 
     await worker.run()
 
 async def get_temporal_client():
     client = await Client.connect(
-        f"{settings.temporal_host}:{settings.temporal_port}"
+        f"{settings.TEMPORAL_HOST}:{settings.TEMPORAL_PORT}"
     )
-    return client 
\ No newline at end of file
+    return client
+
+async def start_dag_workflow(client: Client, run_id: int, nodes: list, edges: list) -> WorkflowHandle:
+    """Start DAGWorkflow for a run, with this deployment's concurrency limits and queues."""
+    return await client.start_workflow(
+        DAGWorkflow.run,
+        DAGWorkflowInput(
+            run_id=run_id,
+            nodes=nodes,
+            edges=edges,
+            concurrency_limits=settings.NODE_CONCURRENCY_LIMITS,
+            task_queue=settings.TEMPORAL_TASK_QUEUE,
+            cpu_task_queue=settings.TEMPORAL_CPU_TASK_QUEUE,
+            cpu_node_types=settings.TEMPORAL_CPU_NODE_TYPES,
+        ),
+        id=f"dag-run-{run_id}",
+        task_queue=settings.TEMPORAL_TASK_QUEUE,
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a Temporal worker for DAG execution")
+    parser.add_argument("--cpu", action="store_true", help="Serve only CPU-heavy node activities")
+    parser.add_argument("--metrics-port", type=int, help="Prometheus port (default TEMPORAL_WORKER_METRICS_PORT, 0 disables)")
+    args = parser.parse_args()
+    asyncio.run(start_temporal_worker(cpu=args.cpu, metrics_port=args.metrics_port))
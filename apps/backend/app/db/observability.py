@@ -0,0 +1,64 @@
+"""Statement timing and a sampled slow-query log for the SQLAlchemy engine.
+
+Replaces `echo=True`: instead of formatting and writing every statement
+synchronously, each execution costs two perf_counter calls and one histogram
+observation. Only statements slower than DB_SLOW_QUERY_MS are logged, and of
+those only a DB_SLOW_QUERY_SAMPLE_RATE fraction, without their parameters.
+"""
+import logging
+import random
+import re
+import time
+from functools import lru_cache
+from typing import Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import observe_query
+
+logger = logging.getLogger("app.db.slow_query")
+
+# First table a statement reads or writes; good enough to label the histogram
+_TABLE_PATTERN = re.compile(r'\b(?:FROM|INTO|UPDATE|JOIN)\s+"?([A-Za-z_][A-Za-z0-9_.]*)"?', re.IGNORECASE)
+MAX_LOGGED_STATEMENT = 2000  # Characters of SQL kept in a slow-query record
+
+
+@lru_cache(maxsize=1024)
+def statement_labels(statement: str) -> Tuple[str, str]:
+    """(operation, table) for a statement; cached because compiled SQL strings repeat."""
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    if operation not in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH"):
+        operation = "OTHER"
+    match = _TABLE_PATTERN.search(statement)
+    return operation, match.group(1) if match else "none"
+
+
+def instrument_queries(engine: Engine) -> None:
+    """Time every statement on `engine` and log a sample of the slow ones."""
+    slow_seconds = settings.DB_SLOW_QUERY_MS / 1000.0
+    sample_rate = settings.DB_SLOW_QUERY_SAMPLE_RATE
+    record_metrics = settings.DB_QUERY_METRICS
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        if record_metrics:
+            operation, table = statement_labels(statement)
+            observe_query(operation, table, elapsed)
+        if elapsed >= slow_seconds and (sample_rate >= 1.0 or random.random() < sample_rate):
+            # Arguments are deferred so the message is only formatted by the log handler
+            logger.warning("Slow query (%.1f ms, executemany=%s): %s",
+                           elapsed * 1000.0, executemany, statement[:MAX_LOGGED_STATEMENT])
+
+    @event.listens_for(engine, "handle_error")
+    def _drop_timer(exception_context):
+        # A failed statement never reaches after_cursor_execute; keep the stack balanced
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start"):
+            connection.info["query_start"].pop()
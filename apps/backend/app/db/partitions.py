@@ -0,0 +1,231 @@
+"""Monthly partitions of the run history on PostgreSQL.
+
+dag_runs is range-partitioned on started_at and execution_logs on
+run_started_at (its run's started_at), so a run and its logs always live in
+the same month. Recent-run queries only touch the newest partitions, and
+expiring a month of history is a DETACH and DROP per table, not a bulk DELETE.
+
+`maintain` keeps RUN_HISTORY_PARTITIONS_AHEAD months of partitions ready
+(a row for a month without a partition fails to insert). When
+RUN_HISTORY_RETENTION_DAYS is set, it also drops every month that is older
+than that. If RUN_HISTORY_ARCHIVE_DIR is set, each month is exported to
+Parquet before it is dropped. The API runs `maintain` every
+RUN_HISTORY_MAINTENANCE_INTERVAL_SECONDS; `python -m app.db.partitions`
+runs it once, e.g. from cron. Tables that aren't partitioned (SQLite, or a
+database created by init_db rather than Alembic) are left alone.
+"""
+import asyncio
+import logging
+import os
+import re
+import tempfile
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+import orjson
+from sqlalchemy import JSON, Boolean, Date, DateTime, Float, Integer, delete, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+from app.models.dag import DAGRun, ExecutionLog, WorkspaceDailyRunCount
+
+logger = logging.getLogger(__name__)
+
+# Partitioned table -> model. Logs come first, so a month's logs are dropped before the runs they reference
+PARTITIONED_TABLES = {
+    "execution_logs": ExecutionLog.__table__,
+    "dag_runs": DAGRun.__table__,
+}
+# pg_try_advisory_lock key: one worker maintains partitions at a time
+ADVISORY_LOCK_KEY = 7_301_946_215
+ARCHIVE_BATCH_ROWS = 10_000
+_PARTITION_SUFFIX = re.compile(r"_p(\d{4})_(\d{2})$")
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    return conn.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"),
+        {"table": table},
+    ).scalar()
+
+
+def partitions(conn: Connection, table: str) -> Dict[date, str]:
+    """First day of each month -> partition name."""
+    names = conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(:table)"
+        ),
+        {"table": table},
+    ).scalars()
+    months = {}
+    for name in names:
+        match = _PARTITION_SUFFIX.search(name)
+        if match:
+            months[date(int(match[1]), int(match[2]), 1)] = name
+    return months
+
+
+def ensure_partitions(conn: Connection, today: date, ahead: int) -> List[str]:
+    """Create this month's partitions and `ahead` months after it, where missing."""
+    created = []
+    this_month = today.replace(day=1)
+    for table in PARTITIONED_TABLES:
+        existing = partitions(conn, table)
+        for month in (add_months(this_month, n) for n in range(ahead + 1)):
+            if month in existing:
+                continue
+            name = partition_name(table, month)
+            conn.execute(text(
+                f"CREATE TABLE {name} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            ))
+            created.append(name)
+    return created
+
+
+def expired_months(conn: Connection, cutoff: date) -> List[date]:
+    """Months that end on or before `cutoff`."""
+    months = set()
+    for table in PARTITIONED_TABLES:
+        months.update(month for month in partitions(conn, table) if add_months(month, 1) <= cutoff)
+    return sorted(months)
+
+
+def _arrow_type(pa, column_type):
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column_type, Date):
+        return pa.date32()
+    return pa.string()  # Strings, and JSON columns as JSON text
+
+
+def archive_partition(conn: Connection, table: str, partition: str, archive_dir: str) -> str:
+    """Write a partition to <archive_dir>/<table>/<partition>.parquet, streaming it in batches."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("RUN_HISTORY_ARCHIVE_DIR requires the pyarrow package (pip install pyarrow)") from e
+
+    columns = list(PARTITIONED_TABLES[table].columns)
+    schema = pa.schema([(column.name, _arrow_type(pa, column.type)) for column in columns])
+    json_columns = [column.name for column in columns if isinstance(column.type, JSON)]
+    directory = os.path.join(archive_dir, table)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{partition}.parquet")
+
+    query = text(f"SELECT {', '.join(column.name for column in columns)} FROM {partition}")
+    result = conn.execute(query.execution_options(stream_results=True))
+    # Write then rename, so an interrupted export never leaves a truncated archive
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".parquet")
+    os.close(fd)
+    try:
+        with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+            for rows in result.mappings().partitions(ARCHIVE_BATCH_ROWS):
+                batch = [dict(row) for row in rows]
+                for row in batch:
+                    for name in json_columns:
+                        if row[name] is not None:
+                            row[name] = orjson.dumps(row[name], option=orjson.OPT_NON_STR_KEYS).decode()
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+def drop_month(conn: Connection, month: date, archive_dir: Optional[str] = None) -> List[str]:
+    """Archive (when `archive_dir` is set), detach and drop one month of every partitioned table.
+
+    Dropping a partition fires no row triggers, so the month's rollup rows
+    are deleted here, in the same transaction, rather than by dag_runs_rollup.
+    """
+    dropped = []
+    for table in PARTITIONED_TABLES:
+        partition = partitions(conn, table).get(month)
+        if partition is None:
+            continue
+        if archive_dir:
+            archive_partition(conn, table, partition, archive_dir)
+        # Detaching first checks no log still references the runs, instead of failing the DROP on the foreign key
+        conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition}"))
+        conn.execute(text(f"DROP TABLE {partition}"))
+        dropped.append(partition)
+        if table == "dag_runs":
+            # Rollup days are started_at::date, so the month's runs are counted in exactly its days
+            conn.execute(delete(WorkspaceDailyRunCount).where(
+                WorkspaceDailyRunCount.day >= month, WorkspaceDailyRunCount.day < add_months(month, 1)
+            ))
+    return dropped
+
+
+def maintain(engine: Engine, today: Optional[date] = None) -> Dict[str, List[str]]:
+    """Create upcoming partitions and apply retention; returns the partitions created and dropped.
+
+    Does nothing when another worker holds the maintenance lock. Each month is
+    dropped in its own transaction, after its archive is written.
+    """
+    report = {"created": [], "dropped": []}
+    if engine.dialect.name != "postgresql":
+        return report
+    today = today or datetime.utcnow().date()
+    with engine.connect() as conn:
+        if not all(is_partitioned(conn, table) for table in PARTITIONED_TABLES):
+            return report
+        if not conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY}).scalar():
+            return report
+        conn.commit()
+        try:
+            # Creating or detaching a partition locks the parent table; give up rather than queue behind long queries
+            conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+            report["created"] = ensure_partitions(conn, today, settings.RUN_HISTORY_PARTITIONS_AHEAD)
+            conn.commit()
+            if settings.RUN_HISTORY_RETENTION_DAYS > 0:
+                cutoff = today - timedelta(days=settings.RUN_HISTORY_RETENTION_DAYS)
+                for month in expired_months(conn, cutoff):
+                    conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+                    report["dropped"] += drop_month(conn, month, settings.RUN_HISTORY_ARCHIVE_DIR or None)
+                    conn.commit()
+        finally:
+            conn.rollback()
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY})
+            conn.commit()
+    return report
+
+
+async def run_periodically(engine: Engine, interval_seconds: float) -> None:
+    """`maintain` now and then every `interval_seconds`, off the event loop; failures are logged and retried."""
+    while True:
+        try:
+            report = await asyncio.to_thread(maintain, engine)
+            if report["created"] or report["dropped"]:
+                logger.info(f"Run history partitions created: {report['created']}, dropped: {report['dropped']}")
+        except Exception:
+            logger.exception("Run history partition maintenance failed")
+        await asyncio.sleep(interval_seconds)
+
+
+if __name__ == "__main__":
+    from app.db.session import engine
+
+    report = maintain(engine)
+    print(f"Created partitions: {', '.join(report['created']) or 'none'}")
+    print(f"Dropped partitions: {', '.join(report['dropped']) or 'none'}")
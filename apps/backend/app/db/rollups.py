@@ -0,0 +1,45 @@
+"""PostgreSQL triggers that keep workspace_daily_run_counts in step with dag_runs.
+
+Every insert, delete, or change of a run's DAG, status, or start time moves
+one count between (workspace, day, status) buckets, so the rollup never needs
+a full refresh. Runs without a started_at aren't counted.
+"""
+
+DAG_RUNS_ROLLUP_SQL = """
+CREATE OR REPLACE FUNCTION dag_runs_rollup() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.started_at IS NOT NULL THEN
+        UPDATE workspace_daily_run_counts AS counts
+        SET run_count = counts.run_count - 1
+        FROM dags
+        WHERE dags.id = OLD.dag_id
+          AND counts.workspace_id = dags.workspace_id
+          AND counts.day = OLD.started_at::date
+          AND counts.status = COALESCE(OLD.status, 'unknown');
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.started_at IS NOT NULL THEN
+        INSERT INTO workspace_daily_run_counts (workspace_id, day, status, run_count)
+        SELECT dags.workspace_id, NEW.started_at::date, COALESCE(NEW.status, 'unknown'), 1
+        FROM dags
+        WHERE dags.id = NEW.dag_id
+        ON CONFLICT (workspace_id, day, status)
+        DO UPDATE SET run_count = workspace_daily_run_counts.run_count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS dag_runs_rollup_insert_delete ON dag_runs;
+CREATE TRIGGER dag_runs_rollup_insert_delete
+    AFTER INSERT OR DELETE ON dag_runs
+    FOR EACH ROW EXECUTE FUNCTION dag_runs_rollup();
+
+DROP TRIGGER IF EXISTS dag_runs_rollup_update ON dag_runs;
+CREATE TRIGGER dag_runs_rollup_update
+    AFTER UPDATE OF dag_id, status, started_at ON dag_runs
+    FOR EACH ROW
+    WHEN (OLD.dag_id IS DISTINCT FROM NEW.dag_id
+          OR OLD.status IS DISTINCT FROM NEW.status
+          OR OLD.started_at IS DISTINCT FROM NEW.started_at)
+    EXECUTE FUNCTION dag_runs_rollup();
+"""
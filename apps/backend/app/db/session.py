@@ -1,28 +1,64 @@
+import orjson
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.pool import QueuePool
-import logging
 
 from app.core.config import settings
+from app.core.metrics import instrument_pool
+from app.db.observability import instrument_queries
 
-# Set up logging
-logging.basicConfig()
-logging.getLogger('sqlalchemy.engine').setLevel(logging.INFO)
 
-print(f"Connecting to database with URL: {settings.database_url}")
+def _json_dumps(value) -> str:
+    # JSON columns (node configs, positions, metrics) go through orjson both ways
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
 
 engine = create_engine(
-    settings.database_url,
+    settings.DATABASE_URL,
     poolclass=QueuePool,
     pool_size=5,
     max_overflow=10,
     pool_timeout=30,
     pool_recycle=1800,
-    echo=True  # This will print SQL queries for debugging
+    echo=settings.DB_ECHO,  # Statement timing and the slow-query log come from instrument_queries
+    json_serializer=_json_dumps,
+    json_deserializer=orjson.loads,
 )
+instrument_pool(engine)
+instrument_queries(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def async_database_url(url: str) -> str:
+    """Same database through asyncpg (postgresql:// and postgresql+psycopg2:// both map to postgresql+asyncpg://)."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "postgresql":
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    return parsed.render_as_string(hide_password=False)
+
+
+# Async stack for the API routes; Temporal activities and scripts keep the sync engine
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    pool_size=settings.DB_ASYNC_POOL_SIZE,
+    max_overflow=settings.DB_ASYNC_MAX_OVERFLOW,
+    pool_timeout=30,
+    pool_recycle=1800,
+    pool_pre_ping=True,
+    echo=settings.DB_ECHO,
+    json_serializer=_json_dumps,
+    json_deserializer=orjson.loads,
+)
+# Pool and cursor events are emitted by the sync engine the async one wraps
+instrument_pool(async_engine.sync_engine)
+instrument_queries(async_engine.sync_engine)
+
+# expire_on_commit=False: attributes stay readable after commit without an implicit (blocking) reload
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -30,4 +66,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
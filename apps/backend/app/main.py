@@ -1,23 +1,26 @@
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import time
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
 from app.core.config import settings, get_cors_settings
+from app.core import metrics
+from app.core.logging_config import configure_logging
 from app.api.routes import dags, db
 from app.api.v1.endpoints import auth
+from app.services.dag_cache import dag_cache
+from app.db import partitions
+from app.db.session import engine
 
 
-# Set up logging
-logging.basicConfig(
-    level=getattr(logging, settings.log_level.upper()),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+# Set up logging (records are written by a background thread when LOG_ASYNC is on)
+log_listener = configure_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -36,11 +39,24 @@ async def lifespan(app: FastAPI):
     # - Database connection verification
     # - Cache warming
     # - Model loading
+
+    # Run history partitions: create upcoming months, apply retention (one worker at a time)
+    partition_maintenance = None
+    if settings.RUN_HISTORY_MAINTENANCE_INTERVAL_SECONDS > 0:
+        partition_maintenance = asyncio.create_task(
+            partitions.run_periodically(engine, settings.RUN_HISTORY_MAINTENANCE_INTERVAL_SECONDS)
+        )
     
     yield
     
     # Shutdown
     logger.info("🛑 Shutting down Syntheta API...")
+    if partition_maintenance is not None:
+        partition_maintenance.cancel()
+    await dag_cache.close()
+    if log_listener is not None:
+        # Flush queued records before the process exits
+        log_listener.stop()
 
 
 # Create FastAPI application
@@ -61,10 +77,16 @@ app = FastAPI(
 # Request timing middleware
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
-    """Add processing time header to responses."""
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
+    """Add processing time header to responses and record the route's latency."""
+    start_time = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        process_time = time.perf_counter() - start_time
+        # The route is only resolved once the router has run, so read it after call_next
+        metrics.observe_request(request.method, metrics.route_label(request.scope), status, process_time)
     response.headers["X-Process-Time"] = str(process_time)
     return response
 
@@ -163,6 +185,13 @@ def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus scrape endpoint (aggregated across workers when PROMETHEUS_MULTIPROC_DIR is set)."""
+    payload, content_type = metrics.render_latest()
+    return Response(content=payload, media_type=content_type)
+
+
 @app.get("/health/detailed")
 async def detailed_health_check():
     """Detailed health check with service status."""
@@ -1,6 +1,6 @@
 from app.models.user import User
 from app.models.workspace import Workspace
-from app.models.dag import DAG, DAGRun, SyntheticDataDAG, DagNode, DagEdge
+from app.models.dag import DAG, DAGRun, SyntheticDataDAG, DagNode, DagEdge, DagNodeContent, DagVersion, ExecutionLog, ErrorType, WorkspaceDailyRunCount
 from app.models.auth import RefreshToken, PasswordResetToken
 
 # Configure all mappers to ensure relationships are properly set up
@@ -1,8 +1,12 @@
-from sqlalchemy import Column, Integer, String, JSON, DateTime, ForeignKey, Table
-from sqlalchemy.orm import relationship
+from sqlalchemy import DDL, BigInteger, Column, Date, Float, Index, Integer, String, JSON, DateTime, ForeignKey, Table, UniqueConstraint, event
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 from datetime import datetime
+from enum import Enum
+from typing import Optional
+import json
 
+from app.db.rollups import DAG_RUNS_ROLLUP_SQL
 from app.db.session import Base
 
 class SyntheticDataDAG(Base):
@@ -13,10 +17,19 @@ class SyntheticDataDAG(Base):
     description = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Denormalised counts for list_dags, written by create_dag/update_dag
+    node_count = Column(Integer, nullable=False, default=0, server_default="0")
+    edge_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Head of the version history: latest DagVersion.version and its content hash (0/None before the first save)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    content_hash = Column(String(32), nullable=True)
     
     # Relationships
     nodes = relationship("DagNode", back_populates="dag", cascade="all, delete-orphan")
     edges = relationship("DagEdge", back_populates="dag", cascade="all, delete-orphan")
+    # History rows are removed by the database's ON DELETE CASCADE rather than loaded and deleted one by one
+    versions = relationship("DagVersion", back_populates="dag", cascade="all, delete-orphan", passive_deletes=True)
+    node_contents = relationship("DagNodeContent", cascade="all, delete-orphan", passive_deletes=True)
 
 class DagNode(Base):
     __tablename__ = "dagnodes"
@@ -48,6 +61,49 @@ class DagEdge(Base):
     # Relationships
     dag = relationship("SyntheticDataDAG", back_populates="edges")
 
+class DagNodeContent(Base):
+    """One node exactly as saved, keyed by the hash of its content.
+
+    Immutable and shared by every version of the DAG that contains the node
+    unchanged, so saving a version only writes the nodes that are new.
+    """
+    __tablename__ = "dag_node_contents"
+
+    dag_id = Column(Integer, ForeignKey("syntheticdatadags.id", ondelete="CASCADE"), primary_key=True)
+    hash = Column(String(32), primary_key=True)
+    frontend_id = Column(String)
+    node_type = Column(String)
+    config = Column(JSON)
+    position = Column(JSON)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class DagVersion(Base):
+    """An immutable version of a DAG, stored in full or as a delta from the version before it.
+
+    A full row (delta is NULL) lists every node by content hash and every edge;
+    a delta row holds only what changed since version - 1. Versions from
+    snapshot_version (a full row) up to this one replay to the whole graph.
+    """
+    __tablename__ = "dag_versions"
+    __table_args__ = (UniqueConstraint("dag_id", "version", name="uq_dag_versions_dag_id_version"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    dag_id = Column(Integer, ForeignKey("syntheticdatadags.id", ondelete="CASCADE"), nullable=False)
+    version = Column(Integer, nullable=False)
+    content_hash = Column(String(32), nullable=False)
+    name = Column(String)
+    description = Column(String, nullable=True)
+    snapshot_version = Column(Integer, nullable=False)
+    node_hashes = Column(JSON, nullable=True)  # Full rows: DagNodeContent.hash values, in the saved order
+    edges = Column(JSON, nullable=True)  # Full rows: [[source, target], ...]
+    delta = Column(JSON, nullable=True)  # Delta rows: see DagVersionStore.write
+    node_count = Column(Integer, nullable=False, default=0, server_default="0")
+    edge_count = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    dag = relationship("SyntheticDataDAG", back_populates="versions")
+
 # Simplified versions of other models (no problematic relationships)
 class DAG(Base):
     __tablename__ = "dags"
@@ -60,22 +116,114 @@ class DAG(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Add workspace relationship
-    workspace_id = Column(Integer, ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False)
+    workspace_id = Column(Integer, ForeignKey("workspaces.id", ondelete="CASCADE"), nullable=False, index=True)
     workspace = relationship("Workspace", back_populates="dags")
     
     # Keep DAGRun relationship
     runs = relationship("DAGRun", back_populates="dag", cascade="all, delete-orphan")
 
 class DAGRun(Base):
+    """A run of a DAG.
+
+    On PostgreSQL, Alembic creates this table partitioned by month of
+    started_at, with (id, started_at) as its primary key; app.db.partitions
+    creates upcoming months and drops expired ones.
+    """
     __tablename__ = "dag_runs"
+    # Run history per DAG, newest first, optionally filtered by status (get_dag_runs)
+    __table_args__ = (
+        Index("ix_dag_runs_dag_id_started_at", "dag_id", "started_at"),
+        Index("ix_dag_runs_dag_id_status_started_at", "dag_id", "status", "started_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     dag_id = Column(Integer, ForeignKey("dags.id"))
     status = Column(String)  # pending, running, completed, failed
-    started_at = Column(DateTime, nullable=True)
+    # Set when the run is created; the partition key on PostgreSQL, so it is never null
+    started_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
     completed_at = Column(DateTime, nullable=True)
     error = Column(String, nullable=True)
     metrics = Column(JSON, nullable=True)
     
     # Relationships
-    dag = relationship("DAG", back_populates="runs")
\ No newline at end of file
+    dag = relationship("DAG", back_populates="runs")
+    logs = relationship("ExecutionLog", back_populates="dag_run", cascade="all, delete-orphan")
+
+# On PostgreSQL, triggers on dag_runs maintain WorkspaceDailyRunCount (Alembic installs them on existing databases)
+event.listen(DAGRun.__table__, "after_create", DDL(DAG_RUNS_ROLLUP_SQL).execute_if(dialect="postgresql"))
+
+class WorkspaceDailyRunCount(Base):
+    """Runs per workspace, UTC day of started_at, and status: the dashboard's aggregates without scanning dag_runs."""
+    __tablename__ = "workspace_daily_run_counts"
+
+    workspace_id = Column(Integer, ForeignKey("workspaces.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    status = Column(String, primary_key=True)  # dag_runs.status, 'unknown' when null
+    run_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+class ErrorType(str, Enum):
+    INFRASTRUCTURE = "infrastructure"
+    PERMISSION = "permission"
+    VALIDATION = "validation"
+    MODEL = "model"
+    UNKNOWN = "unknown"
+
+class ExecutionLog(Base):
+    __tablename__ = "execution_logs"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    dag_run_id = Column(Integer, ForeignKey("dag_runs.id", ondelete="CASCADE"), index=True)
+    # Copy of the run's started_at: the partition key on PostgreSQL, so a run's logs share its month
+    # (and the foreign key there is (dag_run_id, run_started_at) -> dag_runs (id, started_at))
+    run_started_at = Column(DateTime, nullable=True)
+    node_id = Column(String, index=True)  # Frontend UUID
+    status = Column(String)  # running, completed, failed
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    # Payloads live in the artifact store (app.services.artifacts) under these sha256 digests
+    input_artifact = Column(String(64), nullable=True)
+    output_artifact = Column(String(64), nullable=True)
+    # Inline payloads of logs written before the artifact store; deferred so listing logs never loads them
+    input_data = deferred(Column(JSON, nullable=True))
+    output_data = deferred(Column(JSON, nullable=True))
+    error = Column(String, nullable=True)
+    error_type = Column(String, nullable=True)  # ErrorType value
+    # duration_seconds, input_size_bytes, output_size_bytes (aggregated by get_run_metrics),
+    # plus the engine's cpu_seconds, rows_in, rows_out and peak_memory_delta_bytes when available
+    metrics = Column(JSON, nullable=True)
+    # Copies of the summed metrics, so get_run_metrics aggregates numeric columns instead of JSON;
+    # the sizes are the artifacts' sizes when the payloads are stored as artifacts
+    duration_seconds = Column(Float, nullable=True)
+    input_size_bytes = Column(BigInteger, nullable=True)
+    output_size_bytes = Column(BigInteger, nullable=True)
+
+    # Relationships
+    dag_run = relationship("DAGRun", back_populates="logs")
+
+    def calculate_metrics(self, engine_metrics: Optional[dict] = None) -> dict:
+        """Fill `metrics` from the engine's per-node instrumentation, falling back to timestamps and payload/artifact sizes"""
+        metrics = dict(engine_metrics or {})
+        if "duration_seconds" not in metrics and self.started_at and self.completed_at:
+            metrics["duration_seconds"] = (self.completed_at - self.started_at).total_seconds()
+        if "input_size_bytes" not in metrics:
+            metrics["input_size_bytes"] = (
+                self.input_size_bytes if self.input_size_bytes is not None else _json_size(self.input_data)
+            )
+        if "output_size_bytes" not in metrics:
+            metrics["output_size_bytes"] = (
+                self.output_size_bytes if self.output_size_bytes is not None else _json_size(self.output_data)
+            )
+        self.metrics = metrics
+        self.duration_seconds = metrics.get("duration_seconds")
+        # An artifact's size is its exact stored length, which the payload endpoint serves and ranges over;
+        # the engine's figure is only an estimate, so it stays in `metrics`
+        if not self.input_artifact:
+            self.input_size_bytes = metrics.get("input_size_bytes")
+        if not self.output_artifact:
+            self.output_size_bytes = metrics.get("output_size_bytes")
+        return metrics
+
+def _json_size(data) -> int:
+    if data is None:
+        return 0
+    return len(json.dumps(data, default=str))
\ No newline at end of file
@@ -0,0 +1,43 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+
+class DAGRunResponse(BaseModel):
+    id: int
+    dag_id: int
+    status: Optional[str] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    error: Optional[str] = None
+    metrics: Optional[Dict[str, Any]] = None
+
+    class Config:
+        from_attributes = True
+
+class DAGRunPage(BaseModel):
+    items: List[DAGRunResponse]
+    # Only computed for the first page; an estimate when total_is_estimate is set
+    total: Optional[int] = None
+    total_is_estimate: bool = False
+    limit: int
+    # Pass back as `cursor` for the next page; None on the last page
+    next_cursor: Optional[str] = None
+
+class ExecutionLogResponse(BaseModel):
+    id: int
+    dag_run_id: Optional[int] = None
+    node_id: Optional[str] = None
+    status: Optional[str] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    # Payloads are fetched separately from /dag-runs/{run_id}/logs/{id}/input|output (Range supported)
+    input_artifact: Optional[str] = None
+    output_artifact: Optional[str] = None
+    input_size_bytes: Optional[int] = None
+    output_size_bytes: Optional[int] = None
+    error: Optional[str] = None
+    error_type: Optional[str] = None
+    metrics: Optional[Dict[str, Any]] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,138 @@
+"""Content-addressed store for node inputs and outputs.
+
+Payloads are serialised to JSON once and stored under their sha256, so an
+identical output is stored once however many runs produce it, and the digest
+doubles as the checksum. ExecutionLog rows keep only the digest and size;
+readers fetch the whole artifact or a byte range of it for previews.
+"""
+import hashlib
+import io
+import os
+import tempfile
+from functools import lru_cache
+from typing import Any, Iterator, NamedTuple, Optional
+
+import orjson
+
+from app.core.config import settings
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ArtifactRef(NamedTuple):
+    sha256: str
+    size: int
+
+
+def encode_payload(value: Any) -> bytes:
+    # Same lenience as the JSON columns had: anything orjson can't encode natively goes through str()
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY, default=str)
+
+
+class LocalArtifactStore:
+    """Artifacts as files under ARTIFACT_DIR/ab/cd/<sha256>."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def put(self, data: bytes, sha256: str) -> None:
+        path = self._path(sha256)
+        if os.path.exists(path):
+            return  # Same content is already stored
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so a reader never sees a partial artifact
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def read_range(self, sha256: str, offset: int, length: int) -> bytes:
+        with open(self._path(sha256), "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def iter_chunks(self, sha256: str) -> Iterator[bytes]:
+        with open(self._path(sha256), "rb") as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+
+class MinioArtifactStore:
+    """Artifacts as objects named by sha256 in MINIO_BUCKET."""
+
+    def __init__(self, endpoint: str, access_key: str, secret_key: str, bucket: str, secure: bool):
+        try:
+            from minio import Minio
+        except ImportError as e:
+            raise RuntimeError("ARTIFACT_STORE=minio requires the minio package (pip install minio)") from e
+        self.client = Minio(endpoint, access_key=access_key, secret_key=secret_key, secure=secure)
+        self.bucket = bucket
+        if not self.client.bucket_exists(bucket):
+            self.client.make_bucket(bucket)
+
+    def put(self, data: bytes, sha256: str) -> None:
+        from minio.error import S3Error
+
+        try:
+            self.client.stat_object(self.bucket, sha256)
+            return  # Same content is already stored
+        except S3Error as e:
+            if e.code != "NoSuchKey":
+                raise
+        self.client.put_object(self.bucket, sha256, io.BytesIO(data), len(data), content_type="application/json")
+
+    def read_range(self, sha256: str, offset: int, length: int) -> bytes:
+        response = self.client.get_object(self.bucket, sha256, offset=offset, length=length)
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    def iter_chunks(self, sha256: str) -> Iterator[bytes]:
+        response = self.client.get_object(self.bucket, sha256)
+        try:
+            yield from response.stream(CHUNK_SIZE)
+        finally:
+            response.close()
+            response.release_conn()
+
+
+@lru_cache(maxsize=1)
+def get_artifact_store():
+    if settings.ARTIFACT_STORE == "minio":
+        return MinioArtifactStore(
+            settings.MINIO_ENDPOINT,
+            settings.MINIO_ACCESS_KEY,
+            settings.MINIO_SECRET_KEY,
+            settings.MINIO_BUCKET,
+            settings.MINIO_SECURE,
+        )
+    if settings.ARTIFACT_STORE == "local":
+        return LocalArtifactStore(settings.ARTIFACT_DIR)
+    raise ValueError(f"Unknown ARTIFACT_STORE: {settings.ARTIFACT_STORE}")
+
+
+def store_payload(value: Any) -> Optional[ArtifactRef]:
+    """Serialise and store `value`; None for None. Blocking I/O: call from a thread in async code."""
+    if value is None:
+        return None
+    data = encode_payload(value)
+    sha256 = hashlib.sha256(data).hexdigest()
+    get_artifact_store().put(data, sha256)
+    return ArtifactRef(sha256, len(data))
+
+
+def load_payload(sha256: str) -> Any:
+    """Read back and decode an artifact written by store_payload. Blocking I/O, like store_payload."""
+    return orjson.loads(b"".join(get_artifact_store().iter_chunks(sha256)))
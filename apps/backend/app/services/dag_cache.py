@@ -0,0 +1,239 @@
+"""Read-through cache for serialised DAG payloads.
+
+Two tiers sit in front of the database:
+
+- a per-worker LRU holding recently served payloads for CACHE_LOCAL_TTL_SECONDS;
+- Redis, holding payloads for CACHE_TTL_SECONDS under generation-versioned keys.
+
+Every cached value lives under `<prefix>:v<format>:<name>:g<generation>`. A write
+does not delete anything: it sets a fresh generation for the DAG (and for the
+DAG list), so every worker's next lookup misses and the old entries simply
+expire. Concurrent misses for one key are collapsed twice: within a worker by
+sharing one in-flight load, across workers by a short Redis lock whose holder
+loads while the others poll for its result.
+
+Redis is an optimisation only; if it is disabled or unreachable every call
+falls through to the loader.
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import orjson
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 2  # Bump when the cached payload shape changes
+LOCK_TIMEOUT_MS = 2000  # How long a cross-worker fill lock is held at most
+LOCK_POLL_SECONDS = 0.025  # Interval at which lock losers look for the winner's result
+RETRY_AFTER_SECONDS = 5.0  # After a Redis error, read straight through for this long
+
+Loader = Callable[[], Awaitable[Optional[bytes]]]
+
+
+class LocalLRU:
+    """Small thread-safe LRU with a per-entry time to live."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class DagCache:
+    def __init__(self, redis: Optional[Redis] = None):
+        self._redis = redis
+        self.local = LocalLRU(settings.CACHE_LOCAL_MAX_ENTRIES, settings.CACHE_LOCAL_TTL_SECONDS)
+        self._inflight: Dict[str, "asyncio.Future[Optional[bytes]]"] = {}
+        # Bumped by local invalidation; a fill that started before the bump must not repopulate the LRU
+        self._epochs: Dict[str, int] = {}
+        self._retry_at = 0.0
+
+    @property
+    def redis(self) -> Optional[Redis]:
+        if not settings.CACHE_ENABLED or not settings.REDIS_URL:
+            return None
+        if time.monotonic() < self._retry_at:
+            # Redis failed recently; don't make every request wait on another connect attempt
+            return None
+        if self._redis is None:
+            self._redis = Redis.from_url(settings.REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+        return self._redis
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    # --- keys -----------------------------------------------------------------
+
+    @staticmethod
+    def _key(name: str) -> str:
+        return f"{settings.CACHE_KEY_PREFIX}:v{CACHE_FORMAT_VERSION}:{name}"
+
+    @staticmethod
+    def dag_name(dag_id: int) -> str:
+        return f"dag:{dag_id}"
+
+    @staticmethod
+    def list_name(params: Dict[str, Any]) -> str:
+        digest = hashlib.blake2b(orjson.dumps(params, option=orjson.OPT_SORT_KEYS), digest_size=12).hexdigest()
+        return f"dags:list:{digest}"
+
+    async def _generation(self, redis: Redis, name: str) -> bytes:
+        gen_key = self._key(f"{name}:gen")
+        generation = await redis.get(gen_key)
+        if generation is None:
+            # A fresh, effectively unique generation: if the key was evicted, it cannot collide with older payloads
+            await redis.set(gen_key, time.time_ns(), nx=True)
+            generation = await redis.get(gen_key)
+        return generation
+
+    # --- reads ----------------------------------------------------------------
+
+    async def get_dag(self, dag_id: int, load: Loader) -> Optional[bytes]:
+        """Serialised DAG, or None when the loader finds no such DAG (misses are not cached)."""
+        return await self._get(self.dag_name(dag_id), self.dag_name(dag_id), load)
+
+    async def get_list(self, params: Dict[str, Any], load: Loader) -> Optional[bytes]:
+        return await self._get(self.list_name(params), "dags:list", load)
+
+    async def _get(self, name: str, generation_name: str, load: Loader) -> Optional[bytes]:
+        cached = self.local.get(name)
+        if cached is not None:
+            return cached
+        epoch = self._epochs.get(generation_name, 0)
+
+        redis = self.redis
+        if redis is None:
+            body = await self._single_flight(name, load)
+        else:
+            try:
+                generation = await self._generation(redis, generation_name)
+                key = self._key(f"{name}:g{generation.decode()}")
+                body = await redis.get(key)
+                if body is None:
+                    body = await self._single_flight(key, lambda: self._fill(redis, key, load))
+            except RedisError as e:
+                self._unavailable(e)
+                body = await self._single_flight(name, load)
+
+        if body is not None and self._epochs.get(generation_name, 0) == epoch:
+            self.local.set(name, body)
+        return body
+
+    async def _single_flight(self, key: str, load: Loader) -> Optional[bytes]:
+        """Run `load` once per key at a time in this worker; concurrent callers await the same result."""
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future: "asyncio.Future[Optional[bytes]]" = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await load()
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved so an unawaited failure isn't logged as "never retrieved"
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    async def _fill(self, redis: Redis, key: str, load: Loader) -> Optional[bytes]:
+        lock_key = f"{key}:lock"
+        holder = await redis.set(lock_key, b"1", nx=True, px=LOCK_TIMEOUT_MS)
+        if not holder:
+            # Another worker is loading this key; wait for its result instead of hitting the DB too
+            deadline = time.monotonic() + LOCK_TIMEOUT_MS / 1000.0
+            while time.monotonic() < deadline:
+                await asyncio.sleep(LOCK_POLL_SECONDS)
+                body = await redis.get(key)
+                if body is not None:
+                    return body
+                if not await redis.exists(lock_key):
+                    break
+        try:
+            body = await load()
+            if body is not None:
+                await redis.set(key, body, ex=settings.CACHE_TTL_SECONDS)
+            return body
+        finally:
+            if holder:
+                await redis.delete(lock_key)
+
+    # --- invalidation ---------------------------------------------------------
+
+    async def invalidate_dag(self, dag_id: int) -> None:
+        """Call after a DAG is updated or deleted; also invalidates every cached list page."""
+        await self._bump(self.dag_name(dag_id))
+        await self.invalidate_lists()
+
+    async def invalidate_lists(self) -> None:
+        """Call after a DAG is created, or anything else that changes list_dags results."""
+        await self._bump("dags:list")
+
+    async def _bump(self, generation_name: str) -> None:
+        self._epochs[generation_name] = self._epochs.get(generation_name, 0) + 1
+        if generation_name == "dags:list":
+            # List pages are keyed by their parameters, so drop them all locally
+            self.local.clear()
+        else:
+            self.local.pop(generation_name)
+        redis = self.redis
+        if redis is None:
+            return
+        try:
+            await redis.set(self._key(f"{generation_name}:gen"), time.time_ns())
+        except RedisError as e:
+            # Other workers' entries stay valid until their TTL; there is nothing better to do without Redis
+            logger.warning("Failed to invalidate %s in the DAG cache: %s", generation_name, e)
+            self._retry_at = time.monotonic() + RETRY_AFTER_SECONDS
+
+    def _unavailable(self, error: RedisError) -> None:
+        logger.warning("DAG cache unavailable for %.0fs, reading through: %s", RETRY_AFTER_SECONDS, error)
+        self._retry_at = time.monotonic() + RETRY_AFTER_SECONDS
+
+
+dag_cache = DagCache()
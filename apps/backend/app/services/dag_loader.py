@@ -0,0 +1,154 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+from sqlalchemy import JSON, String, cast, func, literal_column, select, type_coerce
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.dag import SyntheticDataDAG, DagNode, DagEdge
+from app.services.dag_cache import dag_cache
+
+
+class DagEtagCache:
+    """dag_id -> ETag of the last version this worker served or wrote.
+
+    Lets get_dag answer a matching If-None-Match with 304 without touching the
+    database. Writes in this worker invalidate their entry straight away;
+    entries expire after DAG_ETAG_TTL_SECONDS so a write made by another worker
+    is picked up within that window.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, dag_id: int) -> Optional[str]:
+        ttl = settings.DAG_ETAG_TTL_SECONDS
+        if ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(dag_id)
+            if entry is None:
+                return None
+            etag, stored_at = entry
+            if time.monotonic() - stored_at > ttl:
+                del self._entries[dag_id]
+                return None
+            self._entries.move_to_end(dag_id)
+            return etag
+
+    def set(self, dag_id: int, etag: str) -> None:
+        with self._lock:
+            self._entries[dag_id] = (etag, time.monotonic())
+            self._entries.move_to_end(dag_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, dag_id: int) -> None:
+        with self._lock:
+            self._entries.pop(dag_id, None)
+
+
+etag_cache = DagEtagCache()
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    if not if_none_match or etag is None:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # Weak comparison (RFC 9110 13.1.2): W/ prefixes are ignored
+    return "*" in candidates or etag in (candidate[2:] if candidate.startswith("W/") else candidate for candidate in candidates)
+
+
+class DagLoader:
+    @staticmethod
+    def _graph_query(dialect: str):
+        node_id = func.coalesce(DagNode.frontend_id, cast(DagNode.id, String))
+        edge_id = cast(DagEdge.id, String)
+        if dialect == "postgresql":
+            node_json = func.json_build_object(
+                "id", node_id, "type", DagNode.node_type, "position", DagNode.position, "data", DagNode.config
+            )
+            edge_json = func.json_build_object(
+                "id", edge_id, "source", DagEdge.source_node_id, "target", DagEdge.target_node_id
+            )
+            nodes = func.json_agg(aggregate_order_by(node_json, DagNode.id))
+            edges = func.json_agg(aggregate_order_by(edge_json, DagEdge.id))
+            empty = literal_column("'[]'::json")
+        else:
+            # SQLite's JSON1 equivalents, for local databases
+            node_json = func.json_object(
+                "id", node_id, "type", DagNode.node_type,
+                "position", func.json(DagNode.position), "data", func.json(DagNode.config)
+            )
+            edge_json = func.json_object(
+                "id", edge_id, "source", DagEdge.source_node_id, "target", DagEdge.target_node_id
+            )
+            nodes = func.json_group_array(node_json)
+            edges = func.json_group_array(edge_json)
+            empty = literal_column("'[]'")
+
+        nodes_subquery = (
+            select(func.coalesce(nodes, empty)).where(DagNode.dag_id == SyntheticDataDAG.id).scalar_subquery()
+        )
+        edges_subquery = (
+            select(func.coalesce(edges, empty)).where(DagEdge.dag_id == SyntheticDataDAG.id).scalar_subquery()
+        )
+        return select(
+            SyntheticDataDAG.id,
+            SyntheticDataDAG.name,
+            SyntheticDataDAG.description,
+            SyntheticDataDAG.version,
+            type_coerce(nodes_subquery, JSON).label("nodes"),
+            type_coerce(edges_subquery, JSON).label("edges"),
+        )
+
+    @staticmethod
+    async def load(db: AsyncSession, dag_id: int) -> Optional[Dict[str, Any]]:
+        """The DAG in the frontend's shape, fetched in one round trip; None when it doesn't exist."""
+        query = DagLoader._graph_query(db.bind.dialect.name).where(SyntheticDataDAG.id == dag_id)
+        row = (await db.execute(query)).first()
+        if row is None:
+            return None
+        nodes = row.nodes if isinstance(row.nodes, list) else orjson.loads(row.nodes)
+        edges = row.edges if isinstance(row.edges, list) else orjson.loads(row.edges)
+        for node in nodes:
+            # Same defaults get_dag has always filled in for incomplete rows
+            if not node["position"]:
+                node["position"] = {"x": 0, "y": 0}
+            if not node["data"]:
+                node["data"] = {"label": f"{node['type']} Node"}
+        return {
+            "id": row.id,
+            "name": row.name,
+            "description": row.description,
+            "version": row.version,
+            "nodes": nodes,
+            "edges": edges,
+        }
+
+    @staticmethod
+    async def _load_body(db: AsyncSession, dag_id: int) -> Optional[bytes]:
+        dag = await DagLoader.load(db, dag_id)
+        return None if dag is None else orjson.dumps(dag)
+
+    @staticmethod
+    async def load_bytes(db: AsyncSession, dag_id: int) -> Optional[Tuple[bytes, str]]:
+        """Serialised DAG (read through the DAG cache) and its ETag, recorded in the ETag cache."""
+        body = await dag_cache.get_dag(dag_id, lambda: DagLoader._load_body(db, dag_id))
+        if body is None:
+            etag_cache.invalidate(dag_id)
+            return None
+        etag = etag_for(body)
+        etag_cache.set(dag_id, etag)
+        return body, etag
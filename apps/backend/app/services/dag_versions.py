@@ -0,0 +1,254 @@
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.dag import DagNodeContent, DagVersion
+
+# A version is stored in full once its delta chain would reach this length, bounding what a read replays
+SNAPSHOT_INTERVAL = 32
+
+
+def _hash(value: Any) -> str:
+    return hashlib.blake2b(orjson.dumps(value, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+
+
+def content_hash(name: str, description: Optional[str], node_hashes: List[str], edges: List[List[str]]) -> str:
+    # Order-insensitive: reordering nodes or edges in the editor isn't a new version
+    return _hash({"name": name, "description": description, "nodes": sorted(node_hashes), "edges": sorted(edges)})
+
+
+class DagVersionStore:
+    """Immutable DAG versions over content-addressed nodes.
+
+    Node contents are stored once per DAG and shared by every version that
+    contains them unchanged. A version row holds only what changed since the
+    version before it (nodes by content hash, edges by endpoints), with a full
+    row every SNAPSHOT_INTERVAL versions. Saving an edit therefore writes one
+    row per new node plus one version row the size of the edit, and a version
+    is read back by replaying at most SNAPSHOT_INTERVAL rows.
+    """
+
+    @staticmethod
+    def node_hash(node_id: str, node_type: str, position: Any, data: Any) -> str:
+        return _hash({"id": node_id, "type": node_type, "position": position, "data": data})
+
+    @staticmethod
+    def snapshot(name: str, description: Optional[str], nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Content hashes for a DAG in the frontend's shape; `content_hash` identifies the whole version.
+
+        Edges are expected deduplicated by (source, target); their frontend ids carry no meaning and aren't kept.
+        """
+        contents = {}
+        node_hashes = []
+        for node in nodes:
+            node_hash = DagVersionStore.node_hash(node["id"], node["type"], node["position"], node["data"])
+            contents[node_hash] = node
+            node_hashes.append(node_hash)
+        edges = [[edge["source"], edge["target"]] for edge in edges]
+        return {
+            "content_hash": content_hash(name, description, node_hashes, edges),
+            "name": name,
+            "description": description,
+            "node_hashes": node_hashes,
+            "contents": contents,
+            "edges": edges,
+        }
+
+    @staticmethod
+    def _insert_ignoring_duplicates(dialect: str):
+        # Two saves of the same DAG can race to store an identical node
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        return insert(DagNodeContent).on_conflict_do_nothing(index_elements=["dag_id", "hash"])
+
+    @staticmethod
+    async def _replay(db: AsyncSession, dag_id: int, version: int) -> Optional[Tuple[Any, List[str], List[List[str]]]]:
+        """(version row, node hashes, edges) of one version, from its full row and the deltas after it."""
+        snapshot_version = (
+            select(DagVersion.snapshot_version)
+            .where(DagVersion.dag_id == dag_id, DagVersion.version == version)
+            .scalar_subquery()
+        )
+        rows = (await db.execute(
+            select(
+                DagVersion.version,
+                DagVersion.content_hash,
+                DagVersion.name,
+                DagVersion.description,
+                DagVersion.created_at,
+                DagVersion.snapshot_version,
+                DagVersion.node_hashes,
+                DagVersion.edges,
+                DagVersion.delta,
+            )
+            .where(DagVersion.dag_id == dag_id, DagVersion.version >= snapshot_version, DagVersion.version <= version)
+            .order_by(DagVersion.version)
+        )).all()
+        if not rows:
+            return None
+        if rows[0].delta is not None or [row.version for row in rows] != list(range(rows[0].version, version + 1)):
+            raise LookupError(f"Version {version} of DAG {dag_id} has a broken delta chain")
+
+        node_hashes = list(rows[0].node_hashes)
+        edges = [list(edge) for edge in rows[0].edges]
+        for row in rows[1:]:
+            nodes, edge_changes = row.delta["nodes"], row.delta["edges"]
+            # A changed node keeps its place; removed ones drop out and new ones go last
+            replaced = dict(nodes["replace"])
+            removed = set(nodes["remove"])
+            node_hashes = [replaced.get(node_hash, node_hash) for node_hash in node_hashes if node_hash not in removed]
+            node_hashes += nodes["add"]
+            removed_edges = {tuple(edge) for edge in edge_changes["remove"]}
+            edges = [edge for edge in edges if tuple(edge) not in removed_edges] + edge_changes["add"]
+        return rows[-1], node_hashes, edges
+
+    @staticmethod
+    async def write(db: AsyncSession, dag_id: int, version: int, snapshot: Dict[str, Any]) -> None:
+        """Store `snapshot` as `version`: as a delta from version - 1, or in full every SNAPSHOT_INTERVAL versions.
+
+        Only node contents the DAG doesn't have yet are written, so reverting to
+        an older node reuses its stored content. Nodes shared with version - 1
+        are known to be stored; everything else is checked against the table.
+        """
+        parent = await DagVersionStore._replay(db, dag_id, version - 1) if version > 1 else None
+        if version > 1 and parent is None:
+            raise LookupError(f"DAG {dag_id} has no version {version - 1} to base version {version} on")
+        node_hashes, edges = snapshot["node_hashes"], snapshot["edges"]
+        parent_nodes = set(parent[1]) if parent else set()
+        new_nodes = set(node_hashes)
+        gone = [node_hash for node_hash in (parent[1] if parent else []) if node_hash not in new_nodes]
+        fresh = [node_hash for node_hash in node_hashes if node_hash not in parent_nodes]
+
+        # One lookup covers the changed nodes: which new contents are stored, and which node each gone hash was
+        stored = {}
+        if gone or fresh:
+            stored = dict((await db.execute(
+                select(DagNodeContent.hash, DagNodeContent.frontend_id)
+                .where(DagNodeContent.dag_id == dag_id, DagNodeContent.hash.in_(gone + fresh))
+            )).all())
+        missing = [node_hash for node_hash in fresh if node_hash not in stored]
+        if missing:
+            await db.execute(
+                DagVersionStore._insert_ignoring_duplicates(db.bind.dialect.name),
+                [
+                    {
+                        "dag_id": dag_id,
+                        "hash": node_hash,
+                        "frontend_id": snapshot["contents"][node_hash]["id"],
+                        "node_type": snapshot["contents"][node_hash]["type"],
+                        "config": snapshot["contents"][node_hash]["data"],
+                        "position": snapshot["contents"][node_hash]["position"],
+                    }
+                    for node_hash in missing
+                ],
+            )
+
+        row = DagVersion(
+            dag_id=dag_id,
+            version=version,
+            content_hash=snapshot["content_hash"],
+            name=snapshot["name"],
+            description=snapshot["description"],
+            node_count=len(node_hashes),
+            edge_count=len(edges),
+        )
+        if parent is None or version - parent[0].snapshot_version >= SNAPSHOT_INTERVAL:
+            row.snapshot_version = version
+            row.node_hashes = node_hashes
+            row.edges = edges
+        else:
+            # A gone node whose frontend id is still in the DAG was edited rather than removed
+            new_ids = {snapshot["contents"][node_hash]["id"]: node_hash for node_hash in fresh}
+            replace = [[node_hash, new_ids[stored[node_hash]]] for node_hash in gone if stored.get(node_hash) in new_ids]
+            replacements = {new for _, new in replace}
+            parent_edges = {tuple(edge) for edge in parent[2]}
+            new_edges = {tuple(edge) for edge in edges}
+            row.snapshot_version = parent[0].snapshot_version
+            row.delta = {
+                "nodes": {
+                    "replace": replace,
+                    "remove": [node_hash for node_hash in gone if stored.get(node_hash) not in new_ids],
+                    "add": [node_hash for node_hash in fresh if node_hash not in replacements],
+                },
+                "edges": {
+                    "add": [edge for edge in edges if tuple(edge) not in parent_edges],
+                    "remove": [edge for edge in parent[2] if tuple(edge) not in new_edges],
+                },
+            }
+        db.add(row)
+        await db.flush()
+
+    @staticmethod
+    async def load(db: AsyncSession, dag_id: int, version: int) -> Optional[Dict[str, Any]]:
+        """One version in the frontend's shape; None when it doesn't exist.
+
+        Two queries: the version's delta chain, then its node contents. A node
+        content that is missing is an error, never a silently smaller DAG.
+        """
+        replayed = await DagVersionStore._replay(db, dag_id, version)
+        if replayed is None:
+            return None
+        row, node_hashes, edges = replayed
+        contents = {
+            content.hash: content
+            for content in (await db.execute(
+                select(
+                    DagNodeContent.hash,
+                    DagNodeContent.frontend_id,
+                    DagNodeContent.node_type,
+                    DagNodeContent.position,
+                    DagNodeContent.config,
+                ).where(DagNodeContent.dag_id == dag_id, DagNodeContent.hash.in_(list(set(node_hashes))))
+            )).all()
+        }
+        missing = [node_hash for node_hash in node_hashes if node_hash not in contents]
+        if missing:
+            raise LookupError(f"Version {version} of DAG {dag_id} references missing node contents: {', '.join(missing)}")
+        return {
+            "id": dag_id,
+            "version": row.version,
+            "content_hash": row.content_hash,
+            "name": row.name,
+            "description": row.description,
+            "created_at": row.created_at.isoformat() if row.created_at else None,
+            "nodes": [
+                {
+                    "id": contents[node_hash].frontend_id,
+                    "type": contents[node_hash].node_type,
+                    "position": contents[node_hash].position,
+                    "data": contents[node_hash].config,
+                }
+                for node_hash in node_hashes
+            ],
+            # Frontend edge ids aren't versioned; (source, target) is unique within a version
+            "edges": [{"id": f"{source}-{target}", "source": source, "target": target} for source, target in edges],
+        }
+
+    @staticmethod
+    async def history(db: AsyncSession, dag_id: int, limit: int, before: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Version summaries, newest first, without reading any node contents."""
+        query = select(
+            DagVersion.version,
+            DagVersion.content_hash,
+            DagVersion.name,
+            DagVersion.created_at,
+            DagVersion.node_count,
+            DagVersion.edge_count,
+        ).where(DagVersion.dag_id == dag_id)
+        if before is not None:
+            query = query.where(DagVersion.version < before)
+        rows = (await db.execute(query.order_by(DagVersion.version.desc()).limit(limit))).all()
+        return [
+            {
+                "version": row.version,
+                "content_hash": row.content_hash,
+                "name": row.name,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+                "node_count": row.node_count,
+                "edge_count": row.edge_count,
+            }
+            for row in rows
+        ]
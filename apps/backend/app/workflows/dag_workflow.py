@@ -0,0 +1,135 @@
+"""Temporal workflow that executes a DAG run's nodes as activities.
+
+Nodes are scheduled in topological-level order, and each starts as soon as
+all of its upstream nodes have completed. Independent branches therefore run
+concurrently, and a slow node holds back only its own descendants. Two bounds
+apply on top of that:
+
+- Within a run, at most `concurrency_limits[type]` nodes of a type execute at
+  once.
+- Across runs, node types listed in `cpu_node_types` go to `cpu_task_queue`.
+  Only CPU workers serve that queue (see app.core.temporal), and each bounds
+  how many activities it runs at once. More of them can be started on any
+  machine that reaches the Temporal server.
+
+The limits and queues are part of the workflow input rather than read from
+settings here. Replays then see the values the run started with.
+
+Node outputs never pass through Temporal: execute_node stores each output in
+the artifact store and returns only its reference ({"sha256", "size"}).
+Children get their parents' references as `input_refs` and load the
+payloads themselves, so workflow history stays small whatever the data size.
+"""
+import asyncio
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from temporalio import workflow
+from temporalio.common import RetryPolicy
+from temporalio.exceptions import ApplicationError
+
+with workflow.unsafe.imports_passed_through():
+    from app.activities.node_activities import execute_node
+
+# One attempt of a node; generous because long trainings heartbeat, and a lost worker is caught by the heartbeat timeout
+NODE_TIMEOUT = timedelta(hours=24)
+# A worker that stops heartbeating (crashed, lost) has its node retried elsewhere, resuming from the last checkpoint
+NODE_HEARTBEAT_TIMEOUT = timedelta(minutes=2)
+NODE_RETRY_POLICY = RetryPolicy(maximum_attempts=3, non_retryable_error_types=["ValueError"])
+
+
+@dataclass
+class DAGWorkflowInput:
+    run_id: int
+    nodes: List[Dict[str, Any]]  # {"id", "type", "data", ...} as stored for the DAG
+    edges: List[Dict[str, Any]]  # {"source", "target"}
+    concurrency_limits: Dict[str, int] = field(default_factory=dict)  # Node type -> max concurrent in this run
+    task_queue: Optional[str] = None  # None: the workflow's own queue
+    cpu_task_queue: Optional[str] = None
+    cpu_node_types: List[str] = field(default_factory=list)
+
+
+class UpstreamFailed(Exception):
+    """A node wasn't executed because a node it depends on failed."""
+
+
+def topological_levels(node_ids: List[str], edges: List[Dict[str, Any]]) -> List[List[str]]:
+    """Nodes grouped by their longest distance from a root, in `node_ids` order within a level."""
+    upstream = {node_id: set() for node_id in node_ids}
+    for edge in edges:
+        if edge["source"] not in upstream or edge["target"] not in upstream:
+            raise ValueError(f"Edge {edge['source']} -> {edge['target']} references an unknown node")
+        upstream[edge["target"]].add(edge["source"])
+
+    levels = []
+    placed = set()
+    while len(placed) < len(node_ids):
+        level = [node_id for node_id in node_ids if node_id not in placed and upstream[node_id] <= placed]
+        if not level:
+            raise ValueError("DAG contains a cycle")
+        levels.append(level)
+        placed.update(level)
+    return levels
+
+
+@workflow.defn
+class DAGWorkflow:
+    @workflow.run
+    async def run(self, params: DAGWorkflowInput) -> Dict[str, Any]:
+        nodes = {node["id"]: node for node in params.nodes}
+        try:
+            levels = topological_levels(list(nodes), params.edges)
+        except ValueError as e:
+            raise ApplicationError(str(e), non_retryable=True)
+        upstream = {node_id: [] for node_id in nodes}
+        for edge in params.edges:
+            upstream[edge["target"]].append(edge["source"])
+        limits = {node_type: asyncio.Semaphore(limit) for node_type, limit in params.concurrency_limits.items()}
+
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_node(node_id: str) -> Any:
+            parents = upstream[node_id]
+            outcomes = await asyncio.gather(*(tasks[parent] for parent in parents), return_exceptions=True)
+            if any(isinstance(outcome, BaseException) for outcome in outcomes):
+                raise UpstreamFailed(node_id)
+            node = dict(nodes[node_id])
+            # A root keeps its own input; any other node gets its parents' output references by node id
+            if parents:
+                node["input_refs"] = dict(zip(parents, outcomes))
+            limit = limits.get(node["type"])
+            if limit is None:
+                return await self._execute(params, node)
+            async with limit:
+                return await self._execute(params, node)
+
+        # Tasks are created level by level, so parents always exist before their children look them up
+        for level in levels:
+            for node_id in level:
+                tasks[node_id] = asyncio.create_task(run_node(node_id))
+        outcomes = dict(zip(tasks, await asyncio.gather(*tasks.values(), return_exceptions=True)))
+
+        failed = [node_id for node_id, outcome in outcomes.items()
+                  if isinstance(outcome, BaseException) and not isinstance(outcome, UpstreamFailed)]
+        if failed:
+            skipped = [node_id for node_id, outcome in outcomes.items() if isinstance(outcome, UpstreamFailed)]
+            raise ApplicationError(
+                f"DAG run {params.run_id} failed at nodes {failed}; skipped {skipped}",
+                {"failed": failed, "skipped": skipped},
+                non_retryable=True,
+            )
+        # Output references by node id, not the outputs themselves
+        return {"run_id": params.run_id, "levels": levels, "outputs": outcomes}
+
+    @staticmethod
+    async def _execute(params: DAGWorkflowInput, node: Dict[str, Any]) -> Any:
+        cpu_bound = params.cpu_task_queue and node["type"] in params.cpu_node_types
+        return await workflow.execute_activity(
+            execute_node,
+            args=[node, params.run_id],
+            task_queue=params.cpu_task_queue if cpu_bound else params.task_queue,
+            start_to_close_timeout=NODE_TIMEOUT,
+            heartbeat_timeout=NODE_HEARTBEAT_TIMEOUT,
+            retry_policy=NODE_RETRY_POLICY,
+        )
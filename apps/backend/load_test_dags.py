@@ -0,0 +1,124 @@
+# apps/backend/load_test_dags.py
+"""Concurrency load test for the DAG routes.
+
+Fires requests at list_dags, get_dag and create_dag from one asyncio client
+at increasing concurrency and reports throughput and latency percentiles.
+A route that blocks the event loop stays near 1x throughput as concurrency
+grows; the async data layer should scale until the DB pool saturates.
+
+    python load_test_dags.py --base-url http://localhost:8000/api/v1
+    python load_test_dags.py --requests 500 --concurrency 1,10,50,100
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+
+
+def sample_dag(index: int, nodes: int = 4) -> Dict[str, Any]:
+    node_ids = [f"load-node-{index}-{i}" for i in range(nodes)]
+    return {
+        "name": f"Load test DAG {index}",
+        "description": "Created by load_test_dags.py",
+        "nodes": [
+            {"id": node_id, "type": "generator", "position": {"x": 100.0 * i, "y": 100.0},
+             "data": {"label": f"Node {i}", "config": {"type": "gaussian", "parameters": {"num_samples": 1000}}}}
+            for i, node_id in enumerate(node_ids)
+        ],
+        "edges": [
+            {"id": f"load-edge-{index}-{i}", "source": node_ids[i], "target": node_ids[i + 1]}
+            for i in range(nodes - 1)
+        ],
+    }
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+async def run_level(request: Callable[[int], Awaitable[httpx.Response]], total: int, concurrency: int) -> Dict[str, Any]:
+    """Send `total` requests with at most `concurrency` in flight."""
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for index in counter:
+            start = time.perf_counter()
+            try:
+                response = await request(index)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+    }
+
+
+async def load_test(base_url: str, total: int, levels: List[int]) -> Dict[str, List[Dict[str, Any]]]:
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=base_url.rstrip("/"), limits=limits, timeout=60.0) as client:
+        # One DAG to read back in get_dag
+        seeded = await client.post("/dags/", json=sample_dag(0))
+        seeded.raise_for_status()
+        dag_id = seeded.json()["id"]
+
+        scenarios: Dict[str, Callable[[int], Awaitable[httpx.Response]]] = {
+            "list_dags": lambda index: client.get("/dags/"),
+            "get_dag": lambda index: client.get(f"/dags/{dag_id}/"),
+            "create_dag": lambda index: client.post("/dags/", json=sample_dag(index + 1)),
+        }
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        for name, request in scenarios.items():
+            results[name] = []
+            for concurrency in levels:
+                # Warm up connections so the first level isn't charged for them
+                await run_level(request, min(concurrency, total), concurrency)
+                level = await run_level(request, total, concurrency)
+                baseline = results[name][0]["requests_per_second"] if results[name] else level["requests_per_second"]
+                level["speedup_vs_first_level"] = round(level["requests_per_second"] / baseline, 2)
+                results[name].append(level)
+                print(f"{name:<11} c={concurrency:<4} {level['requests_per_second']:>8} req/s  "
+                      f"p50 {level['p50_ms']:>7} ms  p95 {level['p95_ms']:>7} ms  "
+                      f"x{level['speedup_vs_first_level']}  errors {level['errors']}")
+        return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the DAG API routes")
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and concurrency level")
+    parser.add_argument("--concurrency", default="1,10,50", help="Comma-separated concurrency levels")
+    parser.add_argument("--output", help="Write the results as JSON")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    print(f"🧪 Load testing {args.base_url} ({args.requests} requests per level)...")
+    results = asyncio.run(load_test(args.base_url, args.requests, levels))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# apps/backend/test_dag_cache.py
+"""DAG cache checks against an in-memory Redis stand-in (fakeredis, in requirements-dev.txt).
+
+    python test_dag_cache.py
+"""
+import asyncio
+
+from fakeredis import FakeAsyncRedis
+from redis.asyncio import Redis
+
+from app.services.dag_cache import DagCache
+
+
+class CountingLoader:
+    """Stands in for the database: counts loads and can be slowed down to widen races."""
+
+    def __init__(self, body: bytes = b'{"id": 1}', delay: float = 0.0):
+        self.body = body
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.body
+
+
+def test_read_through():
+    async def run():
+        cache = DagCache(FakeAsyncRedis())
+        load = CountingLoader()
+        assert await cache.get_dag(1, load) == load.body
+        assert await cache.get_dag(1, load) == load.body  # Per-worker LRU
+        cache.local.clear()
+        assert await cache.get_dag(1, load) == load.body  # Redis
+        assert load.calls == 1
+        print("✅ Read-through: one load, then served from the LRU and from Redis")
+
+    asyncio.run(run())
+
+
+def test_missing_dag_not_cached():
+    async def run():
+        cache = DagCache(FakeAsyncRedis())
+        load = CountingLoader(body=None)
+        assert await cache.get_dag(1, load) is None
+        assert await cache.get_dag(1, load) is None
+        assert load.calls == 2
+        print("✅ Missing DAGs are not cached")
+
+    asyncio.run(run())
+
+
+def test_invalidation():
+    async def run():
+        redis = FakeAsyncRedis()
+        writer, reader = DagCache(redis), DagCache(redis)  # Two workers sharing one Redis
+        old, new = CountingLoader(b"old"), CountingLoader(b"new")
+        listing = CountingLoader(b"[old]")
+        assert await reader.get_dag(1, old) == b"old"
+        assert await reader.get_list({"limit": 50}, listing) == b"[old]"
+
+        await writer.invalidate_dag(1)
+        reader.local.clear()  # Stands in for CACHE_LOCAL_TTL_SECONDS elapsing
+        assert await reader.get_dag(1, new) == b"new"
+        assert await reader.get_list({"limit": 50}, CountingLoader(b"[new]")) == b"[new]"
+        assert await writer.get_dag(1, old) == b"new"  # Served from Redis under the new generation
+        assert old.calls == 1 and new.calls == 1
+
+        await writer.invalidate_lists()
+        assert await writer.get_dag(1, old) == b"new"  # A new DAG doesn't touch cached definitions
+        print("✅ Writes invalidate the DAG and every list page across workers")
+
+    asyncio.run(run())
+
+
+def test_single_flight():
+    async def run():
+        cache = DagCache(FakeAsyncRedis())
+        load = CountingLoader(delay=0.05)
+        results = await asyncio.gather(*(cache.get_dag(1, load) for _ in range(50)))
+        assert results == [load.body] * 50
+        assert load.calls == 1
+        print("✅ 50 concurrent misses in one worker cost one load")
+
+    asyncio.run(run())
+
+
+def test_single_flight_across_workers():
+    async def run():
+        redis = FakeAsyncRedis()
+        workers = [DagCache(redis) for _ in range(4)]
+        load = CountingLoader(delay=0.1)
+        results = await asyncio.gather(*(worker.get_dag(1, load) for worker in workers for _ in range(10)))
+        assert results == [load.body] * 40
+        assert load.calls == 1
+        print("✅ Concurrent misses in 4 workers cost one load")
+
+    asyncio.run(run())
+
+
+def test_redis_unavailable():
+    async def run():
+        # Nothing listens on port 1: every Redis call fails and the cache reads through
+        cache = DagCache(Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.2))
+        load = CountingLoader()
+        assert await cache.get_dag(1, load) == load.body
+        await cache.invalidate_dag(1)
+        assert await cache.get_dag(1, load) == load.body
+        assert load.calls == 2
+        await cache.close()
+        print("✅ Unreachable Redis falls back to the loader")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    print("🧪 Testing the DAG cache...")
+    test_read_through()
+    test_missing_dag_not_cached()
+    test_invalidation()
+    test_single_flight()
+    test_single_flight_across_workers()
+    test_redis_unavailable()
+    print("✅ All DAG cache tests passed!")
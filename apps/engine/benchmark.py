@@ -0,0 +1,305 @@
+# apps/engine/benchmark.py
+"""Throughput benchmarks for DAG execution.
+
+Each case builds a synthetic CSV source of `rows` x `cols`, runs it through
+`run_dag` as source -> generator -> evaluator -> exporter, and records total
+time, rows/s, peak RSS and the per-node metrics run_dag returns. Cases run in
+their own subprocess so peak RSS is not inherited from earlier, larger cases.
+
+    python benchmark.py --preset quick --output bench.json
+    python benchmark.py --preset full --save-baseline benchmarks
+    python benchmark.py --preset full --baseline benchmarks
+
+With --baseline the exit code is 1 when any case's total or node time is
+more than --tolerance and --min-slowdown slower than the stored run, so it
+can gate a deploy. Timings only compare on like hardware, so baselines are
+kept per machine class (OS, architecture, CPU count, memory): given a
+directory (any path not ending in .json), --baseline and --save-baseline use
+`<preset>-<machine class>.json` in it, and benchmarks/ holds the committed
+ones (`make engine-bench` and `make engine-bench-full` in apps/ check them).
+A baseline recorded on a different machine class or Python/numpy/pandas
+version is refused with exit code 2 unless --allow-environment-mismatch is
+given; either way the report records both environments, host included.
+Record a baseline with --save-baseline on each machine class that runs the
+check, and again after intentional performance changes.
+
+Cases above --max-cells (rows x cols) are skipped; the default scales with
+the machine's memory, so large machines run the whole full preset. Each
+case runs --repeat times and keeps its fastest run.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Dict, Any, Optional
+
+import numpy as np # Import numpy for synthetic inputs
+import pandas as pd # Import pandas
+
+PRESETS = {
+    "quick": {"rows": [10_000], "cols": [10, 100]},
+    "full": {"rows": [10_000, 1_000_000, 10_000_000], "cols": [10, 100, 1_000]},
+}
+DEFAULT_MAX_CELLS = 50_000_000 # --max-cells when physical memory can't be read
+BYTES_PER_CELL = 150 # Peak RSS per source cell across a case's nodes; sizes the memory-based --max-cells
+DEFAULT_TOLERANCE = 0.2 # Allowed slowdown against the baseline before a case counts as a regression
+DEFAULT_MIN_SLOWDOWN = 0.05 # Seconds; smaller slowdowns are timer noise on short stages, whatever their ratio
+DEFAULT_REPEAT = 3
+SEED = 1234
+# Environment fields a baseline must share with the run it is compared to
+MATCHED_ENVIRONMENT = ("machine_class", "python", "numpy", "pandas")
+
+
+def make_source_frame(rows: int, cols: int, seed: int = SEED) -> pd.DataFrame:
+    """Deterministic mixed-type input: 80% float, 10% integer and 10% categorical columns."""
+    rng = np.random.default_rng(seed)
+    n_categorical = cols // 10
+    n_integer = cols // 10
+    n_float = cols - n_categorical - n_integer
+    data: Dict[str, Any] = {}
+    for i in range(n_float):
+        data[f"f{i}"] = rng.normal(rng.uniform(-100, 100), rng.uniform(1, 10), rows)
+    for i in range(n_integer):
+        data[f"i{i}"] = rng.integers(0, 1000, rows)
+    for i in range(n_categorical):
+        data[f"c{i}"] = rng.choice(np.array([f"cat_{k}" for k in range(20)]), rows)
+    return pd.DataFrame(data)
+
+
+def make_dag(csv_path: str, export_path: str, rows: int, generator: str, metrics: Optional[List[str]]) -> Dict[str, Any]:
+    def node(node_id: str, node_type: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        return {"id": node_id, "type": node_type, "position": {"x": 0, "y": 0},
+                "data": {"label": node_id, "config": config}}
+
+    return {
+        "name": f"benchmark-{rows}",
+        "nodes": [
+            node("source", "source", {"type": "csv", "connection": {"path": csv_path}, "options": {}}),
+            node("generator", "generator", {"type": generator, "parameters": {"num_samples": rows}}),
+            node("evaluator", "evaluator", {"metrics": metrics}),
+            node("exporter", "exporter", {"type": "csv", "destination": {"path": export_path}}),
+        ],
+        "edges": [
+            {"id": "e1", "source": "source", "target": "generator"},
+            {"id": "e2", "source": "generator", "target": "evaluator"},
+            {"id": "e3", "source": "generator", "target": "exporter"},
+        ],
+    }
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(rows: int, cols: int, generator: str, metrics: Optional[List[str]]) -> Dict[str, Any]:
+    """Run one case in this process and return its measurements."""
+    import main # Imported here so FastAPI and the models load inside the case's own process
+
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = os.path.join(workdir, "source.csv")
+        make_source_frame(rows, cols).to_csv(csv_path, index=False)
+        dag = main.SyntheticDataDAG.model_validate(
+            make_dag(csv_path, os.path.join(workdir, "out", "export.csv"), rows, generator, metrics)
+        )
+        rss_before = peak_rss_mb()
+        start = time.perf_counter()
+        # The engine logs every node's config and results; keep them out of the JSON output
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = asyncio.run(main.run_dag(dag))
+        total = time.perf_counter() - start
+
+    errors = {node_id: value["error"] for node_id, value in result["data_store"].items()
+              if isinstance(value, dict) and "error" in value}
+    return {
+        "rows": rows,
+        "cols": cols,
+        "generator": generator,
+        "total_seconds": round(total, 4),
+        "rows_per_second": round(rows / total, 1) if total > 0 else None,
+        # run_dag's own per-node instrumentation (node ids double as names here)
+        "nodes": {node_id: {
+            "seconds": round(metrics["duration_seconds"], 4),
+            "cpu_seconds": round(metrics["cpu_seconds"], 4),
+            "rows_per_second": round(rows / metrics["duration_seconds"], 1) if metrics["duration_seconds"] > 0 else None,
+            "output_size_bytes": metrics["output_size_bytes"],
+            "peak_memory_delta_mb": round(metrics["peak_memory_delta_bytes"] / (1024 * 1024), 1),
+        } for node_id, metrics in result["node_metrics"].items()},
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "peak_rss_before_run_mb": round(rss_before, 1),
+        "errors": errors,
+    }
+
+
+def run_case_subprocess(rows: int, cols: int, generator: str, metrics: Optional[List[str]]) -> Dict[str, Any]:
+    command = [sys.executable, os.path.abspath(__file__), "--case", str(rows), str(cols), "--generator", generator]
+    if metrics is not None:
+        command += ["--metrics", ",".join(metrics)]
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if completed.returncode != 0:
+        return {"rows": rows, "cols": cols, "generator": generator, "status": "error",
+                "error": completed.stderr.strip().splitlines()[-1:] or ["unknown error"]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare_to_baseline(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float,
+    min_slowdown: float = DEFAULT_MIN_SLOWDOWN,
+) -> List[Dict[str, Any]]:
+    """Regressions where a case's total or per-node time grew by more than `tolerance` and `min_slowdown` seconds."""
+    def key(case: Dict[str, Any]):
+        return case["rows"], case["cols"], case.get("generator")
+
+    stored = {key(case): case for case in baseline.get("cases", []) if "total_seconds" in case}
+    regressions = []
+    for case in results["cases"]:
+        previous = stored.get(key(case))
+        if previous is None or "total_seconds" not in case:
+            continue
+        timings = [("total", case["total_seconds"], previous["total_seconds"])]
+        timings += [(name, node["seconds"], previous["nodes"][name]["seconds"])
+                    for name, node in case["nodes"].items() if name in previous.get("nodes", {})]
+        for name, current, before in timings:
+            if before > 0 and current > before * (1 + tolerance) and current - before > min_slowdown:
+                regressions.append({"rows": case["rows"], "cols": case["cols"], "stage": name,
+                                    "seconds": current, "baseline_seconds": before,
+                                    "slowdown": round(current / before - 1, 3)})
+    return regressions
+
+
+def physical_memory_bytes() -> Optional[int]:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def default_max_cells() -> int:
+    memory = physical_memory_bytes()
+    return memory // BYTES_PER_CELL if memory else DEFAULT_MAX_CELLS
+
+
+def environment() -> Dict[str, Any]:
+    memory = physical_memory_bytes()
+    memory_gb = round(memory / 2**30) if memory else None
+    return {
+        "host": platform.node(),
+        "machine_class": f"{platform.system().lower()}-{platform.machine()}-{os.cpu_count()}cpu-{memory_gb}gb",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "memory_gb": memory_gb,
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def environment_mismatch(current: Dict[str, Any], stored: Dict[str, Any]) -> Dict[str, Any]:
+    """MATCHED_ENVIRONMENT fields that differ between this run and a baseline."""
+    return {field: {"baseline": stored.get(field), "current": current.get(field)}
+            for field in MATCHED_ENVIRONMENT if stored.get(field) != current.get(field)}
+
+
+def baseline_path(path: str, preset: str, env: Dict[str, Any]) -> str:
+    # A directory (any path not naming a .json file) holds one baseline per preset and machine class
+    if os.path.isdir(path) or not path.endswith(".json"):
+        return os.path.join(path, f"{preset}-{env['machine_class']}.json")
+    return path
+
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark engine DAG execution throughput")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--rows", help="Comma-separated row counts (overrides the preset)")
+    parser.add_argument("--cols", help="Comma-separated column counts (overrides the preset)")
+    parser.add_argument("--generator", default="gaussian", choices=["gaussian", "uniform", "empirical"])
+    parser.add_argument("--metrics", help="Comma-separated evaluator metrics (default: the evaluator's defaults)")
+    parser.add_argument("--max-cells", type=int, default=None,
+                        help="Skip cases above rows x cols (default: physical memory / BYTES_PER_CELL)")
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+    parser.add_argument("--baseline", help="Compare against this stored report (or this machine class's in a directory)")
+    parser.add_argument("--save-baseline", help="Store this run as the baseline at this path (or in this directory)")
+    parser.add_argument("--allow-environment-mismatch", action="store_true",
+                        help="Compare against a baseline from a different machine class or library versions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--min-slowdown", type=float, default=DEFAULT_MIN_SLOWDOWN)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Runs per case; the fastest is reported")
+    parser.add_argument("--case", nargs=2, type=int, metavar=("ROWS", "COLS"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    metrics = args.metrics.split(",") if args.metrics else None
+
+    if args.case:
+        # Child process: run a single case and print its JSON as the last line
+        print(json.dumps(run_case(args.case[0], args.case[1], args.generator, metrics)))
+        return 0
+
+    rows_list = [int(value) for value in args.rows.split(",")] if args.rows else PRESETS[args.preset]["rows"]
+    cols_list = [int(value) for value in args.cols.split(",")] if args.cols else PRESETS[args.preset]["cols"]
+    max_cells = args.max_cells if args.max_cells is not None else default_max_cells()
+    env = environment()
+    baseline = None
+    if args.baseline:
+        path = baseline_path(args.baseline, args.preset, env)
+        if not os.path.exists(path):
+            print(f"No baseline at {path}; record one for this machine class with --save-baseline", file=sys.stderr)
+            return 2
+        with open(path) as f:
+            baseline = json.load(f)
+    cases = []
+    for rows in rows_list:
+        for cols in cols_list:
+            if rows * cols > max_cells:
+                cases.append({"rows": rows, "cols": cols, "generator": args.generator, "status": "skipped",
+                              "reason": f"rows x cols exceeds --max-cells={max_cells}"})
+                continue
+            print(f"Running {rows} rows x {cols} columns...", file=sys.stderr)
+            runs = [run_case_subprocess(rows, cols, args.generator, metrics) for _ in range(max(args.repeat, 1))]
+            timed = [run for run in runs if "total_seconds" in run]
+            cases.append(min(timed, key=lambda run: run["total_seconds"]) if timed else runs[0])
+
+    results: Dict[str, Any] = {"environment": env, "cases": cases}
+    exit_code = 0
+    if baseline is not None:
+        mismatch = environment_mismatch(env, baseline.get("environment", {}))
+        timed = {(case["rows"], case["cols"]) for case in cases if "total_seconds" in case}
+        results["baseline"] = {
+            "path": path,
+            "environment": baseline.get("environment", {}),
+            "environment_mismatch": mismatch,
+            "tolerance": args.tolerance,
+            "min_slowdown": args.min_slowdown,
+            # Cases the baseline timed that this run didn't, e.g. skipped by --max-cells
+            "not_compared": [{"rows": case["rows"], "cols": case["cols"]} for case in baseline.get("cases", [])
+                             if "total_seconds" in case and (case["rows"], case["cols"]) not in timed],
+        }
+        if mismatch and not args.allow_environment_mismatch:
+            print(f"Baseline {path} comes from a different environment: {json.dumps(mismatch)}", file=sys.stderr)
+            exit_code = 2
+        else:
+            regressions = compare_to_baseline(results, baseline, args.tolerance, args.min_slowdown)
+            results["baseline"]["regressions"] = regressions
+            exit_code = 1 if regressions else 0
+
+    report = json.dumps(results, indent=2)
+    print(report)
+    saved = args.save_baseline and baseline_path(args.save_baseline, args.preset, env)
+    for path in filter(None, [args.output, saved]):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(report)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
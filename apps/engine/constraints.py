@@ -0,0 +1,284 @@
+import ast
+import operator
+import numpy as np # Import numpy for vectorised constraint enforcement
+import pandas as pd # Import pandas
+from typing import List, Dict, Any, Optional, Callable
+
+# Post-generation enforcement of GeneratorNodeConfig.constraints.
+#
+# Every step works on whole columns. Rejection resampling redraws all failing
+# rows of a round in one batch (oversampled by the observed acceptance rate),
+# so the number of Python-level iterations is bounded by `max_rounds`, never by
+# the number of rows.
+
+# Draws `n` fresh rows from the fitted generator model
+RowSampler = Callable[[int], pd.DataFrame]
+
+
+def _target_pearson(correlation_type: Optional[str], value: float) -> float:
+    # Iman-Conover induces a Pearson correlation on normal scores; convert the
+    # requested rank correlation to the matching normal-score correlation.
+    if correlation_type == 'spearman':
+        value = 2.0 * np.sin(np.pi * value / 6.0)
+    elif correlation_type == 'kendall':
+        value = np.sin(np.pi * value / 2.0)
+    return float(np.clip(value, -0.999999, 0.999999))
+
+
+_RULE_COMPARISONS = {ast.Eq: operator.eq, ast.NotEq: operator.ne, ast.Lt: operator.lt,
+                     ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge}
+_RULE_ARITHMETIC = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+                    ast.Div: operator.truediv, ast.Mod: operator.mod}
+
+
+def compile_rule(rule: str, columns: List[str]) -> Callable[[pd.DataFrame], np.ndarray]:
+    """Compile a custom_rule into a vectorised row mask; ValueError if it isn't in the rule grammar.
+
+    The grammar is comparisons (`==`, `!=`, `<`, `<=`, `>`, `>=`, chained or
+    not) between column names, numbers, strings and `+ - * / %` arithmetic,
+    combined with `and`/`or`/`not` (or `&`/`|`/`~`). Anything else (calls,
+    attributes, subscripts, ...) is rejected before the rule touches data, so
+    user-supplied rules never reach an evaluator.
+    """
+    try:
+        tree = ast.parse(rule, mode='eval').body
+    except SyntaxError as e:
+        raise ValueError(f"cannot parse rule: {e.msg}") from e
+
+    def value(node: ast.AST) -> Callable[[pd.DataFrame], Any]:
+        if isinstance(node, ast.Name):
+            if node.id not in columns:
+                raise ValueError(f"unknown column {node.id!r}")
+            return lambda frame: frame[node.id].to_numpy()
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str)):
+            return lambda frame: node.value
+        if isinstance(node, ast.BinOp) and type(node.op) in _RULE_ARITHMETIC:
+            op, left, right = _RULE_ARITHMETIC[type(node.op)], value(node.left), value(node.right)
+            return lambda frame: op(left(frame), right(frame))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            operand = value(node.operand)
+            return lambda frame: -operand(frame)
+        raise ValueError(f"unsupported expression {ast.dump(node)[:60]}")
+
+    def mask(node: ast.AST) -> Callable[[pd.DataFrame], np.ndarray]:
+        if isinstance(node, ast.Compare) and all(type(op) in _RULE_COMPARISONS for op in node.ops):
+            operands = [value(operand) for operand in [node.left, *node.comparators]]
+            ops = [_RULE_COMPARISONS[type(op)] for op in node.ops]
+
+            def compare(frame: pd.DataFrame) -> np.ndarray:
+                values = [operand(frame) for operand in operands]
+                result = np.ones(len(frame), dtype=bool)
+                for op, left, right in zip(ops, values, values[1:]):
+                    result &= np.asarray(op(left, right), dtype=bool)
+                return result
+            return compare
+        if isinstance(node, ast.BoolOp):
+            parts = [mask(part) for part in node.values]
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return lambda frame: combine.reduce([part(frame) for part in parts])
+        if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.BitAnd, ast.BitOr)):
+            left, right = mask(node.left), mask(node.right)
+            combine = np.logical_and if isinstance(node.op, ast.BitAnd) else np.logical_or
+            return lambda frame: combine(left(frame), right(frame))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.Invert)):
+            operand = mask(node.operand)
+            return lambda frame: ~operand(frame)
+        raise ValueError("rule must be a comparison or a boolean combination of comparisons")
+
+    return mask(tree)
+
+
+def _ranks(values: np.ndarray) -> np.ndarray:
+    ranks = np.empty(values.size, dtype=np.int64)
+    ranks[np.argsort(values, kind='stable')] = np.arange(values.size)
+    return ranks
+
+
+def impose_correlation(
+    x: np.ndarray,
+    y: np.ndarray,
+    target: float,
+    rng: np.random.Generator,
+    correlation_type: Optional[str] = 'pearson',
+) -> np.ndarray:
+    """Reorder `y` so its rank correlation with `x` matches `target` (Iman-Conover).
+
+    `x` is left untouched and `y` keeps exactly the same marginal values; only
+    their pairing changes.
+    """
+    n = x.size
+    if n < 2:
+        return y
+    r = _target_pearson(correlation_type, target)
+    # Normal scores that follow x's ordering, then correlated scores for y
+    scores_x = np.sort(rng.standard_normal(n))[_ranks(x)]
+    scores_y = r * scores_x + np.sqrt(1.0 - r * r) * rng.standard_normal(n)
+    return np.sort(y)[_ranks(scores_y)]
+
+
+def _rejection_fill(
+    df: pd.DataFrame,
+    failing: np.ndarray,
+    accept: Callable[[pd.DataFrame], np.ndarray],
+    sample_rows: RowSampler,
+    columns: List[str],
+    max_rounds: int,
+) -> np.ndarray:
+    """Replace failing rows with accepted fresh draws, batch by batch.
+
+    Returns the row positions that are still failing after `max_rounds`.
+    """
+    remaining = np.flatnonzero(failing)
+    acceptance = 0.5
+    for _ in range(max_rounds):
+        if remaining.size == 0:
+            break
+        batch_size = int(np.ceil(remaining.size / max(acceptance, 0.05) * 1.2)) + 16
+        candidates = sample_rows(batch_size)
+        ok = accept(candidates)
+        acceptance = max(float(ok.mean()), 1e-3)
+        accepted = candidates.loc[ok, columns]
+        take = min(len(accepted), remaining.size)
+        if take:
+            targets = remaining[:take]
+            for col in columns:
+                values = df[col].to_numpy(copy=True)
+                new_values = accepted[col].to_numpy()[:take]
+                if values.dtype != new_values.dtype:
+                    values = values.astype(np.result_type(values.dtype, new_values.dtype))
+                values[targets] = new_values
+                df[col] = values
+            remaining = remaining[take:]
+    return remaining
+
+
+def apply_constraints(
+    df: pd.DataFrame,
+    constraints: Optional[List[Any]],
+    rng: np.random.Generator,
+    sample_rows: Optional[RowSampler] = None,
+    max_rounds: int = 10,
+) -> Dict[str, Any]:
+    """Enforce `Constraint` specs on a generated frame in place and return a report.
+
+    Order: distribution reshaping, ranges, correlations, then custom row rules.
+    Correlation reordering keeps each column's values, so ranges stay satisfied;
+    rows replaced for a custom rule are fresh draws that must pass the rule and
+    every range, so they only dilute reshaped distributions and correlations by
+    the fraction of rows replaced.
+    """
+    report: Dict[str, Any] = {}
+    range_checks: List[Callable[[pd.DataFrame], np.ndarray]] = []
+    by_type: Dict[str, List[Any]] = {}
+    for constraint in constraints or []:
+        by_type.setdefault(constraint.type, []).append(constraint)
+
+    def note(constraint: Any, **details: Any) -> None:
+        report.setdefault(f"{constraint.type}:{constraint.column}", {}).update(details)
+
+    for constraint in by_type.get('distribution', []):
+        params = constraint.params
+        if constraint.column not in df.columns:
+            note(constraint, status="skipped", reason="column not found")
+            continue
+        values = pd.to_numeric(df[constraint.column], errors='coerce').to_numpy(dtype=np.float64)
+        present = ~np.isnan(values)
+        n = int(present.sum())
+        if params.distribution == 'normal' and params.mean is not None and params.std is not None:
+            target = rng.normal(params.mean, params.std, n)
+        elif params.distribution == 'uniform' and params.min is not None and params.max is not None:
+            target = rng.uniform(params.min, params.max, n)
+        elif params.distribution == 'exponential' and params.mean is not None:
+            if params.mean <= (params.min or 0.0):
+                note(constraint, status="skipped", reason="exponential mean must be greater than min")
+                continue
+            target = (params.min or 0.0) + rng.exponential(params.mean - (params.min or 0.0), n)
+        else:
+            note(constraint, status="skipped", reason="unsupported or incomplete distribution parameters")
+            continue
+        # Rank-preserving quantile mapping: the k-th smallest value becomes the
+        # k-th smallest draw from the target distribution.
+        values[present] = np.sort(target)[_ranks(values[present])]
+        df[constraint.column] = values
+        note(constraint, status="applied", distribution=params.distribution)
+
+    for constraint in by_type.get('range', []):
+        params = constraint.params
+        column = constraint.column
+        if column not in df.columns:
+            note(constraint, status="skipped", reason="column not found")
+            continue
+        low = params.min if params.min is not None else -np.inf
+        high = params.max if params.max is not None else np.inf
+
+        def in_range(frame: pd.DataFrame, column=column, low=low, high=high) -> np.ndarray:
+            values = pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=np.float64)
+            return np.isnan(values) | ((values >= low) & (values <= high))
+
+        range_checks.append(in_range)
+        failing = ~in_range(df)
+        violations = int(failing.sum())
+        resampled = 0
+        if violations and sample_rows is not None and params.enforcement != 'clip':
+            remaining = _rejection_fill(df, failing, in_range, sample_rows, [column], max_rounds)
+            resampled = violations - remaining.size
+        if not in_range(df).all():
+            df[column] = pd.to_numeric(df[column], errors='coerce').clip(lower=params.min, upper=params.max)
+        note(constraint, status="applied", violations=violations, resampled=resampled,
+             clipped=violations - resampled)
+
+    for constraint in by_type.get('correlation', []):
+        params = constraint.params
+        other = params.correlated_with
+        if params.correlation_value is None or other is None:
+            note(constraint, status="skipped", reason="correlated_with and correlation_value are required")
+            continue
+        if constraint.column not in df.columns or other not in df.columns:
+            note(constraint, status="skipped", reason="column not found")
+            continue
+        x = pd.to_numeric(df[other], errors='coerce').to_numpy(dtype=np.float64)
+        y = pd.to_numeric(df[constraint.column], errors='coerce').to_numpy(dtype=np.float64)
+        both = ~np.isnan(x) & ~np.isnan(y)
+        if both.sum() < 2:
+            note(constraint, status="skipped", reason="columns are not numeric")
+            continue
+        y[both] = impose_correlation(x[both], y[both], params.correlation_value, rng, params.correlation_type)
+        df[constraint.column] = y.astype(df[constraint.column].dtype) if df[constraint.column].dtype.kind in 'iu' else y
+        note(constraint, status="applied", correlated_with=other,
+             correlation_type=params.correlation_type or 'pearson', target=params.correlation_value)
+
+    for constraint in by_type.get('custom', []):
+        rule = constraint.params.custom_rule
+        if not rule:
+            note(constraint, status="skipped", reason="custom_rule is empty")
+            continue
+
+        try:
+            satisfies = compile_rule(rule, list(df.columns))
+            failing = ~satisfies(df)
+        except (ValueError, TypeError) as e:
+            # Not in the rule grammar, or operands that don't compare (e.g. a number against text)
+            note(constraint, status="skipped", reason=f"invalid rule: {e}")
+            continue
+
+        def acceptable(frame: pd.DataFrame, satisfies=satisfies) -> np.ndarray:
+            # Replacement rows must also respect every range constraint
+            ok = satisfies(frame)
+            for check in range_checks:
+                ok &= check(frame)
+            return ok
+
+        violations = int(failing.sum())
+        dropped = 0
+        if violations:
+            remaining = failing.nonzero()[0]
+            if sample_rows is not None:
+                remaining = _rejection_fill(df, failing, acceptable, sample_rows, list(df.columns), max_rounds)
+            if remaining.size:
+                # Rows that still break the rule after the batched rounds are removed
+                df.drop(index=df.index[remaining], inplace=True)
+                df.reset_index(drop=True, inplace=True)
+                dropped = int(remaining.size)
+        note(constraint, status="applied", rule=rule, violations=violations, dropped=dropped)
+
+    return report
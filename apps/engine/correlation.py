@@ -0,0 +1,241 @@
+import tempfile
+import numpy as np # Import numpy for blocked correlation matrices
+import pandas as pd # Import pandas
+from typing import List, Dict, Any, Optional, Callable, Iterable
+
+# Correlation matrices for wide tables.
+#
+# Pearson and Spearman stream row blocks through matrix products, so besides
+# the input only one block and a few p x p accumulators are held. Blocks are
+# sized by cells rather than rows, so a wide table gets proportionally shorter
+# blocks. Spearman ranks one column at a time into a float32 matrix that is
+# spilled to a temporary file when it exceeds the cell budget. Kendall's tau-b
+# is computed per column pair with an O(n log n) inversion count.
+
+CORRELATION_METHODS = ('pearson', 'spearman', 'kendall')
+CELL_BUDGET = 1 << 22 # Cells (rows x columns) per matrix-product block: 32 MB as float64
+
+# Returns a fresh iterator over float64 row blocks on each call
+RowBlocks = Callable[[], Iterable[np.ndarray]]
+
+
+def _block_rows(p: int, cell_budget: int) -> int:
+    return max(1, cell_budget // max(p, 1))
+
+
+def _frame_blocks(df: pd.DataFrame, columns: List[str], cell_budget: int) -> RowBlocks:
+    # Only one block of the frame's columns is materialised as float64 at a time, always as a copy
+    rows = _block_rows(len(columns), cell_budget)
+    return lambda: (df.iloc[start:start + rows][columns].to_numpy(dtype=np.float64, copy=True)
+                    for start in range(0, len(df), rows))
+
+
+def _array_blocks(values: np.ndarray, cell_budget: int) -> RowBlocks:
+    rows = _block_rows(values.shape[1], cell_budget)
+    return lambda: (values[start:start + rows].astype(np.float64)
+                    for start in range(0, values.shape[0], rows))
+
+
+def _pearson(blocks: RowBlocks, n: int, p: int, has_nulls: bool) -> np.ndarray:
+    """Pearson correlation matrix from row blocks, pairwise-complete when there are nulls."""
+    if n == 0:
+        return np.full((p, p), np.nan)
+    shift = None
+    xx = np.zeros((p, p))
+    counts = np.zeros((p, p))
+    sx = np.zeros((p, p)) if has_nulls else np.zeros(p)
+    sxx = np.zeros((p, p))
+    for block in blocks():
+        if shift is None:
+            # Shifting by a rough centre keeps the sums of squares well conditioned
+            shift = np.nan_to_num(np.nanmean(block, axis=0)) if has_nulls else block.mean(axis=0)
+        if not has_nulls:
+            centred = block - shift
+            xx += centred.T @ centred
+            sx += centred.sum(axis=0)
+            continue
+        # Per pair (i, j), sums over the rows where both columns are present.
+        # The block is a fresh copy, so it is centred in place
+        present = (~np.isnan(block)).astype(np.float64)
+        centred = np.nan_to_num(np.subtract(block, shift, out=block), copy=False)
+        counts += present.T @ present
+        sx += centred.T @ present
+        xx += centred.T @ centred
+        sxx += np.multiply(centred, centred, out=centred).T @ present
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if not has_nulls:
+            cov = xx - np.outer(sx, sx) / n
+            var = np.diag(cov).copy()
+            corr = cov / np.sqrt(np.outer(var, var))
+        else:
+            cov = xx - sx * sx.T / counts
+            var_i = sxx - sx * sx / counts
+            corr = cov / np.sqrt(var_i * var_i.T)
+    np.fill_diagonal(corr, 1.0)
+    return np.clip(corr, -1.0, 1.0)
+
+
+def _average_ranks(values: np.ndarray) -> np.ndarray:
+    """Average (tie-aware) ranks of one column; NaNs stay NaN."""
+    ranks = np.full(values.size, np.nan)
+    present = np.flatnonzero(~np.isnan(values))
+    if present.size == 0:
+        return ranks
+    order = present[np.argsort(values[present], kind='stable')]
+    sorted_values = values[order]
+    run_starts = np.flatnonzero(np.r_[True, sorted_values[1:] != sorted_values[:-1]])
+    run_lengths = np.diff(np.r_[run_starts, sorted_values.size])
+    # 1-based average of the positions each run of ties occupies
+    ranks[order] = np.repeat(run_starts + (run_lengths + 1) / 2.0, run_lengths)
+    return ranks
+
+
+def _dense_codes(values: np.ndarray) -> np.ndarray:
+    """0-based dense ranks (ties share a code)."""
+    return np.unique(values, return_inverse=True)[1].astype(np.int64)
+
+
+def _count_inversions(codes: np.ndarray, group_starts: Optional[np.ndarray] = None) -> int:
+    """Pairs i < j in the same contiguous group with codes[i] > codes[j].
+
+    Works bit by bit from the most significant: within each group, a pair
+    first differing at bit b is an inversion when the earlier element has the
+    bit set. Each level stably partitions the groups by that bit with
+    cumulative sums, so the whole count is O(n log n) vectorised work.
+    """
+    n = codes.size
+    if n < 2:
+        return 0
+    y = codes.copy()
+    starts = np.zeros(n, dtype=bool)
+    starts[0] = True
+    if group_starts is not None:
+        starts |= group_starts
+    positions = np.arange(n)
+    inversions = 0
+    for b in range(int(y.max()).bit_length() - 1, -1, -1):
+        bit = (y >> b) & 1
+        group = np.cumsum(starts) - 1
+        first = np.flatnonzero(starts)
+        size = np.diff(np.r_[first, n])
+        ones_before_all = np.cumsum(bit) - bit
+        ones_before = ones_before_all - ones_before_all[first][group]
+        inversions += int(ones_before[bit == 0].sum())
+        # Stable partition: zeros keep their order at the front of the group, ones follow
+        group_ones = np.add.reduceat(bit, first)
+        zeros = size - group_ones
+        zeros_before = positions - first[group] - ones_before
+        new_positions = first[group] + np.where(bit == 0, zeros_before, zeros[group] + ones_before)
+        y[new_positions] = y.copy()
+        split = first + zeros
+        starts[split[(zeros > 0) & (zeros < size)]] = True
+    return inversions
+
+
+def _tied_pairs(codes: np.ndarray) -> int:
+    counts = np.bincount(codes)
+    return int((counts * (counts - 1) // 2).sum())
+
+
+class _KendallColumn:
+    """Per-column state reused for every pair the column takes part in."""
+
+    def __init__(self, values: np.ndarray):
+        self.codes = _dense_codes(values)
+        self.order = np.argsort(self.codes, kind='stable')
+        ordered = self.codes[self.order]
+        self.groups = np.r_[False, ordered[1:] != ordered[:-1]]
+        self.ties = _tied_pairs(self.codes)
+
+
+def _kendall_from_columns(x: _KendallColumn, y: _KendallColumn) -> float:
+    n = x.codes.size
+    if n < 2:
+        return float('nan')
+    y_by_x = y.codes[x.order]
+    # Knight's method: inversions between different x values only, i.e. all
+    # inversions of y in x order minus those inside runs of tied x
+    discordant = _count_inversions(y_by_x) - _count_inversions(y_by_x, x.groups)
+    pairs = n * (n - 1) // 2
+    joint_counts = pd.Series(x.codes * (int(y.codes.max()) + 1) + y.codes).value_counts().to_numpy()
+    joint_ties = int((joint_counts * (joint_counts - 1) // 2).sum())
+    denominator = np.sqrt(float(pairs - x.ties) * float(pairs - y.ties))
+    if denominator == 0:
+        return float('nan')
+    return float((pairs - x.ties - y.ties + joint_ties - 2 * discordant) / denominator)
+
+
+def kendall_tau_b(x: np.ndarray, y: np.ndarray) -> float:
+    """Kendall's tau-b in O(n log n); rows where either value is NaN are dropped."""
+    both = ~np.isnan(x) & ~np.isnan(y)
+    return _kendall_from_columns(_KendallColumn(x[both]), _KendallColumn(y[both]))
+
+
+def _null_columns(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    # Column by column: df[columns].isna() would copy every selected column at once
+    return np.array([df[col].isna().any() for col in columns], dtype=bool)
+
+
+def correlation_matrix(
+    df: pd.DataFrame,
+    method: str = 'pearson',
+    sample_size: Optional[int] = None,
+    rng: Optional[np.random.Generator] = None,
+    cell_budget: int = CELL_BUDGET,
+) -> Dict[str, Any]:
+    """Correlation matrix over the numeric columns of `df`.
+
+    `sample_size` switches to an approximate mode on a uniform row sample.
+    Nulls are handled pairwise for Pearson and Kendall; Spearman ranks each
+    column once over its non-null values.
+    """
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"Unsupported correlation method: {method}")
+    columns = [col for col, dtype in df.dtypes.items()
+               if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)]
+    sampled = sample_size is not None and len(df) > sample_size
+    if sampled:
+        rng = rng if rng is not None else np.random.default_rng()
+        df = df.iloc[np.sort(rng.choice(len(df), size=sample_size, replace=False))]
+    n, p = len(df), len(columns)
+    null_columns = _null_columns(df, columns)
+
+    if method == 'pearson':
+        matrix = _pearson(_frame_blocks(df, columns, cell_budget), n, p, bool(null_columns.any()))
+    elif method == 'spearman':
+        # Rank each column once into a float32 matrix, then stream it through the Pearson kernel.
+        # Column-major, so each column's ranks are one contiguous write
+        with tempfile.TemporaryFile(prefix='ranks-') as spill:
+            if n * p <= cell_budget:
+                ranks = np.empty((n, p), dtype=np.float32, order='F')
+            else:
+                ranks = np.memmap(spill, dtype=np.float32, mode='w+', shape=(n, p), order='F')
+            for j, col in enumerate(columns):
+                ranks[:, j] = _average_ranks(df[col].to_numpy(dtype=np.float64))
+            matrix = _pearson(_array_blocks(ranks, cell_budget), n, p, bool(null_columns.any()))
+            del ranks
+    else:
+        matrix = np.eye(p)
+        complete = {j: _KendallColumn(df[col].to_numpy(dtype=np.float64))
+                    for j, col in enumerate(columns) if not null_columns[j]}
+        for i in range(p):
+            for j in range(i + 1, p):
+                if i in complete and j in complete:
+                    tau = _kendall_from_columns(complete[i], complete[j])
+                else:
+                    tau = kendall_tau_b(df[columns[i]].to_numpy(dtype=np.float64), df[columns[j]].to_numpy(dtype=np.float64))
+                matrix[i, j] = matrix[j, i] = tau
+
+    return {
+        "columns": columns,
+        "matrix": np.where(np.isnan(matrix), None, np.round(matrix, 6)).tolist(),
+        "rows": n,
+        "sampled": sampled,
+    }
+
+
+def pearson_matrix(df: pd.DataFrame, columns: List[str], cell_budget: int = CELL_BUDGET) -> np.ndarray:
+    """Pearson matrix of `columns` as an array, for callers that post-process it."""
+    has_nulls = bool(_null_columns(df, columns).any())
+    return _pearson(_frame_blocks(df, columns, cell_budget), len(df), len(columns), has_nulls)
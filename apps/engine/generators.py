@@ -0,0 +1,474 @@
+import hashlib
+import json
+import os
+import numpy as np # Import numpy for vectorised sampling
+import pandas as pd # Import pandas
+from typing import List, Dict, Any, Optional, Tuple, Literal
+
+# Sampling helpers shared by the generator nodes in main.py.
+# Everything here works on whole columns at once: no per-row Python loops.
+
+
+class AliasTable:
+    """Walker/Vose alias table for a discrete distribution.
+
+    Building the table is O(k) in the number of categories and every draw is
+    O(1), so sampling millions of values from a high-cardinality column costs
+    two random arrays and one gather.
+    """
+
+    def __init__(self, values: np.ndarray, weights: np.ndarray):
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.ndim != 1 or weights.size == 0:
+            raise ValueError("AliasTable needs at least one category")
+        total = weights.sum()
+        if not np.isfinite(total) or total <= 0:
+            raise ValueError("AliasTable weights must sum to a positive number")
+
+        self.values = np.asarray(values, dtype=object)
+        self.prob, self.alias = _build_alias(weights / total)
+
+    @classmethod
+    def from_series(cls, series: pd.Series) -> "AliasTable":
+        """Build a table from the observed frequencies of a column (nulls included)."""
+        try:
+            counts = series.value_counts(dropna=False, sort=False)
+        except TypeError:
+            # Unhashable cells (lists, dicts from JSON columns): count them by their JSON text,
+            # but sample the original objects back
+            keys = series.map(lambda value: json.dumps(value, sort_keys=True, default=str)
+                              if isinstance(value, (list, dict)) else value)
+            codes, _ = pd.factorize(keys, use_na_sentinel=False)
+            _, first = np.unique(codes, return_index=True)
+            return cls(series.to_numpy(dtype=object)[first], np.bincount(codes).astype(np.float64))
+        return cls(counts.index.to_numpy(dtype=object), counts.to_numpy(dtype=np.float64))
+
+    def sample_indices(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        slots = rng.integers(0, self.prob.size, size=n)
+        keep = rng.random(n) < self.prob[slots]
+        return np.where(keep, slots, self.alias[slots])
+
+    def sample(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        return self.values[self.sample_indices(n, rng)]
+
+
+def _build_alias(p: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Vose's construction, done in rounds instead of one pair at a time: every
+    # round hands out the deficits of all "small" slots to the "large" slots by
+    # walking the cumulative excess with searchsorted.
+    k = p.size
+    prob = p * k
+    alias = np.arange(k)
+    small = np.flatnonzero(prob < 1.0)
+    large = np.flatnonzero(prob >= 1.0)
+
+    while small.size and large.size:
+        deficit = 1.0 - prob[small]
+        excess = prob[large] - 1.0
+        # Small slot i is served by the large slot whose excess interval
+        # contains the start of i's deficit interval.
+        starts = np.concatenate(([0.0], np.cumsum(deficit)[:-1]))
+        owner = np.searchsorted(np.cumsum(excess), starts, side='right')
+        served = owner < large.size
+        if not served.any():
+            break
+
+        alias[small[served]] = large[owner[served]]
+        prob[large] -= np.bincount(owner[served], weights=deficit[served], minlength=large.size)
+
+        still_large = prob[large] >= 1.0
+        small = np.concatenate((small[~served], large[~still_large]))
+        large = large[still_large]
+
+    # Whatever is left over only differs from 1 by rounding error
+    prob[small] = 1.0
+    prob[large] = 1.0
+    return prob, alias
+
+
+def range_overrides_from_constraints(constraints: Optional[List[Any]]) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+    """Collect per-column (min, max) bounds from `range`/`distribution` constraints."""
+    overrides: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
+    for constraint in constraints or []:
+        if constraint.type not in ('range', 'distribution'):
+            continue
+        params = constraint.params
+        if params.min is None and params.max is None:
+            continue
+        current_min, current_max = overrides.get(constraint.column, (None, None))
+        overrides[constraint.column] = (
+            params.min if params.min is not None else current_min,
+            params.max if params.max is not None else current_max,
+        )
+    return overrides
+
+
+class GaussianModel:
+    """Independent normals for numeric columns, frequency tables for the rest."""
+
+    def __init__(self, columns: List[str], means: Dict[str, float], stds: Dict[str, float], categorical: Dict[str, AliasTable]):
+        self.columns = columns
+        self.means = means
+        self.stds = stds
+        self.categorical = categorical
+
+    @classmethod
+    def fit(cls, df_input: pd.DataFrame) -> "GaussianModel":
+        numerical_cols = df_input.select_dtypes(include=['number']).columns
+        means = df_input[numerical_cols].mean().to_dict()
+        stds = df_input[numerical_cols].std().to_dict()
+        # Handle potential NaN std deviations (e.g., single-value columns)
+        stds = {col: std if not pd.isna(std) else 0.0 for col, std in stds.items()}
+        other_cols = [col for col in df_input.columns if col not in numerical_cols]
+        categorical = {col: AliasTable.from_series(df_input[col]) for col in other_cols}
+        return cls(list(df_input.columns), means, stds, categorical)
+
+    def sample(self, num_samples: int, rng: np.random.Generator) -> pd.DataFrame:
+        numerical_cols = list(self.means)
+        # Generate all numerical columns in one vectorised call
+        draws = rng.normal([self.means[col] for col in numerical_cols], [self.stds[col] for col in numerical_cols],
+                           size=(num_samples, len(numerical_cols)))
+        columns: Dict[str, np.ndarray] = {col: draws[:, i] for i, col in enumerate(numerical_cols)}
+        # Non-numerical columns are sampled from their observed frequency tables
+        columns.update({col: table.sample(num_samples, rng) for col, table in self.categorical.items()})
+        # Ensure columns are in the same order as input
+        return pd.DataFrame(columns, columns=self.columns)
+
+
+class UniformModel:
+    """Uniform samples for numeric columns, frequency-table samples for the rest.
+
+    Bounds default to the observed min/max of each numeric column and can be
+    overridden per column (e.g. from `ConstraintParams.min/max`). All numeric
+    columns are drawn in a single `rng.uniform` call.
+    """
+
+    def __init__(self, columns: List[str], numerical_cols: List[str], lows: np.ndarray, highs: np.ndarray,
+                 is_integer: np.ndarray, categorical: Dict[str, AliasTable]):
+        self.columns = columns
+        self.numerical_cols = numerical_cols
+        self.lows = lows
+        self.highs = highs
+        self.is_integer = is_integer
+        self.categorical = categorical
+
+    @classmethod
+    def fit(
+        cls,
+        df_input: pd.DataFrame,
+        bounds_overrides: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+    ) -> "UniformModel":
+        bounds_overrides = bounds_overrides or {}
+        numerical_cols = list(df_input.select_dtypes(include=['number']).columns)
+        other_cols = [col for col in df_input.columns if col not in numerical_cols]
+
+        lows = df_input[numerical_cols].min().to_numpy(dtype=np.float64)
+        highs = df_input[numerical_cols].max().to_numpy(dtype=np.float64)
+        for i, col in enumerate(numerical_cols):
+            override_min, override_max = bounds_overrides.get(col, (None, None))
+            if override_min is not None:
+                lows[i] = override_min
+            if override_max is not None:
+                highs[i] = override_max
+        if np.any(lows > highs):
+            bad = [col for col, lo, hi in zip(numerical_cols, lows, highs) if lo > hi]
+            raise ValueError(f"Uniform bounds have min > max for columns: {bad}")
+
+        # Integer columns sample [low, high] inclusive by drawing on [low, high + 1) and flooring
+        is_integer = np.array([pd.api.types.is_integer_dtype(df_input[col]) for col in numerical_cols], dtype=bool)
+        lows = np.where(is_integer, np.ceil(lows), lows)
+        highs = np.where(is_integer, np.floor(highs) + 1.0, highs)
+        if np.any(lows >= highs):
+            # e.g. min=2.5, max=2.7 on an integer column: no integer lies in the range
+            bad = [col for col, lo, hi in zip(numerical_cols, lows, highs) if lo >= hi]
+            raise ValueError(f"Uniform bounds contain no integer for columns: {bad}")
+
+        categorical = {col: AliasTable.from_series(df_input[col]) for col in other_cols}
+        return cls(list(df_input.columns), numerical_cols, lows, highs, is_integer, categorical)
+
+    def sample(self, num_samples: int, rng: np.random.Generator) -> pd.DataFrame:
+        columns: Dict[str, np.ndarray] = {}
+        if self.numerical_cols:
+            draws = rng.uniform(self.lows, self.highs, size=(num_samples, len(self.numerical_cols)))
+            for i, col in enumerate(self.numerical_cols):
+                if self.is_integer[i]:
+                    columns[col] = np.minimum(np.floor(draws[:, i]), self.highs[i] - 1.0).astype(np.int64)
+                else:
+                    columns[col] = draws[:, i]
+        columns.update({col: table.sample(num_samples, rng) for col, table in self.categorical.items()})
+        # Ensure columns are in the same order as input
+        return pd.DataFrame(columns, columns=self.columns)
+
+
+# --- Empirical generator -----------------------------------------------------
+#
+# Each column is reduced to a compact model (a histogram, a KDE subsample, an
+# alias table or an epoch histogram). A fitted EmpiricalModel is a handful of
+# short arrays, so it can be saved as JSON and reloaded instead of keeping the
+# source data around.
+
+def _apply_nulls(values: np.ndarray, null_fraction: float, rng: np.random.Generator) -> np.ndarray:
+    if null_fraction <= 0:
+        return values
+    mask = rng.random(values.shape[0]) < null_fraction
+    if not mask.any():
+        return values
+    if values.dtype.kind in 'iub':
+        values = values.astype(np.float64)
+    values[mask] = np.nan if values.dtype.kind == 'f' else None
+    return values
+
+
+class HistogramColumnModel:
+    """Numeric column as bin edges plus counts; draws pick a bin, then a point inside it."""
+
+    kind = 'histogram'
+
+    def __init__(self, edges: np.ndarray, counts: np.ndarray, integer: bool = False, null_fraction: float = 0.0):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = np.asarray(counts, dtype=np.float64)
+        self.integer = integer
+        self.null_fraction = null_fraction
+        self._bins = AliasTable(np.arange(self.counts.size), self.counts)
+
+    @classmethod
+    def fit(cls, values: np.ndarray, n_bins: int, integer: bool, null_fraction: float) -> "HistogramColumnModel":
+        n_bins = max(1, min(n_bins, np.unique(values).size))
+        counts, edges = np.histogram(values, bins=n_bins)
+        return cls(edges, counts, integer, null_fraction)
+
+    def sample(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        bins = self._bins.sample_indices(n, rng)
+        values = rng.uniform(self.edges[bins], self.edges[bins + 1])
+        if self.integer:
+            values = np.rint(values).astype(np.int64)
+        return _apply_nulls(values, self.null_fraction, rng)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "edges": self.edges.tolist(), "counts": self.counts.tolist(),
+                "integer": self.integer, "null_fraction": self.null_fraction}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HistogramColumnModel":
+        return cls(data["edges"], data["counts"], data["integer"], data["null_fraction"])
+
+
+class KDEColumnModel:
+    """Numeric column as a Gaussian KDE over a bounded subsample of the observed points."""
+
+    kind = 'kde'
+
+    def __init__(self, points: np.ndarray, bandwidth: float, integer: bool = False, null_fraction: float = 0.0):
+        self.points = np.asarray(points, dtype=np.float64)
+        self.bandwidth = float(bandwidth)
+        self.integer = integer
+        self.null_fraction = null_fraction
+
+    @classmethod
+    def fit(cls, values: np.ndarray, max_points: int, integer: bool, null_fraction: float, rng: np.random.Generator) -> "KDEColumnModel":
+        # Silverman's rule of thumb on the full column, then keep at most max_points support points
+        std = values.std(ddof=1) if values.size > 1 else 0.0
+        bandwidth = 1.06 * std * values.size ** (-1 / 5) if std > 0 else 0.0
+        if values.size > max_points:
+            values = rng.choice(values, size=max_points, replace=False)
+        return cls(values, bandwidth, integer, null_fraction)
+
+    def sample(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        values = self.points[rng.integers(0, self.points.size, size=n)]
+        if self.bandwidth > 0:
+            values = values + rng.normal(0.0, self.bandwidth, size=n)
+        if self.integer:
+            values = np.rint(values).astype(np.int64)
+        return _apply_nulls(values, self.null_fraction, rng)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "points": self.points.tolist(), "bandwidth": self.bandwidth,
+                "integer": self.integer, "null_fraction": self.null_fraction}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "KDEColumnModel":
+        return cls(data["points"], data["bandwidth"], data["integer"], data["null_fraction"])
+
+
+class CategoricalColumnModel:
+    """Categorical column as its frequency table, sampled through an alias table."""
+
+    kind = 'categorical'
+
+    def __init__(self, values: List[Any], counts: List[float], null_fraction: float = 0.0):
+        self.values = list(values)
+        self.counts = np.asarray(counts, dtype=np.float64)
+        self.null_fraction = null_fraction
+        self._table = AliasTable(np.array(self.values, dtype=object), self.counts) if self.values else None
+
+    @classmethod
+    def fit(cls, series: pd.Series, null_fraction: float) -> "CategoricalColumnModel":
+        counts = series.dropna().value_counts(sort=False)
+        values = [value.item() if isinstance(value, np.generic) else value for value in counts.index]
+        return cls(values, counts.to_numpy(dtype=np.float64), null_fraction)
+
+    def sample(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        if self._table is None:
+            return np.full(n, None, dtype=object)
+        return _apply_nulls(self._table.sample(n, rng), self.null_fraction, rng)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "values": self.values, "counts": self.counts.tolist(),
+                "null_fraction": self.null_fraction}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CategoricalColumnModel":
+        return cls(data["values"], data["counts"], data["null_fraction"])
+
+
+class DatetimeColumnModel:
+    """`date`/`datetime` column as a numeric model over epoch days or epoch seconds."""
+
+    kind = 'datetime'
+    _UNITS = {'date': 86400, 'datetime': 1}
+
+    def __init__(self, unit: Literal['date', 'datetime'], epoch_model: Any):
+        self.unit = unit
+        self.epoch_model = epoch_model
+
+    @classmethod
+    def fit(cls, series: pd.Series, unit: Literal['date', 'datetime'], n_bins: int, null_fraction: float) -> "DatetimeColumnModel":
+        parsed = pd.to_datetime(series, errors='coerce').dropna()
+        if getattr(parsed.dt, 'tz', None) is not None:
+            parsed = parsed.dt.tz_convert('UTC').dt.tz_localize(None)
+        epochs = parsed.to_numpy(dtype='datetime64[s]').astype(np.int64) // cls._UNITS[unit]
+        # Values that fail to parse count as nulls
+        null_fraction = 1.0 - (1.0 - null_fraction) * (epochs.size / max(series.notna().sum(), 1))
+        if epochs.size == 0:
+            return cls(unit, None)
+        return cls(unit, HistogramColumnModel.fit(epochs.astype(np.float64), n_bins, True, null_fraction))
+
+    def sample(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        if self.epoch_model is None:
+            return np.full(n, None, dtype=object)
+        epochs = self.epoch_model.sample(n, rng)
+        nulls = np.isnan(epochs) if epochs.dtype.kind == 'f' else np.zeros(n, dtype=bool)
+        seconds = np.where(nulls, 0, epochs).astype(np.int64) * self._UNITS[self.unit]
+        fmt = '%Y-%m-%d' if self.unit == 'date' else '%Y-%m-%dT%H:%M:%S'
+        formatted = pd.to_datetime(seconds, unit='s').strftime(fmt).to_numpy(dtype=object)
+        formatted[nulls] = None
+        return formatted
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "unit": self.unit,
+                "epoch_model": self.epoch_model.to_dict() if self.epoch_model is not None else None}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DatetimeColumnModel":
+        epoch_model = HistogramColumnModel.from_dict(data["epoch_model"]) if data["epoch_model"] else None
+        return cls(data["unit"], epoch_model)
+
+
+_COLUMN_MODELS = {model.kind: model for model in (HistogramColumnModel, KDEColumnModel, CategoricalColumnModel, DatetimeColumnModel)}
+
+
+def column_kinds_from_schema(df_input: pd.DataFrame, schema_columns: Optional[List[Any]] = None) -> Dict[str, str]:
+    """Map each input column to 'number', 'date', 'datetime' or 'categorical'.
+
+    Declared `ColumnSchema` types win; undeclared columns fall back to their pandas dtype.
+    """
+    declared = {column.name: column.type for column in schema_columns or []}
+    kinds: Dict[str, str] = {}
+    for col in df_input.columns:
+        declared_type = declared.get(col)
+        if declared_type in ('number', 'date', 'datetime'):
+            kinds[col] = declared_type
+        elif declared_type is not None:
+            kinds[col] = 'categorical'
+        elif pd.api.types.is_bool_dtype(df_input[col]):
+            kinds[col] = 'categorical'
+        elif pd.api.types.is_numeric_dtype(df_input[col]):
+            kinds[col] = 'number'
+        elif pd.api.types.is_datetime64_any_dtype(df_input[col]):
+            kinds[col] = 'datetime'
+        else:
+            kinds[col] = 'categorical'
+    return kinds
+
+
+def input_fingerprint(df_input: pd.DataFrame, **fit_options: Any) -> str:
+    """sha256 over a fit's input columns, dtypes, values and options; a saved model is reused only on a match."""
+    digest = hashlib.sha256()
+    header = {"columns": [[str(col), str(dtype)] for col, dtype in df_input.dtypes.items()], "options": fit_options}
+    digest.update(json.dumps(header, sort_keys=True, default=str).encode())
+    # One vectorised 64-bit hash per row; object columns (which may hold lists or dicts) are hashed as strings
+    hashable = df_input.apply(lambda series: series.astype(str) if series.dtype == object else series)
+    digest.update(pd.util.hash_pandas_object(hashable, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class EmpiricalModel:
+    """Per-column empirical models for a (possibly wide, mixed-type) table."""
+
+    def __init__(self, columns: Dict[str, Any], fingerprint: Optional[str] = None):
+        self.columns = columns
+        # input_fingerprint() of the data and fit options, set by whoever fits a model to save it
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def fit(
+        cls,
+        df_input: pd.DataFrame,
+        column_kinds: Dict[str, str],
+        rng: np.random.Generator,
+        numeric_model: str = 'histogram',
+        n_bins: int = 50,
+        kde_max_points: int = 1000,
+    ) -> "EmpiricalModel":
+        columns: Dict[str, Any] = {}
+        for col in df_input.columns:
+            series = df_input[col]
+            kind = column_kinds.get(col, 'categorical')
+            null_fraction = float(series.isna().mean()) if len(series) else 0.0
+
+            if kind == 'number':
+                values = pd.to_numeric(series, errors='coerce').dropna().to_numpy(dtype=np.float64)
+                if values.size == 0:
+                    columns[col] = CategoricalColumnModel([], [], 1.0)
+                    continue
+                null_fraction = 1.0 - values.size / len(series)
+                integer = bool(np.all(np.mod(values, 1) == 0))
+                if numeric_model == 'kde':
+                    columns[col] = KDEColumnModel.fit(values, kde_max_points, integer, null_fraction, rng)
+                else:
+                    columns[col] = HistogramColumnModel.fit(values, n_bins, integer, null_fraction)
+            elif kind in ('date', 'datetime'):
+                columns[col] = DatetimeColumnModel.fit(series, kind, n_bins, null_fraction)
+            else:
+                columns[col] = CategoricalColumnModel.fit(series, null_fraction)
+        return cls(columns)
+
+    def sample(self, num_samples: int, rng: np.random.Generator) -> pd.DataFrame:
+        return pd.DataFrame({col: model.sample(num_samples, rng) for col, model in self.columns.items()},
+                            columns=list(self.columns))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": 1,
+            "fingerprint": self.fingerprint,
+            "columns": [[col, model.to_dict()] for col, model in self.columns.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "EmpiricalModel":
+        return cls(
+            {col: _COLUMN_MODELS[model["kind"]].from_dict(model) for col, model in data["columns"]},
+            data.get("fingerprint"),  # Absent in models saved before fingerprinting: never matches, so refitted
+        )
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, default=str)
+
+    @classmethod
+    def load(cls, path: str) -> "EmpiricalModel":
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
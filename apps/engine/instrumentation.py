@@ -0,0 +1,124 @@
+import json
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Callable, Iterator, Optional
+
+# Per-node instrumentation for run_dag.
+#
+# Every node execution is wrapped in `instrument_node`, which measures wall and
+# CPU time, rows and approximate bytes in and out, and the growth of the
+# process's peak RSS, then hands the numbers to the registered hooks. The keys
+# duration_seconds / input_size_bytes / output_size_bytes are the ones the
+# backend's ExecutionLog.metrics and get_run_metrics aggregate.
+
+SIZE_SAMPLE_ROWS = 100 # Records serialised to estimate the byte size of a record list
+
+# Called with (node, data_store) before a node runs
+NodeStartHook = Callable[[Any, Dict[str, Any]], None]
+# Called with (node, metrics) after a node finishes or fails
+NodeEndHook = Callable[[Any, Dict[str, Any]], None]
+
+
+class InstrumentationHooks:
+    """Registry of callbacks run around every node execution.
+
+    Both methods can be used as decorators:
+
+        @hooks.on_node_end
+        def log_metrics(node, metrics):
+            ...
+    """
+
+    def __init__(self):
+        self._start: List[NodeStartHook] = []
+        self._end: List[NodeEndHook] = []
+
+    def on_node_start(self, hook: NodeStartHook) -> NodeStartHook:
+        self._start.append(hook)
+        return hook
+
+    def on_node_end(self, hook: NodeEndHook) -> NodeEndHook:
+        self._end.append(hook)
+        return hook
+
+    def remove(self, hook: Callable) -> None:
+        for registry in (self._start, self._end):
+            if hook in registry:
+                registry.remove(hook)
+
+    def _run(self, registry: List[Callable], node: Any, payload: Dict[str, Any]) -> None:
+        for hook in list(registry):
+            try:
+                hook(node, payload)
+            except Exception as e:
+                # A broken hook must never fail the node it observes
+                print(f"Instrumentation hook {getattr(hook, '__name__', hook)} failed: {e}")
+
+
+hooks = InstrumentationHooks() # Process-wide registry used by run_dag
+
+
+def _peak_rss_bytes() -> int:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(peak if sys.platform == "darwin" else peak * 1024)
+
+
+def row_count(data: Any) -> Optional[int]:
+    return len(data) if isinstance(data, list) else None
+
+
+def estimate_size_bytes(data: Any) -> int:
+    """Approximate JSON size of a node's data.
+
+    Record lists are estimated from an evenly spaced sample of records so the
+    cost stays constant for large outputs; anything else is serialised whole.
+    """
+    if data is None:
+        return 0
+    try:
+        if isinstance(data, list) and len(data) > SIZE_SAMPLE_ROWS:
+            step = len(data) / SIZE_SAMPLE_ROWS
+            sample = [data[int(i * step)] for i in range(SIZE_SAMPLE_ROWS)]
+            return int(len(json.dumps(sample, default=str)) / SIZE_SAMPLE_ROWS * len(data))
+        return len(json.dumps(data, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+@contextmanager
+def instrument_node(node: Any, data_store: Dict[str, Any], input_ids: List[str],
+                    registry: Optional[InstrumentationHooks] = None) -> Iterator[Dict[str, Any]]:
+    """Measure one node execution; yields the metrics dict, which is complete on exit."""
+    registry = registry if registry is not None else hooks
+    registry._run(registry._start, node, data_store)
+    inputs = [data_store.get(input_id) for input_id in input_ids]
+    rows_in = [row_count(data) for data in inputs]
+    metrics: Dict[str, Any] = {
+        "node_type": node.type,
+        "rows_in": sum(rows for rows in rows_in if rows is not None),
+        "input_size_bytes": sum(estimate_size_bytes(data) for data in inputs),
+    }
+    peak_before = _peak_rss_bytes()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        yield metrics
+        metrics["status"] = "completed"
+    except Exception as e:
+        metrics["status"] = "failed"
+        metrics["error"] = str(e)
+        raise
+    finally:
+        metrics["duration_seconds"] = round(time.perf_counter() - wall_start, 6)
+        metrics["cpu_seconds"] = round(time.process_time() - cpu_start, 6)
+        metrics["peak_memory_delta_bytes"] = _peak_rss_bytes() - peak_before
+        output = data_store.get(node.id)
+        metrics["rows_out"] = row_count(output)
+        metrics["output_size_bytes"] = estimate_size_bytes(output)
+        if isinstance(output, dict) and "error" in output and metrics["status"] == "completed":
+            # Executors report most failures by storing an error instead of raising
+            metrics["status"] = "failed"
+            metrics["error"] = output["error"]
+        registry._run(registry._end, node, metrics)
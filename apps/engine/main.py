@@ -1,11 +1,19 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Response
+from pydantic import BaseModel, ConfigDict
 from typing import List, Dict, Any, Optional, Literal, Union
 from collections import deque # Import deque for topological sort
 from fastapi.middleware.cors import CORSMiddleware # Import CORSMiddleware
 import pandas as pd # Import pandas
 import os
 import numpy as np # Import numpy for Gaussian distribution
+from generators import EmpiricalModel, GaussianModel, UniformModel, column_kinds_from_schema, input_fingerprint, range_overrides_from_constraints
+from constraints import apply_constraints
+from privacy import enforce_privacy
+from instrumentation import instrument_node
+from profiler import RunProfiler, profile_node
+from correlation import CORRELATION_METHODS, correlation_matrix
+from metrics import FIDELITY_METRICS, PRIVACY_METRICS, fidelity_metrics, privacy_risk_metrics
+import telemetry # Registers the Prometheus node-metric hooks
 
 app = FastAPI()
 
@@ -23,6 +31,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency histogram per route
+app.middleware("http")(telemetry.record_request_latency)
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    payload, content_type = telemetry.render_latest()
+    return Response(content=payload, media_type=content_type)
+
 # Define Pydantic models based on frontend types/dag.ts
 
 # Node Configurations
@@ -67,7 +84,8 @@ class SourceNodeConnection(BaseModel):
     path: Optional[str] = None
     region: Optional[str] = None
     credentials: Optional[ConnectionCredentials] = None
-    
+    fileContent: Optional[str] = None  # An uploaded CSV's text, read instead of `path`
+
     # API connections
     url: Optional[str] = None
     method: Optional[Literal['GET', 'POST', 'PUT', 'DELETE']] = None
@@ -130,6 +148,9 @@ class GeneratorParameters(BaseModel):
     n_clusters: Optional[int] = None # CopulaGAN specific
     custom_script: Optional[str] = None # Custom generator
     custom_requirements: Optional[List[str]] = None # Custom generator
+    numeric_model: Optional[Literal['histogram', 'kde']] = None # Empirical specific
+    n_bins: Optional[int] = None # Empirical specific
+    model_path: Optional[str] = None # Empirical specific: fitted model is saved here and reused while its input is unchanged
 
 class ConstraintParams(BaseModel):
     min: Optional[float] = None
@@ -141,6 +162,7 @@ class ConstraintParams(BaseModel):
     correlation_type: Optional[Literal['pearson', 'spearman', 'kendall']] = None
     correlation_value: Optional[float] = None
     custom_rule: Optional[str] = None
+    enforcement: Optional[Literal['clip', 'resample']] = None # How range violations are fixed; resample by default
 
 class Constraint(BaseModel):
     column: str
@@ -148,10 +170,12 @@ class Constraint(BaseModel):
     params: ConstraintParams
 
 class PrivacyConfig(BaseModel):
-    anonymization: Optional[bool] = None
+    anonymization: Optional[bool] = None # False only checks the thresholds, otherwise they are enforced
     k_anonymity: Optional[int] = None
     l_diversity: Optional[int] = None
-    t_closeness: Optional[int] = None
+    t_closeness: Optional[float] = None # Fraction (0-1) or percentage
+    quasi_identifiers: Optional[List[str]] = None # Defaults to every column except the sensitive one
+    sensitive_column: Optional[str] = None # Needed for l-diversity and t-closeness
 
 class GeneratorDataQuality(BaseModel):
      privacy: Optional[PrivacyConfig] = None
@@ -161,14 +185,18 @@ class OutputFormat(BaseModel):
     schema: Optional[SourceNodeSchema] = None # Reusing SourceNodeSchema for now, might need refinement
 
 class GeneratorNodeConfig(BaseModel):
-    type: Literal['ctgan', 'tvae', 'copulagan', 'gaussian', 'uniform', 'custom']
+    type: Literal['ctgan', 'tvae', 'copulagan', 'gaussian', 'uniform', 'empirical', 'custom']
     parameters: GeneratorParameters
     constraints: Optional[List[Constraint]] = None
     data_quality: Optional[GeneratorDataQuality] = None
     output_format: Optional[OutputFormat] = None
 
 class EvaluatorNodeConfig(BaseModel):
+    # Every field is optional, so without this the NodeConfig union would also accept exporter configs as evaluators
+    model_config = ConfigDict(extra='forbid')
+
     metrics: Optional[List[str]] = None
+    sample_size: Optional[int] = None # Caps the rows used by dataset-level metrics (dcr, correlation matrices, ...)
     validation: Optional[NodeValidation] = None
 
 class ExporterDestination(BaseModel):
@@ -209,6 +237,7 @@ class SyntheticDataDAG(BaseModel):
     description: Optional[str] = None
     nodes: List[DagNode]
     edges: List[DagEdge]
+    profile: Optional[bool] = False # Record a sampling profile of every node (see profiler.py)
 
 @app.post("/api/v1/dags/run")
 async def run_dag(dag: SyntheticDataDAG):
@@ -254,23 +283,29 @@ async def run_dag(dag: SyntheticDataDAG):
 
     # --- Node Execution Logic ---
     data_store: Dict[str, Any] = {}
+    node_metrics: Dict[str, Dict[str, Any]] = {}
+    profiler = RunProfiler.for_dag(dag) # None unless this run or ENGINE_PROFILE_THRESHOLD_SECONDS asks for profiles
 
     for node_id in execution_order:
         node = node_map[node_id] # Retrieve the node object using the map
         print(f"Processing node: {node.id} (Type: {node.type})")
+        input_ids = [edge.source for edge in dag.edges if edge.target == node.id]
 
         try:
-            if node.type == 'source':
-                await execute_source_node(node, dag, data_store)
-            elif node.type == 'generator':
-                await execute_generator_node(node, dag, data_store)
-            elif node.type == 'evaluator':
-                await execute_evaluator_node(node, dag, data_store)
-            elif node.type == 'exporter':
-                await execute_exporter_node(node, dag, data_store)
-            # Add other node types here as needed
-            else:
-                print(f"Warning: Unknown node type: {node.type}")
+            # Timing, rows, bytes and memory per node; collected even when the node raises
+            with instrument_node(node, data_store, input_ids) as metrics, profile_node(profiler, node, metrics):
+                node_metrics[node.id] = metrics
+                if node.type == 'source':
+                    await execute_source_node(node, dag, data_store)
+                elif node.type == 'generator':
+                    await execute_generator_node(node, dag, data_store)
+                elif node.type == 'evaluator':
+                    await execute_evaluator_node(node, dag, data_store)
+                elif node.type == 'exporter':
+                    await execute_exporter_node(node, dag, data_store)
+                # Add other node types here as needed
+                else:
+                    print(f"Warning: Unknown node type: {node.type}")
         except Exception as e:
             print(f"Error executing node {node.id}: {e}")
             # TODO: Implement more robust error handling and reporting
@@ -278,7 +313,7 @@ async def run_dag(dag: SyntheticDataDAG):
 
     print("DAG execution completed.")
 
-    return {"message": "DAG execution request received", "dag_name": dag.name, "dag_id": dag.id, "execution_order": execution_order, "data_store": data_store} # Optionally return data_store for debugging
+    return {"message": "DAG execution request received", "dag_name": dag.name, "dag_id": dag.id, "execution_order": execution_order, "node_metrics": node_metrics, "profiles": profiler.paths if profiler else {}, "data_store": data_store} # Optionally return data_store for debugging
 
 # Placeholder execution functions for each node type
 async def execute_source_node(node: DagNode, dag: SyntheticDataDAG, data_store: Dict[str, Any]):
@@ -371,6 +406,9 @@ async def execute_generator_node(node: DagNode, dag: SyntheticDataDAG, data_stor
     parameters = config.parameters
 
     generated_data = []
+    generated_df = None
+    model = None # Fitted model; its sample() is reused for constraint resampling
+    rng = np.random.default_rng()
 
     if generator_type == 'gaussian':
         print(f"Generator Type: Gaussian. Parameters: {parameters}")
@@ -386,33 +424,16 @@ async def execute_generator_node(node: DagNode, dag: SyntheticDataDAG, data_stor
                     data_store[node.id] = []
                     return
 
-                means = df_input[numerical_cols].mean().to_dict()
-                stds = df_input[numerical_cols].std().to_dict()
-                
-                # Handle potential NaN std deviations (e.g., single-value columns)
-                stds = {col: std if not pd.isna(std) else 0.0 for col, std in stds.items()}
+                model = GaussianModel.fit(df_input)
 
                 num_samples = parameters.num_samples if parameters.num_samples is not None else len(df_input) # Default to number of input rows if not specified
                 print(f"Generating {num_samples} samples using Gaussian distribution based on input data stats.")
-                print(f"Calculated Means: {means}")
-                print(f"Calculated Stds: {stds}")
-
-                # Generate data using numpy
-                generated_df = pd.DataFrame()
-                for col in numerical_cols:
-                    generated_df[col] = pd.Series(np.random.normal(means[col], stds[col], num_samples))
-                    
-                # For non-numerical columns, you might want to handle them differently
-                # (e.g., sample from existing values, generate based on distributions, etc.)
-                # For this basic implementation, we'll just add empty columns for non-numerical types
-                for col in df_input.columns:
-                    if col not in numerical_cols:
-                        generated_df[col] = pd.Series([None] * num_samples) # Placeholder
-                        
-                # Ensure columns are in the same order as input
-                generated_df = generated_df[df_input.columns] # Reorder columns
-
-                generated_data = generated_df.to_dict(orient='records')
+                print(f"Calculated Means: {model.means}")
+                print(f"Calculated Stds: {model.stds}")
+
+                # Numerical columns are drawn in one vectorised call; the rest
+                # are sampled from their observed frequency tables
+                generated_df = model.sample(num_samples, rng)
 
             except Exception as e:
                 print(f"Error generating gaussian data for node {node.id}: {e}")
@@ -426,15 +447,137 @@ async def execute_generator_node(node: DagNode, dag: SyntheticDataDAG, data_stor
             
     elif generator_type == 'uniform':
         print(f"Generator Type: Uniform. Parameters: {parameters}")
-        # TODO: Implement uniform data generation logic
-        pass
+        if isinstance(input_data, list) and input_data:
+            try:
+                df_input = pd.DataFrame(input_data)
+
+                num_samples = parameters.num_samples if parameters.num_samples is not None else len(df_input) # Default to number of input rows if not specified
+                bounds_overrides = range_overrides_from_constraints(config.constraints)
+                print(f"Generating {num_samples} samples using uniform distribution. Bound overrides: {bounds_overrides}")
+
+                model = UniformModel.fit(df_input, bounds_overrides)
+                generated_df = model.sample(num_samples, rng)
+
+            except Exception as e:
+                print(f"Error generating uniform data for node {node.id}: {e}")
+                data_store[node.id] = []
+                # TODO: Report this error to the frontend
+                return
+        else:
+            print(f"Warning: Input data for uniform generator node {node.id} is not in expected list format or is empty.")
+            data_store[node.id] = []
+            return
+
+    elif generator_type == 'empirical':
+        print(f"Generator Type: Empirical. Parameters: {parameters}")
+        try:
+            model_path = parameters.model_path
+            if model_path and not os.path.isabs(model_path):
+                # Assume relative path is relative to the engine directory
+                model_path = os.path.join(os.getcwd(), model_path)
+
+            df_input = pd.DataFrame(input_data) if isinstance(input_data, list) and input_data else None
+            model = None
+            if model_path and os.path.exists(model_path):
+                print(f"Loading fitted empirical model from {model_path}")
+                model = EmpiricalModel.load(model_path)
+                num_samples = parameters.num_samples
+
+            if df_input is not None:
+                # Column types come from the declared output schema, else from the upstream source schema
+                schema = config.output_format.schema if config.output_format and config.output_format.schema else None
+                if schema is None:
+                    input_node = next((n for n in dag.nodes if n.id == input_node_id), None)
+                    input_config = input_node.data.config if input_node else None
+                    if isinstance(input_config, SourceNodeConfig) and input_config.schema:
+                        schema = input_config.schema
+                column_kinds = column_kinds_from_schema(df_input, schema.columns if schema else None)
+                fit_options = {'numeric_model': parameters.numeric_model or 'histogram', 'n_bins': parameters.n_bins or 50}
+                fingerprint = input_fingerprint(df_input, column_kinds=column_kinds, **fit_options)
+
+                # A saved model is only reused for the exact input and options it was fitted on
+                if model is not None and model.fingerprint != fingerprint:
+                    print(f"Saved empirical model at {model_path} was fitted on different input; refitting")
+                    model = None
+                if model is None:
+                    model = EmpiricalModel.fit(df_input, column_kinds, rng, **fit_options)
+                    model.fingerprint = fingerprint
+                    if model_path:
+                        model.save(model_path)
+                        print(f"Saved fitted empirical model to {model_path}")
+                num_samples = parameters.num_samples if parameters.num_samples is not None else len(df_input) # Default to number of input rows if not specified
+            elif model is None:
+                print(f"Warning: Input data for empirical generator node {node.id} is not in expected list format or is empty.")
+                data_store[node.id] = []
+                return
+
+            print(f"Generating {num_samples} samples from fitted empirical column models.")
+            generated_df = model.sample(num_samples, rng)
+
+        except Exception as e:
+            print(f"Error generating empirical data for node {node.id}: {e}")
+            data_store[node.id] = []
+            # TODO: Report this error to the frontend
+            return
 
     # TODO: Implement other generator types (ctgan, tvae, copulagan, custom)
 
+    if generated_df is not None:
+        if config.constraints:
+            try:
+                constraint_report = apply_constraints(
+                    generated_df,
+                    config.constraints,
+                    rng,
+                    sample_rows=lambda n: model.sample(n, rng),
+                )
+                print(f"Constraints applied for node {node.id}: {constraint_report}")
+            except Exception as e:
+                print(f"Error applying constraints for node {node.id}: {e}")
+                data_store[node.id] = []
+                # TODO: Report this error to the frontend
+                return
+
+        privacy = config.data_quality.privacy if config.data_quality else None
+        if privacy and (privacy.k_anonymity or privacy.l_diversity or privacy.t_closeness is not None):
+            try:
+                generated_df, privacy_report = enforce_privacy(
+                    generated_df,
+                    k=privacy.k_anonymity,
+                    l=privacy.l_diversity,
+                    t=privacy.t_closeness,
+                    quasi_identifiers=privacy.quasi_identifiers,
+                    sensitive_column=privacy.sensitive_column,
+                    anonymize=privacy.anonymization is not False,
+                )
+                print(f"Privacy checks for node {node.id}: {privacy_report}")
+            except Exception as e:
+                print(f"Error applying privacy checks for node {node.id}: {e}")
+                data_store[node.id] = []
+                # TODO: Report this error to the frontend
+                return
+
+        generated_data = generated_df.to_dict(orient='records')
+
     # Store the generated data
     data_store[node.id] = generated_data 
     print(f"Generated data stored for node {node.id}. Samples: {len(generated_data)}")
 
+def find_upstream_source_id(node_id: str, dag: SyntheticDataDAG) -> Optional[str]:
+    # Walk edges backwards (breadth-first) to the nearest source node
+    frontier = [edge.source for edge in dag.edges if edge.target == node_id]
+    seen = set()
+    while frontier:
+        current = frontier.pop(0)
+        if current in seen:
+            continue
+        seen.add(current)
+        current_node = next((n for n in dag.nodes if n.id == current), None)
+        if current_node and current_node.type == 'source':
+            return current
+        frontier.extend(edge.source for edge in dag.edges if edge.target == current)
+    return None
+
 async def execute_evaluator_node(node: DagNode, dag: SyntheticDataDAG, data_store: Dict[str, Any]):
     print(f"Executing Evaluator Node: {node.id} with config {node.data.config}")
     
@@ -515,6 +658,35 @@ async def execute_evaluator_node(node: DagNode, dag: SyntheticDataDAG, data_stor
         if column_metrics:
             results["metrics"][col] = column_metrics
 
+    # Correlation matrices over the numeric columns; sample_size switches to an approximate mode
+    for method in CORRELATION_METHODS:
+        if method in metrics_to_calculate:
+            try:
+                results.setdefault("correlations", {})[method] = correlation_matrix(df, method, sample_size=config.sample_size)
+            except Exception as e:
+                print(f"Error calculating {method} correlations for node {node.id}: {e}")
+                results.setdefault("correlations", {})[method] = {"error": str(e)}
+
+    # Fidelity and nearest-neighbour privacy metrics compare the input with the source data it was generated from
+    if any(metric in metrics_to_calculate for metric in FIDELITY_METRICS + PRIVACY_METRICS):
+        source_id = find_upstream_source_id(input_node_id, dag)
+        source_data = data_store.get(source_id) if source_id else None
+        if isinstance(source_data, list) and source_data:
+            source_df = pd.DataFrame(source_data)
+            try:
+                if any(metric in metrics_to_calculate for metric in FIDELITY_METRICS):
+                    results["fidelity"] = fidelity_metrics(source_df, df, metrics_to_calculate)
+                if any(metric in metrics_to_calculate for metric in PRIVACY_METRICS):
+                    results["privacy"] = privacy_risk_metrics(
+                        source_df, df, metrics_to_calculate, sample_size=config.sample_size
+                    )
+            except Exception as e:
+                print(f"Error calculating comparison metrics for node {node.id}: {e}")
+                results["comparison_error"] = str(e)
+        else:
+            print(f"Warning: No upstream source data found for comparison metrics of node {node.id}")
+            results["comparison_error"] = "Source data not found"
+
     # Perform validation checks if specified
     if config.validation:
         validation = config.validation
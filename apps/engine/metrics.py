@@ -0,0 +1,196 @@
+import numpy as np # Import numpy for vectorised metric computation
+import pandas as pd # Import pandas
+from typing import List, Dict, Any, Optional
+
+from neighbors import BlockedNearestNeighbors, FeatureEncoder
+from correlation import pearson_matrix
+
+# Dataset-level metrics that compare a generated table with the source data it
+# was fitted on. Per-column summary statistics stay in execute_evaluator_node.
+
+PRIVACY_METRICS = ('dcr', 'nndr', 'membership_inference')
+FIDELITY_METRICS = ('ks', 'wasserstein', 'tvd', 'correlation_difference')
+EXACT_MATCH_TOLERANCE = 1e-6 # Standardised distance at or below which a row counts as a copy (cancellation leaves ~1e-7)
+
+
+def _sample_rows(df: pd.DataFrame, sample_size: Optional[int], rng: np.random.Generator) -> pd.DataFrame:
+    if sample_size is None or len(df) <= sample_size:
+        return df
+    return df.iloc[np.sort(rng.choice(len(df), size=sample_size, replace=False))]
+
+
+def _distance_summary(distances: np.ndarray) -> Dict[str, float]:
+    p5, median = np.percentile(distances, [5, 50])
+    return {
+        "mean": float(distances.mean()),
+        "median": float(median),
+        "p5": float(p5),
+        "min": float(distances.min()),
+    }
+
+
+def _probability_less(a: np.ndarray, b: np.ndarray) -> float:
+    """P(A < B) + 0.5 P(A = B) for independent draws from `a` and `b` (Mann-Whitney AUC)."""
+    b_sorted = np.sort(b)
+    below = b_sorted.size - np.searchsorted(b_sorted, a, side='right')
+    ties = np.searchsorted(b_sorted, a, side='right') - np.searchsorted(b_sorted, a, side='left')
+    return float((below.sum() + 0.5 * ties.sum()) / (a.size * b_sorted.size))
+
+
+def privacy_risk_metrics(
+    real: pd.DataFrame,
+    synthetic: pd.DataFrame,
+    metrics: List[str],
+    sample_size: Optional[int] = None,
+    rng: Optional[np.random.Generator] = None,
+) -> Dict[str, Any]:
+    """Nearest-neighbour disclosure metrics of `synthetic` against `real`.
+
+    - dcr: distance from each synthetic row to its closest real row, next to
+      the same distance between real rows (leave-one-out) as a baseline.
+    - nndr: ratio of the closest to the second-closest real distance; values
+      near 0 mean a synthetic row singles out one real record.
+    - membership_inference: a distance attack. A real record is at risk when
+      the closest synthetic row is nearer than its closest other real record;
+      `auc` is P(real-to-synthetic < real-to-real distance), 0.5 meaning the
+      generated rows sit no closer to the source than the source does to itself.
+
+    Rows are encoded with a FeatureEncoder fitted on `real` over the shared
+    columns and searched with the blocked exact k-NN engine. `sample_size`
+    caps the rows drawn from each side.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    requested = [metric for metric in PRIVACY_METRICS if metric in metrics]
+    columns = [col for col in real.columns if col in synthetic.columns]
+    if not requested:
+        return {}
+    if not columns or len(real) < 2 or len(synthetic) == 0:
+        return {metric: {"status": "skipped", "reason": "not enough shared rows or columns"} for metric in requested}
+
+    real = _sample_rows(real[columns], sample_size, rng)
+    synthetic = _sample_rows(synthetic[columns], sample_size, rng)
+    encoder = FeatureEncoder.fit(real)
+    real_x, synthetic_x = encoder.transform(real), encoder.transform(synthetic)
+    real_index = BlockedNearestNeighbors().fit(real_x)
+    sizes = {"real_rows": int(len(real)), "synthetic_rows": int(len(synthetic)), "columns": columns}
+
+    results: Dict[str, Any] = {}
+    synthetic_to_real, _ = real_index.kneighbors(synthetic_x, k=2)
+    real_to_real, _ = real_index.kneighbors(real_x, k=1, exclude_self=True)
+    real_to_real = real_to_real[:, 0]
+
+    if 'dcr' in requested:
+        dcr = synthetic_to_real[:, 0]
+        baseline = float(np.median(real_to_real))
+        results['dcr'] = {
+            **_distance_summary(dcr),
+            "exact_match_fraction": float((dcr <= EXACT_MATCH_TOLERANCE).mean()),
+            "baseline_median": baseline,
+            # Below 1 means generated rows sit closer to the source than source rows do to each other
+            "median_ratio": float(np.median(dcr) / baseline) if baseline > 0 else None,
+            **sizes,
+        }
+
+    if 'nndr' in requested:
+        if synthetic_to_real.shape[1] < 2:
+            results['nndr'] = {"status": "skipped", "reason": "needs at least two real rows"}
+        else:
+            nearest, second = synthetic_to_real[:, 0], synthetic_to_real[:, 1]
+            # Ties at distance 0 single nobody out, so they count as ratio 1
+            ratio = np.divide(nearest, second, out=np.ones_like(nearest), where=second > 0)
+            p5, median = np.percentile(ratio, [5, 50])
+            results['nndr'] = {"mean": float(ratio.mean()), "median": float(median), "p5": float(p5), **sizes}
+
+    if 'membership_inference' in requested:
+        synthetic_index = BlockedNearestNeighbors().fit(synthetic_x)
+        real_to_synthetic = synthetic_index.kneighbors(real_x, k=1)[0][:, 0]
+        results['membership_inference'] = {
+            "at_risk_fraction": float((real_to_synthetic < real_to_real).mean()),
+            "auc": _probability_less(real_to_synthetic, real_to_real),
+            **sizes,
+        }
+
+    return results
+
+
+def _numeric_columns(df: pd.DataFrame) -> List[str]:
+    return [col for col, dtype in df.dtypes.items() if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)]
+
+
+def _sorted_values(series: pd.Series) -> np.ndarray:
+    values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64)
+    return np.sort(values[~np.isnan(values)])
+
+
+def ecdf_distances(real_sorted: np.ndarray, synthetic_sorted: np.ndarray) -> Dict[str, float]:
+    """KS statistic and Wasserstein-1 distance from two sorted samples.
+
+    The two sorted runs are merged once; walking the merged order, each real
+    value raises the CDF gap by 1/n and each synthetic value lowers it by 1/m.
+    KS is the largest gap, Wasserstein the area under it.
+    """
+    combined = np.concatenate([real_sorted, synthetic_sorted])
+    order = np.argsort(combined, kind='stable')
+    merged = combined[order]
+    gap = np.abs(np.cumsum(np.where(order < real_sorted.size, 1.0 / real_sorted.size, -1.0 / synthetic_sorted.size)))
+    # Inside a run of equal values the partial sums are not ECDF points; only the last of each run is
+    run_ends = np.append(merged[1:] != merged[:-1], True)
+    return {"ks": float(gap[run_ends].max()), "wasserstein": float(np.sum(gap[:-1] * np.diff(merged)))}
+
+
+def total_variation_distance(real: pd.Series, synthetic: pd.Series) -> float:
+    # Both columns share one factorization, so the two histograms line up bin for bin
+    codes, uniques = pd.factorize(pd.concat([real, synthetic], ignore_index=True), use_na_sentinel=False)
+    p = np.bincount(codes[:len(real)], minlength=len(uniques)) / max(len(real), 1)
+    q = np.bincount(codes[len(real):], minlength=len(uniques)) / max(len(synthetic), 1)
+    return float(0.5 * np.abs(p - q).sum())
+
+
+def fidelity_metrics(real: pd.DataFrame, synthetic: pd.DataFrame, metrics: List[str]) -> Dict[str, Any]:
+    """Per-column and cross-column similarity of `synthetic` to `real`.
+
+    - ks / wasserstein: numeric columns, from one sorted copy of each side.
+    - tvd: total variation distance for the other columns.
+    - correlation_difference: Frobenius norm of the difference between the
+      (pairwise-complete) Pearson matrices over the shared numeric columns.
+    """
+    requested = [metric for metric in FIDELITY_METRICS if metric in metrics]
+    if not requested:
+        return {}
+    shared = [col for col in real.columns if col in synthetic.columns]
+    synthetic_numeric = set(_numeric_columns(synthetic))
+    numeric = [col for col in _numeric_columns(real) if col in synthetic_numeric]
+    results: Dict[str, Any] = {"columns": {}}
+
+    if 'ks' in requested or 'wasserstein' in requested:
+        for col in numeric:
+            real_sorted, synthetic_sorted = _sorted_values(real[col]), _sorted_values(synthetic[col])
+            if real_sorted.size == 0 or synthetic_sorted.size == 0:
+                continue
+            distances = ecdf_distances(real_sorted, synthetic_sorted)
+            results["columns"][col] = {name: distances[name] for name in ('ks', 'wasserstein') if name in requested}
+
+    if 'tvd' in requested:
+        for col in shared:
+            if col not in numeric:
+                results["columns"][col] = {"tvd": total_variation_distance(real[col], synthetic[col])}
+
+    if 'correlation_difference' in requested:
+        if len(numeric) < 2:
+            results["correlation_difference"] = {"status": "skipped", "reason": "needs at least two shared numeric columns"}
+        else:
+            difference = np.nan_to_num(pearson_matrix(real, numeric) - pearson_matrix(synthetic, numeric))
+            results["correlation_difference"] = {
+                "frobenius": float(np.linalg.norm(difference)),
+                "max_abs": float(np.abs(difference).max()),
+                "columns": numeric,
+            }
+
+    # Column averages give one number per metric for thresholds
+    summary = {}
+    for name in ('ks', 'wasserstein', 'tvd'):
+        values = [column[name] for column in results["columns"].values() if name in column]
+        if values:
+            summary[f"mean_{name}"] = float(np.mean(values))
+    results["summary"] = summary
+    return results
@@ -0,0 +1,136 @@
+import numpy as np # Import numpy for blocked distance computation
+import pandas as pd # Import pandas
+from typing import List, Dict, Any, Optional, Tuple
+
+# Exact k-nearest-neighbour search for mixed-type tables without a pairwise
+# distance matrix.
+#
+# Queries and reference rows are processed in tiles. Each tile's squared
+# distances come from one matrix product (|x|^2 - 2 q.x; the per-query |q|^2 is
+# added after selection) and only the running k smallest per query are kept, so
+# memory is O(block^2) and the inner loop runs in BLAS rather than Python.
+
+QUERY_BLOCK = 1024 # Query rows per tile (a tile is QUERY_BLOCK x REFERENCE_BLOCK float64s, 64 MB)
+REFERENCE_BLOCK = 8192 # Reference rows per tile
+SMALL_K = 4 # Up to this many neighbours are selected with repeated argmin instead of argpartition
+MAX_CATEGORIES = 50 # Most frequent categories one-hot encoded per column; the rest share one slot
+
+
+class FeatureEncoder:
+    """Maps frames to a shared numeric feature space.
+
+    Numeric (and boolean) columns are standardised with the reference frame's
+    mean and std, and nulls are imputed to the mean. Categorical columns are
+    one-hot encoded over the reference's most frequent categories and scaled by
+    1/sqrt(2), so a category mismatch costs the same as one standard deviation.
+    """
+
+    def __init__(self, numeric: Dict[str, Tuple[float, float]], categorical: Dict[str, List[Any]]):
+        self.numeric = numeric
+        self.categorical = categorical
+
+    @classmethod
+    def fit(cls, reference: pd.DataFrame, columns: Optional[List[str]] = None) -> "FeatureEncoder":
+        numeric: Dict[str, Tuple[float, float]] = {}
+        categorical: Dict[str, List[Any]] = {}
+        for col in columns if columns is not None else list(reference.columns):
+            series = reference[col]
+            if pd.api.types.is_numeric_dtype(series):
+                values = series.to_numpy(dtype=np.float64)
+                mean = float(np.nanmean(values)) if np.isfinite(values).any() else 0.0
+                std = float(np.nanstd(values)) if np.isfinite(values).any() else 0.0
+                numeric[col] = (mean, std if std > 0 else 1.0)
+            else:
+                categorical[col] = series.astype(str).value_counts().index[:MAX_CATEGORIES].tolist()
+        return cls(numeric, categorical)
+
+    @property
+    def n_features(self) -> int:
+        return len(self.numeric) + sum(len(categories) + 1 for categories in self.categorical.values())
+
+    def transform(self, df: pd.DataFrame) -> np.ndarray:
+        features = np.zeros((len(df), self.n_features), dtype=np.float64)
+        offset = 0
+        for col, (mean, std) in self.numeric.items():
+            if col in df.columns:
+                values = (pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64) - mean) / std
+                features[:, offset] = np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0)
+            offset += 1
+        for col, categories in self.categorical.items():
+            if col in df.columns:
+                # Unseen and infrequent categories fall into the trailing "other" slot
+                codes = pd.Categorical(df[col].astype(str), categories=categories).codes.astype(np.int64)
+                codes[codes < 0] = len(categories)
+                features[np.arange(len(df)), offset + codes] = np.sqrt(0.5)
+            offset += len(categories) + 1
+        return features
+
+
+class BlockedNearestNeighbors:
+    """Exact Euclidean k-NN over a fixed reference set using tiled matrix products."""
+
+    def __init__(self, query_block: int = QUERY_BLOCK, reference_block: int = REFERENCE_BLOCK):
+        self.query_block = query_block
+        self.reference_block = reference_block
+        self.reference: Optional[np.ndarray] = None
+
+    def fit(self, reference: np.ndarray) -> "BlockedNearestNeighbors":
+        reference = np.asarray(reference, dtype=np.float64)
+        # [-2x, |x|^2] so that [q, 1] . [-2x, |x|^2] = |x|^2 - 2 q.x comes out of one GEMM
+        self.reference = np.ascontiguousarray(np.hstack([-2.0 * reference, np.einsum('ij,ij->i', reference, reference)[:, None]]))
+        return self
+
+    def kneighbors(self, queries: np.ndarray, k: int = 1, exclude_self: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """Distances and reference indices of the `k` nearest reference rows, nearest first.
+
+        With `exclude_self`, `queries` must be the reference set itself and each
+        row's own position is skipped (leave-one-out neighbours).
+        """
+        reference = self.reference
+        if reference is None:
+            raise ValueError("BlockedNearestNeighbors.fit must be called before kneighbors")
+        queries = np.asarray(queries, dtype=np.float64)
+        n_queries, n_reference = queries.shape[0], reference.shape[0]
+        k = min(k, n_reference - (1 if exclude_self else 0))
+        if k <= 0:
+            raise ValueError("Not enough reference rows for the requested number of neighbours")
+
+        distances = np.empty((n_queries, k), dtype=np.float64)
+        indices = np.empty((n_queries, k), dtype=np.int64)
+        for q_start in range(0, n_queries, self.query_block):
+            q = queries[q_start:q_start + self.query_block]
+            q_aug = np.hstack([q, np.ones((q.shape[0], 1))])
+            rows = np.arange(q.shape[0])
+            best_d = np.full((q.shape[0], k), np.inf)
+            best_i = np.zeros((q.shape[0], k), dtype=np.int64)
+            for r_start in range(0, n_reference, self.reference_block):
+                r_end = min(r_start + self.reference_block, n_reference)
+                # Squared distance minus |q|^2, which is constant per row and added after selection
+                partial = q_aug @ reference[r_start:r_end].T
+                if exclude_self:
+                    own = (rows + q_start >= r_start) & (rows + q_start < r_end)
+                    partial[own.nonzero()[0], rows[own] + q_start - r_start] = np.inf
+                kk = min(k, r_end - r_start)
+                if kk <= SMALL_K:
+                    # A few linear argmin passes beat a partition for the usual k of 1-2
+                    part = np.empty((q.shape[0], kk), dtype=np.int64)
+                    part_d = np.empty((q.shape[0], kk))
+                    for j in range(kk):
+                        part[:, j] = partial.argmin(axis=1)
+                        part_d[:, j] = partial[rows, part[:, j]]
+                        partial[rows, part[:, j]] = np.inf
+                else:
+                    part = np.argpartition(partial, kk - 1, axis=1)[:, :kk]
+                    part_d = np.take_along_axis(partial, part, axis=1)
+                # Merge this tile's candidates with the running best k
+                cand_d = np.concatenate([best_d, part_d], axis=1)
+                cand_i = np.concatenate([best_i, part + r_start], axis=1)
+                keep = np.argpartition(cand_d, k - 1, axis=1)[:, :k]
+                best_d = np.take_along_axis(cand_d, keep, axis=1)
+                best_i = np.take_along_axis(cand_i, keep, axis=1)
+            order = np.argsort(best_d, axis=1)
+            best_d = np.take_along_axis(best_d, order, axis=1) + np.einsum('ij,ij->i', q, q)[:, None]
+            # Clamp the small negatives that cancellation produces for identical rows
+            distances[q_start:q_start + q.shape[0]] = np.sqrt(np.maximum(best_d, 0.0))
+            indices[q_start:q_start + q.shape[0]] = np.take_along_axis(best_i, order, axis=1)
+        return distances, indices
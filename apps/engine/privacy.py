@@ -0,0 +1,228 @@
+import numpy as np # Import numpy for vectorised group statistics
+import pandas as pd # Import pandas
+from typing import List, Dict, Any, Optional, Tuple
+
+# k-anonymity / l-diversity / t-closeness for generated tables.
+#
+# Quasi-identifiers are factorized to integer codes once; each generalisation
+# round only coarsens those codes and packs them (or hashes them, for very wide
+# keys) into one equivalence-class id per row. All three properties are read
+# from a single (class, sensitive value) count table that is aggregated chunk by
+# chunk. Nothing compares rows pairwise, so cost is linear in the number of rows.
+
+NUMERIC_START_BINS = 64 # Equal-frequency bins used for numeric quasi-identifiers at the first generalisation round
+SENSITIVE_NUMERIC_BINS = 20 # Ordered bins used to compare numeric sensitive distributions (EMD)
+
+
+def _class_ids(code_columns: List[np.ndarray], cardinalities: List[int], n_rows: int) -> Tuple[np.ndarray, int]:
+    """Dense equivalence-class id per row for the combination of quasi-identifier codes.
+
+    Codes are packed exactly (mixed radix) while the combined cardinality fits
+    in 62 bits and hashed to 64 bits otherwise; the keys are then factorized so
+    class ids run from 0 to n_classes - 1.
+    """
+    if not code_columns:
+        return np.zeros(n_rows, dtype=np.int64), int(n_rows > 0)
+    if float(np.prod([max(c, 1) for c in cardinalities], dtype=np.float64)) < 2 ** 62:
+        keys = np.zeros(n_rows, dtype=np.int64)
+        for codes, cardinality in zip(code_columns, cardinalities):
+            keys = keys * max(cardinality, 1) + codes
+    else:
+        frame = pd.DataFrame({i: codes for i, codes in enumerate(code_columns)})
+        keys = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    class_ids, uniques = pd.factorize(keys)
+    return class_ids.astype(np.int64), len(uniques)
+
+
+def _sensitive_codes(series: pd.Series) -> Tuple[np.ndarray, int, bool]:
+    """Integer codes for the sensitive attribute; numeric columns are binned so codes are ordered."""
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        values = series.to_numpy(dtype=np.float64)
+        present = ~np.isnan(values)
+        edges = np.unique(np.quantile(values[present], np.linspace(0, 1, SENSITIVE_NUMERIC_BINS + 1))) if present.any() else np.array([0.0])
+        codes = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, max(edges.size - 2, 0))
+        # Nulls get their own code after the ordered bins
+        n_codes = max(edges.size - 1, 1)
+        codes = np.where(present, codes, n_codes)
+        return codes.astype(np.int64), n_codes + 1, True
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    return codes.astype(np.int64), len(uniques), False
+
+
+def equivalence_class_stats(
+    class_ids: np.ndarray,
+    n_classes: int,
+    sensitive_codes: Optional[np.ndarray],
+    n_sensitive: int,
+    ordered: bool,
+    chunk_size: int = 1_000_000,
+) -> pd.DataFrame:
+    """Per-class size, distinct sensitive values and distance to the global sensitive distribution.
+
+    (class, sensitive value) pairs are packed into one int64 and counted per
+    chunk, so peak memory is bounded by the number of distinct pairs rather
+    than the row count.
+    """
+    stats = pd.DataFrame({"size": np.bincount(class_ids, minlength=n_classes)})
+    if sensitive_codes is None or class_ids.size == 0:
+        stats["distinct"] = (stats["size"] > 0).astype(np.int64)
+        stats["distance"] = 0.0
+        return stats
+
+    partials = []
+    for start in range(0, class_ids.size, chunk_size):
+        pairs = class_ids[start:start + chunk_size] * n_sensitive + sensitive_codes[start:start + chunk_size]
+        partials.append(pd.Series(pairs).value_counts(sort=False))
+    pair_counts = pd.concat(partials).groupby(level=0, sort=False).sum() if len(partials) > 1 else partials[0]
+    pair_keys = pair_counts.index.to_numpy()
+    pair_classes, pair_codes = np.divmod(pair_keys, n_sensitive)
+    counts = pair_counts.to_numpy()
+    stats["distinct"] = np.bincount(pair_classes, minlength=n_classes)
+
+    global_p = np.bincount(sensitive_codes, minlength=n_sensitive) / class_ids.size
+    class_p = counts / stats["size"].to_numpy()[pair_classes]
+    if ordered:
+        # Earth mover's distance over ordered bins: mean absolute difference between the class CDF F and the
+        # global CDF G over bins 0 .. n_sensitive - 2. Without densifying: F is a step function that only
+        # changes at the class's present codes, so each code starts a segment [code, next code) at a
+        # constant level. G is nondecreasing, so within a segment |F - G| splits at the one bin where G
+        # passes the level, and both halves are read off the prefix sums of G.
+        order = np.argsort(pair_keys)  # By (class, code)
+        pair_classes, pair_codes, class_p = pair_classes[order], pair_codes[order], class_p[order]
+        level = pd.Series(class_p).groupby(pair_classes).cumsum().to_numpy()
+        same_class_next = np.append(pair_classes[1:] == pair_classes[:-1], False)
+        seg_start = pair_codes
+        # A class's last segment runs to the end of the compared bins
+        seg_end = np.where(same_class_next, np.append(pair_codes[1:], 0), n_sensitive - 1)
+
+        global_cdf = np.cumsum(global_p)
+        cdf_prefix = np.concatenate(([0.0], np.cumsum(global_cdf)))  # cdf_prefix[j] = G(0) + ... + G(j - 1)
+        split = np.clip(np.searchsorted(global_cdf, level, side='right'), seg_start, seg_end)
+        below = level * (split - seg_start) - (cdf_prefix[split] - cdf_prefix[seg_start])
+        above = (cdf_prefix[seg_end] - cdf_prefix[split]) - level * (seg_end - split)
+        total = np.bincount(pair_classes, weights=below + above, minlength=n_classes)
+
+        # Bins before a class's first code: F = 0 there, so they add G itself
+        first = np.flatnonzero(np.insert(pair_classes[1:] != pair_classes[:-1], 0, True))
+        total[pair_classes[first]] += cdf_prefix[pair_codes[first]]
+        stats["distance"] = total / max(n_sensitive - 1, 1)
+    else:
+        # Total variation distance without densifying: values absent from a class contribute their global mass
+        present_global = global_p[pair_codes]
+        abs_diff = np.bincount(pair_classes, weights=np.abs(class_p - present_global), minlength=n_classes)
+        covered = np.bincount(pair_classes, weights=present_global, minlength=n_classes)
+        stats["distance"] = 0.5 * (abs_diff + (1.0 - covered))
+    return stats
+
+
+def _prepare_quasi_identifier(series: pd.Series) -> Dict[str, Any]:
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        values = series.to_numpy(dtype=np.float64)
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        return {"numeric": True, "values": values, "present": ~np.isnan(values), "codes": codes, "uniques": uniques}
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    return {"numeric": False, "codes": codes, "uniques": np.asarray(uniques, dtype=object)}
+
+
+def _generalise(prepared: Dict[str, Any], level: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Integer codes plus code -> label lookup for one quasi-identifier; higher levels are coarser."""
+    if level == 0:
+        return prepared["codes"].astype(np.int64), prepared["uniques"]
+    if prepared["numeric"]:
+        values, present = prepared["values"], prepared["present"]
+        n_bins = max(1, NUMERIC_START_BINS >> (level - 1))
+        edges = np.unique(np.quantile(values[present], np.linspace(0, 1, n_bins + 1))) if present.any() else np.array([0.0, 0.0])
+        n_labels = max(edges.size - 1, 1)
+        bins = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, n_labels - 1)
+        labels = [f"[{lo:g}, {hi:g}]" for lo, hi in zip(edges[:-1], edges[1:])] or ["*"]
+        # Nulls stay null, under their own code
+        return np.where(present, bins, n_labels).astype(np.int64), np.array(labels + [None], dtype=object)
+    # Categories rarer than k * 2^(level-1) are merged into '*'
+    codes, uniques = prepared["codes"], prepared["uniques"]
+    rare = np.bincount(codes, minlength=uniques.size) < k * (1 << (level - 1))
+    lookup = np.where(rare, uniques.size, np.arange(uniques.size))
+    return lookup[codes].astype(np.int64), np.append(uniques, np.array(['*'], dtype=object))
+
+
+def enforce_privacy(
+    df: pd.DataFrame,
+    k: Optional[int] = None,
+    l: Optional[int] = None,
+    t: Optional[float] = None,
+    quasi_identifiers: Optional[List[str]] = None,
+    sensitive_column: Optional[str] = None,
+    anonymize: bool = True,
+    max_rounds: int = 8,
+    max_suppression: float = 0.05,
+    chunk_size: int = 1_000_000,
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """Check k-anonymity, l-diversity and t-closeness and, if `anonymize`, enforce them.
+
+    Each round packs the generalised quasi-identifier codes into equivalence
+    classes and checks k, l and t from one count table. While more than
+    `max_suppression` of the rows sit in failing classes the quasi-identifiers
+    are generalised one level further; after that the failing rows are
+    suppressed. With `anonymize=False` the table is only checked.
+    """
+    k = k or 1
+    if t is not None and t > 1:
+        t = t / 100.0 # Percentages are accepted as well as fractions
+    if sensitive_column is not None and sensitive_column not in df.columns:
+        raise ValueError(f"Sensitive column '{sensitive_column}' not found")
+    if quasi_identifiers is None:
+        quasi_identifiers = [col for col in df.columns if col != sensitive_column]
+    missing = [col for col in quasi_identifiers if col not in df.columns]
+    if missing:
+        raise ValueError(f"Quasi-identifier columns not found: {missing}")
+
+    sensitive_codes, n_sensitive, ordered = (None, 0, False)
+    if sensitive_column is not None:
+        sensitive_codes, n_sensitive, ordered = _sensitive_codes(df[sensitive_column])
+
+    report: Dict[str, Any] = {"quasi_identifiers": quasi_identifiers, "sensitive_column": sensitive_column,
+                              "targets": {"k": k, "l": l, "t": t}}
+    prepared = {col: _prepare_quasi_identifier(df[col]) for col in quasi_identifiers}
+    level = 0
+    while True:
+        generalised = {col: _generalise(prepared[col], level, k) for col in quasi_identifiers}
+        class_ids, n_classes = _class_ids([codes for codes, _ in generalised.values()],
+                                          [labels.size for _, labels in generalised.values()], len(df))
+        stats = equivalence_class_stats(class_ids, n_classes, sensitive_codes, n_sensitive, ordered, chunk_size)
+
+        failing = (stats["size"] < k).to_numpy()
+        if l is not None and sensitive_codes is not None:
+            failing |= (stats["distinct"] < l).to_numpy()
+        if t is not None and sensitive_codes is not None:
+            failing |= (stats["distance"] > t).to_numpy()
+        failing_rows = int(stats.loc[failing, "size"].sum())
+
+        if not anonymize or failing_rows == 0 or failing_rows <= max_suppression * len(df) or level >= max_rounds:
+            break
+        level += 1
+
+    suppressed = 0
+    if anonymize:
+        keep = np.ones(len(df), dtype=bool)
+        if failing_rows:
+            keep = ~failing[class_ids]
+            suppressed = int((~keep).sum())
+            stats = stats[~failing]
+        df = df[keep].copy() if suppressed else df.copy()
+        if level > 0:
+            # Labels are only materialised once, for the rows that are kept
+            for col, (codes, labels) in generalised.items():
+                df[col] = labels[codes[keep]]
+        df.reset_index(drop=True, inplace=True)
+
+    report.update({
+        "generalisation_level": level,
+        "equivalence_classes": int(len(stats)),
+        "rows_in_failing_classes": failing_rows,
+        "suppressed_rows": suppressed,
+        "k_achieved": int(stats["size"].min()) if len(stats) else 0,
+        "l_achieved": int(stats["distinct"].min()) if len(stats) and sensitive_codes is not None else None,
+        "t_achieved": float(stats["distance"].max()) if len(stats) and sensitive_codes is not None else None,
+    })
+    # Once failing classes are suppressed every remaining class meets the targets
+    report["status"] = "pass" if len(stats) and (anonymize or failing_rows == 0) else "fail"
+    return df, report
@@ -0,0 +1,137 @@
+import contextlib
+import math
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Any, ContextManager, Optional
+
+# Opt-in sampling profiler for DAG nodes.
+#
+# While a profiled node runs, a daemon thread reads the executing thread's
+# stack from sys._current_frames() every PROFILE_INTERVAL seconds and counts
+# identical stacks. The counts are written in the collapsed-stack format
+# ("outer;inner;leaf count" per line) that flamegraph.pl, speedscope and
+# inferno read directly. Nothing is started for runs that don't ask for it.
+#
+# Profiling is enabled per run with SyntheticDataDAG.profile, or for every run
+# by ENGINE_PROFILE_THRESHOLD_SECONDS: then sampling only begins once a node
+# has been running that long, so fast nodes cost one sleeping thread.
+#
+# The environment is read once, at import. An invalid ENGINE_PROFILE_INTERVAL
+# disables profiling altogether and an invalid threshold disables the
+# threshold; both are reported then rather than failing runs later.
+
+
+def _seconds_setting(name: str, default: Optional[str], allow_zero: bool, disables: str) -> Optional[float]:
+    """A finite, non-negative (positive unless `allow_zero`) number of seconds from the environment, or None."""
+    raw = os.environ.get(name, "").strip() or default # Blank counts as unset
+    if raw is None:
+        return None
+    try:
+        value = float(raw)
+    except ValueError:
+        value = math.nan
+    if not math.isfinite(value) or value < 0 or (value == 0 and not allow_zero):
+        print(f"Warning: invalid {name}={raw!r}; {disables}")
+        return None
+    return value
+
+
+DEFAULT_INTERVAL = 0.01
+# Seconds between samples; None when invalid, which turns profiling off
+PROFILE_INTERVAL = _seconds_setting("ENGINE_PROFILE_INTERVAL", str(DEFAULT_INTERVAL), False, "profiling is disabled")
+PROFILE_DIR = os.environ.get("ENGINE_PROFILE_DIR", "profiles") # Runs get a subdirectory here
+# Unset (or invalid): only runs with profile=True are profiled
+PROFILE_THRESHOLD = _seconds_setting("ENGINE_PROFILE_THRESHOLD_SECONDS", None, True, "only runs with profile=True are profiled")
+MAX_STACK_DEPTH = 256
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's stack until stopped, optionally after an initial delay."""
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_INTERVAL, delay: float = 0.0):
+        super().__init__(name=f"stack-sampler-{thread_id}", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.delay = delay
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._labels: Dict[Any, str] = {} # Code object -> frame label, so each function is formatted once
+        self._stopped = threading.Event()
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            # ';' separates frames in the collapsed format; the count follows the last space
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+            self._labels[code] = label
+        return label
+
+    def run(self) -> None:
+        if self.delay and self._stopped.wait(self.delay):
+            return
+        while not self._stopped.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            labels = []
+            while frame is not None and len(labels) < MAX_STACK_DEPTH:
+                labels.append(self._label(frame.f_code))
+                frame = frame.f_back
+            del frame
+            self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+            self._stopped.wait(self.interval)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class RunProfiler:
+    """Profiles the nodes of one DAG run and writes one .collapsed file per node."""
+
+    def __init__(self, directory: str, delay: float = 0.0, interval: float = DEFAULT_INTERVAL):
+        self.directory = directory
+        self.delay = delay
+        self.interval = interval
+        self.paths: Dict[str, str] = {}
+
+    @classmethod
+    def for_dag(cls, dag: Any) -> Optional["RunProfiler"]:
+        """A profiler when the run asks for one or a threshold is configured, otherwise None."""
+        requested = bool(getattr(dag, "profile", False))
+        if PROFILE_INTERVAL is None or (not requested and PROFILE_THRESHOLD is None):
+            return None
+        run_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", dag.id or dag.name or "dag")
+        directory = os.path.join(PROFILE_DIR, run_name, time.strftime("%Y%m%dT%H%M%SZ", time.gmtime()))
+        # An explicit request profiles the whole node; the threshold only catches slow ones
+        return cls(directory, delay=0.0 if requested else PROFILE_THRESHOLD, interval=PROFILE_INTERVAL)
+
+    @contextlib.contextmanager
+    def node(self, node: Any, metrics: Dict[str, Any]):
+        sampler = StackSampler(threading.get_ident(), self.interval, self.delay)
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            if sampler.samples:
+                os.makedirs(self.directory, exist_ok=True)
+                path = os.path.join(self.directory, f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', node.id)}.collapsed")
+                with open(path, "w") as f:
+                    f.write(sampler.collapsed())
+                self.paths[node.id] = path
+                metrics["profile_path"] = path
+                metrics["profile_samples"] = sampler.samples
+
+
+def profile_node(profiler: Optional[RunProfiler], node: Any, metrics: Dict[str, Any]) -> ContextManager:
+    # With profiling off this is a shared no-op context: no thread, no allocation per sample
+    return profiler.node(node, metrics) if profiler is not None else contextlib.nullcontext()
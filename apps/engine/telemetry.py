@@ -0,0 +1,95 @@
+import os
+import time
+from typing import Dict, Any
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+
+from instrumentation import hooks
+
+# Prometheus metrics for the engine.
+#
+# Node metrics are fed from the instrumentation hooks, so they reuse the
+# timings instrument_node already takes instead of measuring again. Recording
+# is a lock and an add per sample. With several uvicorn workers, point
+# PROMETHEUS_MULTIPROC_DIR at an empty writable directory before they start;
+# /metrics then aggregates every worker's samples.
+
+REQUEST_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+NODE_DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+THROUGHPUT_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7)
+
+REQUEST_LATENCY = Histogram(
+    "syntheta_engine_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=REQUEST_LATENCY_BUCKETS,
+)
+NODE_DURATION = Histogram(
+    "syntheta_engine_node_duration_seconds",
+    "DAG node execution time by node type",
+    ["node_type", "status"],
+    buckets=NODE_DURATION_BUCKETS,
+)
+NODE_ROWS = Counter(
+    "syntheta_engine_node_rows_out",
+    "Rows produced by DAG nodes",
+    ["node_type"],
+)
+# rate(syntheta_engine_rows_generated_total[5m]) is the fleet-wide rows/s
+ROWS_GENERATED = Counter("syntheta_engine_rows_generated", "Synthetic rows produced by generator nodes")
+GENERATOR_THROUGHPUT = Histogram(
+    "syntheta_engine_generator_rows_per_second",
+    "Per-node generator throughput",
+    buckets=THROUGHPUT_BUCKETS,
+)
+
+
+@hooks.on_node_end
+def record_node_metrics(node: Any, metrics: Dict[str, Any]) -> None:
+    node_type = metrics.get("node_type") or "unknown"
+    duration = metrics.get("duration_seconds") or 0.0
+    NODE_DURATION.labels(node_type=node_type, status=metrics.get("status", "unknown")).observe(duration)
+    rows_out = metrics.get("rows_out")
+    if not rows_out:
+        return
+    NODE_ROWS.labels(node_type=node_type).inc(rows_out)
+    if node_type == "generator" and metrics.get("status") == "completed":
+        ROWS_GENERATED.inc(rows_out)
+        if duration > 0:
+            GENERATOR_THROUGHPUT.observe(rows_out / duration)
+
+
+def route_label(scope: Dict[str, Any]) -> str:
+    # Route template rather than the raw path keeps label cardinality bounded
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+async def record_request_latency(request, call_next):
+    """HTTP middleware timing every request by method, route and status."""
+    start_time = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUEST_LATENCY.labels(method=request.method, route=route_label(request.scope),
+                               status=str(status)).observe(time.perf_counter() - start_time)
+
+
+def render_latest():
+    """Exposition payload and content type, aggregated over workers in multiprocess mode."""
+    registry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
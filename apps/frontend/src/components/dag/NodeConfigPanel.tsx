@@ -946,6 +946,7 @@ function NodeConfigPanel({ node, onConfigChange }: NodeConfigPanelProps) {
                       <SelectItem value="copulagan">CopulaGAN</SelectItem>
                       <SelectItem value="gaussian">Gaussian</SelectItem>
                       <SelectItem value="uniform">Uniform</SelectItem>
+                      <SelectItem value="empirical">Empirical</SelectItem>
                       <SelectItem value="custom">Custom</SelectItem>
                     </SelectContent>
                   </Select>
@@ -1581,7 +1582,7 @@ function NodeConfigPanel({ node, onConfigChange }: NodeConfigPanelProps) {
                   <Label>Select Metrics</Label>
                   <div className="grid grid-cols-2 gap-2">
                     {/* Common metrics to select */}
-                    {[ 'mean', 'std', 'min', 'max', 'median', 'null_count', 'unique_count', 'most_common' ].map((metric) => (
+                    {[ 'mean', 'std', 'min', 'max', 'median', 'null_count', 'unique_count', 'most_common', 'ks', 'wasserstein', 'tvd', 'correlation_difference', 'pearson', 'spearman', 'kendall', 'dcr', 'nndr', 'membership_inference' ].map((metric) => (
                       <div key={metric} className="flex items-center space-x-2">
                         <Switch
                           id={`metric-${metric}`}
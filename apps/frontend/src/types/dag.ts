@@ -26,6 +26,8 @@ export interface SyntheticDataDAG {
   description?: string;
   nodes: DagNode[];
   edges: DagEdge[];
+  profile?: boolean; // Ask the engine for a sampling profile of every node
+  version?: number; // Backend version number; history is served from /dags/{id}/versions/
   // Add other DAG-level properties here (e.g., creation date, last modified, workspace ID)
 }
 
@@ -114,7 +116,7 @@ export type SourceNodeConfig = z.infer<typeof SourceNodeConfigSchema>;
 
 // Generator Node Configuration
 export const GeneratorNodeConfigSchema = z.object({
-  type: z.enum(['ctgan', 'tvae', 'copulagan', 'gaussian', 'uniform', 'custom']),
+  type: z.enum(['ctgan', 'tvae', 'copulagan', 'gaussian', 'uniform', 'empirical', 'custom']),
   parameters: z.object({
     // Common parameters
     num_samples: z.number().min(1),
@@ -137,6 +139,11 @@ export const GeneratorNodeConfigSchema = z.object({
     // Custom generator
     custom_script: z.string().optional(),
     custom_requirements: z.array(z.string()).optional(),
+
+    // Empirical specific
+    numeric_model: z.enum(['histogram', 'kde']).optional(),
+    n_bins: z.number().min(1).optional(),
+    model_path: z.string().optional(),
   }),
   constraints: z.array(z.object({
     column: z.string(),
@@ -158,6 +165,9 @@ export const GeneratorNodeConfigSchema = z.object({
       
       // Custom constraints
       custom_rule: z.string().optional(),
+
+      // How range violations are fixed (defaults to resample)
+      enforcement: z.enum(['clip', 'resample']).optional(),
     }),
   })).optional(),
   data_quality: z.object({
@@ -166,6 +176,8 @@ export const GeneratorNodeConfigSchema = z.object({
       k_anonymity: z.number().optional(),
       l_diversity: z.number().optional(),
       t_closeness: z.number().optional(),
+      quasi_identifiers: z.array(z.string()).optional(),
+      sensitive_column: z.string().optional(),
     }).optional(),
     validation: z.object({
       required_metrics: z.array(z.string()).optional(),
@@ -205,6 +217,7 @@ export type DataQualityRule = z.infer<typeof DataQualityRuleSchema>;
 // Evaluator Node Configuration
 export const EvaluatorNodeConfigSchema = z.object({
   metrics: z.array(z.string()).optional(), // Make metrics optional as per usage
+  sample_size: z.number().optional(), // Caps rows used by dataset-level metrics (dcr, correlation matrices, ...)
   validation: z.object({
     required_metrics: z.array(z.string()).optional(),
     thresholds: z.record(z.number()).optional(),